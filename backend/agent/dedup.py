@@ -0,0 +1,146 @@
+"""
+Índice incremental de deduplicación de artículos
+
+- URLs: conjunto hash de URLs canónicas (sin parámetros UTM ni de tracking).
+- Títulos: firmas MinHash de las palabras del título indexadas con LSH
+  (20 bandas x 5 filas). Cada consulta solo compara, con Jaccard exacto,
+  contra los títulos que comparten alguna banda, así que el coste por
+  artículo es casi constante en vez de crecer con los artículos vistos.
+  Con umbral 0.85 la probabilidad de no detectar un par similar es < 1e-5
+  y nunca hay falsos positivos (todo candidato se verifica).
+"""
+
+import random
+import re
+import zlib
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple
+from urllib.parse import urlparse, parse_qs, urlencode, urlunparse
+
+WORD_RE = re.compile(r"\w+")
+
+# Parámetros a remover (UTM y tracking)
+TRACKING_PARAMS = frozenset([
+    "utm_source", "utm_medium", "utm_campaign", "utm_term", "utm_content",
+    "fbclid", "gclid", "ref", "source", "medium", "campaign"
+])
+
+
+@lru_cache(maxsize=65536)
+def canonical_url(url: str) -> str:
+    """Limpiar URL removiendo parámetros UTM y tracking"""
+    if not url:
+        return ""
+
+    try:
+        parsed = urlparse(url)
+        query_params = parse_qs(parsed.query)
+
+        # Filtrar parámetros
+        clean_params = {k: v for k, v in query_params.items() if k not in TRACKING_PARAMS}
+
+        # Reconstruir URL
+        clean_query = urlencode(clean_params, doseq=True)
+        return urlunparse(parsed._replace(query=clean_query))
+    except Exception:
+        return url
+
+
+def title_words(title: str) -> FrozenSet[str]:
+    """Conjunto de palabras del título usado para la similitud Jaccard"""
+    return frozenset(WORD_RE.findall(str(title or "").lower()))
+
+
+# Parámetros LSH: P(candidato) = 1 - (1 - J^ROWS)^BANDS
+LSH_BANDS = 20
+LSH_ROWS = 5
+_MERSENNE_PRIME = (1 << 61) - 1
+_rng = random.Random(20240808)  # Semilla fija: firmas reproducibles entre procesos
+_PERMUTATIONS = [
+    (_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME))
+    for _ in range(LSH_BANDS * LSH_ROWS)
+]
+
+
+@lru_cache(maxsize=32768)
+def _token_hashes(token: str) -> Tuple[int, ...]:
+    """Valores hash de una palabra bajo cada permutación (cacheados por palabra)"""
+    base = zlib.crc32(token.encode("utf-8"))
+    return tuple((a * base + b) % _MERSENNE_PRIME for a, b in _PERMUTATIONS)
+
+
+@lru_cache(maxsize=16384)
+def minhash_signature(words: FrozenSet[str]) -> Tuple[int, ...]:
+    """
+    Firma MinHash del conjunto de palabras
+
+    Cacheada por título: con el fetch incremental el índice se vuelve a
+    sembrar en cada refresco con los mismos resultados acumulados.
+    """
+    return tuple(map(min, zip(*(_token_hashes(token) for token in words))))
+
+
+class DedupIndex:
+    """Índice de artículos aceptados para detectar duplicados en tiempo casi constante"""
+
+    def __init__(self, threshold: float = 0.85):
+        self.threshold = threshold
+        self._urls: Set[str] = set()
+        self._titles: List[FrozenSet[str]] = []
+        self._buckets: List[Dict[Tuple[int, ...], List[int]]] = [{} for _ in range(LSH_BANDS)]
+
+    def __len__(self) -> int:
+        return len(self._titles)
+
+    @staticmethod
+    def _band_keys(words: FrozenSet[str]) -> List[Tuple[int, ...]]:
+        signature = minhash_signature(words)
+        return [signature[band * LSH_ROWS:(band + 1) * LSH_ROWS] for band in range(LSH_BANDS)]
+
+    def has_url(self, clean_url: str) -> bool:
+        """¿Ya se aceptó un artículo con esta URL canónica?"""
+        return bool(clean_url) and clean_url in self._urls
+
+    def has_similar_title(self, words: FrozenSet[str]) -> bool:
+        """¿Hay algún título aceptado con similitud Jaccard >= umbral?"""
+        if not words:
+            return False
+
+        size = len(words)
+        checked: Set[int] = set()
+
+        for band, key in enumerate(self._band_keys(words)):
+            for entry_id in self._buckets[band].get(key, ()):
+                if entry_id in checked:
+                    continue
+                checked.add(entry_id)
+
+                seen_words = self._titles[entry_id]
+                intersection = len(words & seen_words)
+                union = size + len(seen_words) - intersection
+                if intersection / union >= self.threshold:
+                    return True
+
+        return False
+
+    def check(self, url: str, title: str) -> Optional[str]:
+        """Devolver 'url' o 'title' si el artículo es duplicado, o None si es nuevo"""
+        if self.has_url(canonical_url(url)):
+            return "url"
+        if self.has_similar_title(title_words(title)):
+            return "title"
+        return None
+
+    def add(self, url: str, title: str) -> None:
+        """Registrar un artículo aceptado"""
+        clean_url = canonical_url(url)
+        if clean_url:
+            self._urls.add(clean_url)
+
+        words = title_words(title)
+        entry_id = len(self._titles)
+        self._titles.append(words)
+
+        if words:
+            for band, key in enumerate(self._band_keys(words)):
+                self._buckets[band].setdefault(key, []).append(entry_id)
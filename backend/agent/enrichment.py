@@ -0,0 +1,225 @@
+"""
+Enriquecimiento opcional de artículos con LLM (categoría + resumen breve)
+
+- Varios artículos por prompt y un número acotado de llamadas concurrentes.
+- Resultados cacheados en disco por hash de título + descripción.
+- El LLM va detrás de la interfaz `EnrichmentLLM`: en producción
+  `ChatOpenAIEnrichment` (el ChatOpenAI del agente, creado en el primer uso) y en benchmarks
+  `FakeEnrichmentLLM`, determinista y sin red.
+"""
+
+import asyncio
+import json
+import logging
+import re
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, List, Optional
+
+from agent.keywords import KeywordMatcher
+from core.llm_cache import LLMResultCache, content_key
+
+logger = logging.getLogger(__name__)
+
+CATEGORIES = ("ai", "marketing", "both", "none")
+
+# Cambiar la versión invalida la caché cuando cambia el prompt o el formato
+PROMPT_VERSION = "v1"
+
+SYSTEM_PROMPT = (
+    "You classify news articles for a newsroom about Artificial Intelligence and Marketing. "
+    "For each article return its category: \"ai\", \"marketing\", \"both\" (AI applied to "
+    "marketing/advertising) or \"none\", and a one-sentence summary of at most 30 words. "
+    "Answer ONLY with a JSON array of objects {\"id\": int, \"category\": str, \"summary\": str}, "
+    "one per article, in any order."
+)
+
+
+class EnrichmentLLM(ABC):
+    """Interfaz del LLM de enriquecimiento: un lote de artículos por llamada"""
+
+    # Identifica modelo + prompt en la clave de caché
+    name = "base"
+
+    @abstractmethod
+    async def enrich_batch(self, articles: List[Dict[str, Any]]) -> List[Optional[Dict[str, str]]]:
+        """Devolver {"category", "summary"} por artículo, en el mismo orden (None si falta)"""
+
+
+class ChatOpenAIEnrichment(EnrichmentLLM):
+    """
+    Enriquecimiento con un cliente ChatOpenAI de LangChain
+
+    `llm_factory` devuelve el cliente y solo se llama en el primer lote:
+    langchain_openai tarda en importarse y no debe pesar en el arranque.
+    """
+
+    def __init__(self, llm_factory: Callable[[], Any], model_name: str):
+        self._llm_factory = llm_factory
+        self.name = f"openai:{model_name}:{PROMPT_VERSION}"
+
+    @staticmethod
+    def _format_articles(articles: List[Dict[str, Any]]) -> str:
+        lines = []
+        for index, article in enumerate(articles):
+            title = (article.get("title") or "").strip()
+            description = (article.get("description") or "").strip()
+            lines.append(f"[{index}] {title}\n{description}")
+        return "\n\n".join(lines)
+
+    @staticmethod
+    def _parse_response(content: str, size: int) -> List[Optional[Dict[str, str]]]:
+        """Extraer el array JSON de la respuesta, tolerando bloques ```json```"""
+        match = re.search(r"\[.*\]", content, re.DOTALL)
+        if match is None:
+            raise ValueError("La respuesta del LLM no contiene un array JSON")
+
+        results: List[Optional[Dict[str, str]]] = [None] * size
+        for item in json.loads(match.group(0)):
+            try:
+                index = int(item["id"])
+            except (KeyError, TypeError, ValueError):
+                continue
+            category = str(item.get("category", "none")).lower()
+            if 0 <= index < size and category in CATEGORIES:
+                results[index] = {"category": category, "summary": str(item.get("summary", "")).strip()}
+        return results
+
+    async def enrich_batch(self, articles: List[Dict[str, Any]]) -> List[Optional[Dict[str, str]]]:
+        from langchain_core.messages import HumanMessage, SystemMessage
+
+        response = await self._llm_factory().ainvoke([
+            SystemMessage(content=SYSTEM_PROMPT),
+            HumanMessage(content=self._format_articles(articles)),
+        ])
+        return self._parse_response(response.content, len(articles))
+
+
+class FakeEnrichmentLLM(EnrichmentLLM):
+    """
+    LLM local determinista para benchmarks y desarrollo sin clave de OpenAI.
+
+    Clasifica con el matcher de keywords, resume con la primera frase de la
+    descripción y simula la latencia de una llamada (fija + por artículo).
+    """
+
+    name = f"fake:{PROMPT_VERSION}"
+
+    def __init__(
+        self,
+        keyword_matcher: KeywordMatcher,
+        latency: float = 0.0,
+        per_article_latency: float = 0.0
+    ):
+        self.keyword_matcher = keyword_matcher
+        self.latency = latency
+        self.per_article_latency = per_article_latency
+        self.calls = 0
+        self.articles_seen = 0
+        self.max_in_flight = 0
+        self._in_flight = 0
+
+    async def enrich_batch(self, articles: List[Dict[str, Any]]) -> List[Optional[Dict[str, str]]]:
+        self.calls += 1
+        self.articles_seen += len(articles)
+        self._in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self._in_flight)
+        try:
+            await asyncio.sleep(self.latency + self.per_article_latency * len(articles))
+        finally:
+            self._in_flight -= 1
+
+        results = []
+        for article in articles:
+            title = article.get("title") or ""
+            description = article.get("description") or ""
+            matches = self.keyword_matcher.match(f"{title} {description}".lower())
+            has_ai, has_marketing = "ai" in matches, "marketing" in matches
+            if has_ai and has_marketing:
+                category = "both"
+            elif has_ai:
+                category = "ai"
+            elif has_marketing:
+                category = "marketing"
+            else:
+                category = "none"
+            summary = re.split(r"(?<=[.!?])\s", description.strip(), maxsplit=1)[0] or title
+            results.append({"category": category, "summary": " ".join(summary.split()[:30])})
+        return results
+
+
+class ArticleEnricher:
+    """Enriquecer artículos por lotes, con concurrencia acotada y caché en disco"""
+
+    def __init__(
+        self,
+        llm: EnrichmentLLM,
+        cache: LLMResultCache,
+        batch_size: int = 10,
+        max_concurrency: int = 4
+    ):
+        self.llm = llm
+        self.cache = cache
+        self.batch_size = max(batch_size, 1)
+        self._semaphore = asyncio.Semaphore(max(max_concurrency, 1))
+        self.stats = {"hits": 0, "misses": 0, "llm_calls": 0, "errors": 0}
+
+    def _key(self, article: Dict[str, Any]) -> str:
+        return content_key(article.get("title"), article.get("description"), self.llm.name)
+
+    async def _run_batch(self, batch: List[Dict[str, Any]]) -> List[Optional[Dict[str, str]]]:
+        async with self._semaphore:
+            self.stats["llm_calls"] += 1
+            try:
+                return await self.llm.enrich_batch(batch)
+            except Exception as e:
+                # El enriquecimiento es opcional: un lote fallido no tumba la request
+                self.stats["errors"] += 1
+                logger.warning(f"⚠️ Error en el lote de enriquecimiento LLM: {str(e)}")
+                return [None] * len(batch)
+
+    async def enrich(self, articles: List[Dict[str, Any]]) -> List[Optional[Dict[str, str]]]:
+        """
+        Resultado de enriquecimiento por artículo (None si no se pudo obtener)
+
+        Los artículos ya vistos salen de la caché; el resto se agrupa en
+        lotes de batch_size (sin repetir contenido) y se envía al LLM.
+        """
+        keys = [self._key(article) for article in articles]
+        cached = await asyncio.to_thread(self.cache.get_many, keys)
+
+        # Un solo envío por contenido aunque se repita en la lista
+        pending: Dict[str, Dict[str, Any]] = {}
+        for key, article in zip(keys, articles):
+            if key not in cached and key not in pending:
+                pending[key] = article
+
+        self.stats["hits"] += len(articles) - len(pending)
+        self.stats["misses"] += len(pending)
+
+        if pending:
+            pending_keys = list(pending)
+            batches = [pending_keys[i:i + self.batch_size] for i in range(0, len(pending_keys), self.batch_size)]
+            outputs = await asyncio.gather(*[
+                self._run_batch([pending[key] for key in batch]) for batch in batches
+            ])
+
+            fresh = {}
+            for batch, output in zip(batches, outputs):
+                for key, result in zip(batch, output):
+                    if result is not None:
+                        fresh[key] = result
+            await asyncio.to_thread(self.cache.put_many, fresh)
+            cached.update(fresh)
+
+        return [cached.get(key) for key in keys]
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "hit_ratio": round(self.stats["hits"] / lookups, 4) if lookups else 0.0,
+            "batch_size": self.batch_size,
+        }
+
+    def close(self) -> None:
+        self.cache.close()
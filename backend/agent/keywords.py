@@ -0,0 +1,122 @@
+"""
+Motor de matching multi-keyword para la clasificación de artículos
+
+Las keywords se compilan una sola vez en una tabla hash de n-gramas de
+palabras. Para clasificar un texto se tokeniza una vez y se consulta cada
+posición con n-gramas de hasta `max_words` palabras, de modo que el coste
+depende de la longitud del texto y no del número de keywords, y los
+matches respetan los límites de palabra ("ai" ya no casa con "said").
+"""
+
+import json
+import logging
+import re
+from typing import Dict, Iterable, List, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+TOKEN_RE = re.compile(r"\w+")
+
+
+def _plural_variants(word: str) -> Set[str]:
+    """Formas plurales regulares en inglés ("brand" -> "brands", "strategy" -> "strategies")"""
+    if word.endswith(("s", "x", "z", "ch", "sh")):
+        return {word + "es"}
+    if word.endswith("y") and len(word) > 1 and word[-2] not in "aeiou":
+        return {word[:-1] + "ies", word + "s"}
+    return {word + "s"}
+
+
+class KeywordMatcher:
+    """
+    Matcher compilado de keywords por categoría.
+
+    Cada keyword (una o varias palabras) se indexa junto con sus variantes
+    plurales. `match()` devuelve, en una sola pasada sobre el texto, todas
+    las keywords encontradas agrupadas por categoría.
+    """
+
+    def __init__(self, keyword_sets: Dict[str, Iterable[str]]):
+        # n-grama ("google ads") -> [(categoría, keyword original)]
+        self._table: Dict[str, List[Tuple[str, str]]] = {}
+        # Primeras palabras de keywords multi-palabra: evita probar n-gramas inútiles
+        self._phrase_heads: Set[str] = set()
+        self.max_words = 1
+        self.categories = tuple(keyword_sets)
+
+        for category, keywords in keyword_sets.items():
+            for keyword in keywords:
+                self._add(category, keyword)
+
+        logger.info(
+            f"🔤 KeywordMatcher compilado: {len(self._table)} n-gramas, "
+            f"{len(self.categories)} categorías"
+        )
+
+    def _add(self, category: str, keyword: str) -> None:
+        words = TOKEN_RE.findall(keyword.lower())
+        if not words:
+            return
+
+        self.max_words = max(self.max_words, len(words))
+        if len(words) > 1:
+            self._phrase_heads.add(words[0])
+
+        variants = {" ".join(words)}
+        variants.update(" ".join(words[:-1] + [plural]) for plural in _plural_variants(words[-1]))
+
+        for variant in variants:
+            entries = self._table.setdefault(variant, [])
+            if (category, keyword) not in entries:
+                entries.append((category, keyword))
+
+    def match(self, text: str) -> Dict[str, List[str]]:
+        """Devolver {categoría: [keywords encontradas]} para el texto dado"""
+        tokens = TOKEN_RE.findall(text.lower())
+        table = self._table
+        matches: Dict[str, List[str]] = {}
+
+        for i, token in enumerate(tokens):
+            hits = table.get(token)
+            if hits:
+                for category, keyword in hits:
+                    found = matches.setdefault(category, [])
+                    if keyword not in found:
+                        found.append(keyword)
+
+            if token not in self._phrase_heads:
+                continue
+
+            for n in range(2, min(self.max_words, len(tokens) - i) + 1):
+                hits = table.get(" ".join(tokens[i:i + n]))
+                if hits:
+                    for category, keyword in hits:
+                        found = matches.setdefault(category, [])
+                        if keyword not in found:
+                            found.append(keyword)
+
+        return matches
+
+
+def load_keyword_sets(path: str, defaults: Dict[str, Iterable[str]]) -> Dict[str, List[str]]:
+    """
+    Cargar las keywords por categoría desde un JSON ({"ai": [...], "marketing": [...]}).
+
+    Las categorías presentes en el fichero sustituyen a las de por defecto.
+    Si no hay fichero o no se puede leer, se usan los valores por defecto.
+    """
+    keyword_sets = {category: list(keywords) for category, keywords in defaults.items()}
+
+    if not path:
+        return keyword_sets
+
+    try:
+        with open(path, "r") as f:
+            data = json.load(f)
+        for category, keywords in data.items():
+            keyword_sets[category] = [str(keyword) for keyword in keywords]
+        logger.info(f"🔤 Keywords cargadas desde {path}")
+    except Exception as e:
+        logger.warning(f"Error cargando keywords desde {path}: {e}")
+
+    return keyword_sets
@@ -4,18 +4,34 @@ Cada operación es un nodo independiente para máxima modularidad
 """
 
 import os
-import requests
-import json
-import re
-from typing import List, Dict, Any, TypedDict
-from datetime import datetime, timedelta
+import asyncio
+import importlib.util
+import random
+import time
+from typing import List, Dict, Any, AsyncIterator, Awaitable, Callable, Optional, Tuple, TypedDict, TYPE_CHECKING
 import logging
-from urllib.parse import urlparse, parse_qs, urlencode, urlunparse
 
-from langchain_openai import ChatOpenAI
-from langchain_core.messages import HumanMessage, SystemMessage
-from langgraph.graph import StateGraph, END
+import httpx
 from dotenv import load_dotenv
+from tenacity import AsyncRetrying, RetryCallState, retry_if_exception, stop_after_attempt, wait_exponential_jitter
+
+from agent.dedup import DedupIndex, canonical_url
+from agent.enrichment import ArticleEnricher, ChatOpenAIEnrichment, FakeEnrichmentLLM
+from agent.keywords import KeywordMatcher, load_keyword_sets
+from agent.ranking import RankingWeights, ScoreParts, configured_weights, rank_articles, score_parts
+from core.circuit_breaker import CircuitBreaker, parse_retry_after
+from core.config import settings
+from core.llm_cache import LLMResultCache
+from core.metrics import metrics, timed_node
+from core.quota import QuotaLedger
+from core.image_cache import PLACEHOLDER_KEY, ImageProxy
+from core.incremental_store import IncrementalStore
+from core.search_index import ArticleSearchIndex
+
+# langchain_openai y langgraph se importan en el primer uso (arranque en frío de Cloud Run)
+if TYPE_CHECKING:
+    from langchain_openai import ChatOpenAI
+    from langgraph.graph.state import CompiledStateGraph
 
 # Cargar variables de entorno
 load_dotenv()
@@ -24,6 +40,24 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Callback de streaming: (filtro, artículo aceptado)
+ArticleCallback = Callable[[str, Dict[str, Any]], Awaitable[None]]
+
+# HTTP/2 solo si el paquete opcional h2 está instalado
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+# Respuestas de NewsAPI que se reintentan (además de los errores de conexión)
+RETRYABLE_STATUS = frozenset({429, 500, 502, 503, 504})
+RETRY_BACKOFF = wait_exponential_jitter(initial=0.5, max=settings.NEWS_RETRY_MAX_WAIT)
+
+class RetryableStatus(Exception):
+    """Respuesta HTTP reintentable; lleva la respuesta y su Retry-After"""
+    
+    def __init__(self, response: httpx.Response):
+        super().__init__(f"HTTP {response.status_code}")
+        self.response = response
+        self.retry_after = parse_retry_after(response.headers.get("retry-after"))
+
 class AgentState(TypedDict):
     """Estado del agente LangGraph con granularidad máxima"""
     query: str
@@ -35,13 +69,81 @@ class AgentState(TypedDict):
     final_news: List[Dict]
     article_category: str
     is_duplicate: bool
+    candidates: List[Dict]
+    dedup_index: Any
     should_continue: bool
     error_message: str
+    used_sample: bool
+    filters: List[str]
+    results_by_filter: Dict[str, Any]
+    page_stream: Any
+    pages_fetched: int
+    quota_used: int
+    pages_exhausted: bool
+    scan_offset: int
+    selected: List[Dict]
+    on_article: Any
+    incremental: bool
+    watermark: Optional[str]
+    backfill_to: Optional[str]
+    high_watermark: Optional[str]
+    state_version: Optional[float]
+    newest_published: str
+    oldest_published: str
+    more_available: bool
+    previous_news: List[Dict]
+    previous_results: Dict[str, List[Dict]]
+    merged_news: List[Dict]
+    ranked_news: List[Dict]
+    ranking_cache: Dict[str, Tuple[float, Dict[str, Any]]]
+    unchanged: bool
 
 class NewsAgent:
-    """Agente granular para obtener y filtrar noticias usando LangGraph + OpenAI"""
+    """
+    Agente granular para obtener y filtrar noticias usando LangGraph + OpenAI
+
+    Una instancia se crea una vez por worker y se comparte entre requests:
+    el grafo compilado, el cliente LLM y las tablas de keywords son de solo
+    lectura, y todo el estado de cada ejecución vive en el AgentState.
+    """
     
-    def __init__(self):
+    # Palabras clave por defecto (compartidas, inmutables); ver NEWS_KEYWORDS_FILE
+    AI_KEYWORDS = (
+        "ai", "artificial intelligence", "machine learning", "neural", "gpt", "llm", 
+        "chatgpt", "openai", "deep learning", "algorithm", "tensorflow", "pytorch",
+        "computer vision", "nlp", "natural language processing", "automation",
+        "robotics", "generative ai", "cognitive computing", "data science",
+        "predictive", "intelligent", "smart", "tech", "innovation", "digital",
+        "model", "training", "neural network", "transformer", "language model"
+    )
+    MARKETING_KEYWORDS = (
+        "marketing", "advertising", "campaign", "brand", "seo", "conversion", 
+        "digital marketing", "social media", "content marketing", "email marketing",
+        "influencer", "crm", "analytics", "google ads", "facebook ads", "roi",
+        "customer acquisition", "lead generation", "brand awareness", "business",
+        "sales", "promotion", "commerce", "advertising", "media", "engagement",
+        "customer", "client", "market", "revenue", "growth", "strategy"
+    )
+    
+    PIPELINE_MODES = ("batch", "article")
+    FETCH_MODES = ("per_filter", "union")
+    FILTERS = ("ai", "marketing", "both")
+    # Un refresco sin artículos nuevos reutiliza el orden anterior durante este tiempo;
+    # después se vuelve a rankear para que la recencia no se quede atrás
+    RANKING_REUSE_SECONDS = 3600
+    LLM_MODEL = "gpt-4o-mini"  # Modelo más económico
+    
+    def __init__(
+        self,
+        http_client: Optional[httpx.AsyncClient] = None,
+        pipeline_mode: Optional[str] = None,
+        quota_ledger: Optional[QuotaLedger] = None,
+        fetch_mode: Optional[str] = None,
+        enricher: Optional[ArticleEnricher] = None,
+        search_index: Optional[ArticleSearchIndex] = None,
+        image_proxy: Optional[ImageProxy] = None,
+        incremental_store: Optional[IncrementalStore] = None
+    ):
         self.news_api_key = os.getenv("NEWS_API_KEY")
         self.openai_api_key = os.getenv("OPENAI_API_KEY")
         
@@ -50,114 +152,531 @@ class NewsAgent:
         if not self.openai_api_key:
             raise ValueError("OPENAI_API_KEY no encontrada en las variables de entorno")
         
-        # Inicializar modelo OpenAI
-        self.llm = ChatOpenAI(
-            api_key=self.openai_api_key,
-            model="gpt-4o-mini",  # Modelo más económico
-            temperature=0.3
+        # Modelo OpenAI: se crea en el primer uso (ver la propiedad `llm`)
+        self._llm: Optional["ChatOpenAI"] = None
+        
+        # Cliente HTTP compartido (keep-alive + pool de conexiones) para NewsAPI
+        self.http_client = http_client or httpx.AsyncClient(
+            timeout=settings.NEWS_API_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=settings.HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE
+            ),
+            http2=HTTP2_AVAILABLE
+        )
+        
+        # Matcher de keywords compilado una vez (configurable con NEWS_KEYWORDS_FILE)
+        self.keyword_matcher = KeywordMatcher(load_keyword_sets(
+            settings.NEWS_KEYWORDS_FILE,
+            {"ai": self.AI_KEYWORDS, "marketing": self.MARKETING_KEYWORDS}
+        ))
+        
+        # Fracción de logs por artículo que se emiten (a nivel DEBUG)
+        self.log_sample_rate = settings.LOG_ARTICLE_SAMPLE_RATE
+        
+        # Umbral Jaccard para considerar dos títulos duplicados
+        self.title_similarity_threshold = 0.85
+        
+        # Límites de selección de artículos
+        self.scan_limit = settings.NEWS_SCAN_LIMIT
+        self.min_results = settings.NEWS_MIN_RESULTS
+        self.max_results = settings.NEWS_MAX_RESULTS
+        
+        # Paginación perezosa: páginas extra solo si la primera no basta
+        self.page_size = settings.NEWS_PAGE_SIZE
+        self.max_pages = max(settings.NEWS_MAX_PAGES, 1)
+        
+        # "batch": nodos vectorizados sobre todo raw_news (por defecto)
+        # "article": bucle nodo a nodo por artículo (modo debug)
+        self.pipeline_mode = (pipeline_mode or settings.NEWS_PIPELINE_MODE).lower()
+        if self.pipeline_mode not in self.PIPELINE_MODES:
+            raise ValueError(f"Modo de pipeline no soportado: {self.pipeline_mode}")
+        
+        # "per_filter": una consulta a NewsAPI por filtro
+        # "union": una sola consulta amplia clasificada localmente en los tres filtros
+        self.fetch_mode = (fetch_mode or settings.NEWS_FETCH_MODE).lower()
+        if self.fetch_mode not in self.FETCH_MODES:
+            raise ValueError(f"Modo de fetch no soportado: {self.fetch_mode}")
+        
+        # Enriquecimiento opcional con LLM (categoría + resumen), por lotes y cacheado
+        self.enricher = enricher
+        if self.enricher is None and settings.LLM_ENRICHMENT:
+            if settings.LLM_ENRICHMENT_BACKEND == "fake":
+                enrichment_llm = FakeEnrichmentLLM(self.keyword_matcher)
+            else:
+                enrichment_llm = ChatOpenAIEnrichment(lambda: self.llm, self.LLM_MODEL)
+            self.enricher = ArticleEnricher(
+                enrichment_llm,
+                LLMResultCache(settings.LLM_CACHE_PATH),
+                batch_size=settings.LLM_BATCH_SIZE,
+                max_concurrency=settings.LLM_MAX_CONCURRENCY
+            )
+        
+        # Índice full-text local: cada página descargada se indexa (lo gestiona quien lo crea)
+        self.search_index = search_index
+        
+        # Proxy de miniaturas: las imágenes se sirven desde /api/image/{hash} (lo gestiona quien lo crea)
+        self.image_proxy = image_proxy
+        
+        # Fetch incremental (pipelines batch y union): solo artículos posteriores a la
+        # marca de agua de cada consulta, fusionados con los anteriores (lo gestiona quien lo crea)
+        self.incremental_store = incremental_store
+        self.result_set_max = settings.NEWS_RESULT_SET_MAX
+        # Índices de dedup ya sembrados con los resultados guardados, por (consulta, filtro),
+        # junto a la marca de agua con la que se guardaron: reutilizables en el siguiente refresco
+        self._seeded_indexes: Dict[Tuple[str, str], Tuple[float, DedupIndex]] = {}
+        # Igual con el conjunto ordenado de cada filtro: (versión, instante del ranking,
+        # conjunto, partes de la puntuación por URL)
+        self._ranked_sets: Dict[Tuple[str, str], Tuple[float, float, List[Dict], Dict[str, ScoreParts]]] = {}
+        
+        # Ranking por relevancia (pipelines batch y union): se puntúa todo el lote
+        # descargado en vez de quedarse con los primeros artículos en orden de llegada
+        self.ranking_weights: Optional[RankingWeights] = configured_weights() if settings.NEWS_RANKING else None
+        
+        # Circuit breaker de NewsAPI (por worker): con el circuito abierto no se espera al upstream
+        self.breaker = CircuitBreaker(
+            failure_threshold=settings.NEWS_BREAKER_THRESHOLD,
+            recovery_timeout=settings.NEWS_BREAKER_RECOVERY,
+            max_open=settings.NEWS_BREAKER_MAX_OPEN
         )
         
-        # Crear el grafo de LangGraph
-        self.graph = self._create_langgraph()
+        # Crear los grafos de LangGraph
+        self.graph = self._create_langgraph(self.pipeline_mode)
+        self.union_graph = self._create_langgraph("union")
         
-        # Archivo para tracking de requests diarias
-        self.requests_file = "daily_requests.json"
+        # Ledger de cuota diaria compartido entre workers (SQLite WAL)
+        self.quota = quota_ledger or QuotaLedger(
+            settings.QUOTA_DB_PATH,
+            daily_limit=settings.NEWS_DAILY_LIMIT
+        )
     
-    def _get_today_key(self) -> str:
-        """Obtener clave para el día actual"""
-        return datetime.now().strftime("%Y-%m-%d")
+    @property
+    def llm(self) -> "ChatOpenAI":
+        """Modelo OpenAI, importado y creado la primera vez que se usa"""
+        if self._llm is None:
+            from langchain_openai import ChatOpenAI
+            
+            self._llm = ChatOpenAI(
+                api_key=self.openai_api_key,
+                model=self.LLM_MODEL,
+                temperature=0.3
+            )
+        return self._llm
     
-    def _load_daily_requests(self) -> Dict[str, int]:
-        """Cargar contador de requests diarias"""
-        try:
-            if os.path.exists(self.requests_file):
-                with open(self.requests_file, 'r') as f:
-                    return json.load(f)
-            return {}
-        except Exception as e:
-            logger.warning(f"Error cargando requests diarias: {e}")
-            return {}
+    async def aclose(self):
+        """Cerrar el pool de conexiones HTTP y el ledger de cuota (al apagar la aplicación)"""
+        await self.http_client.aclose()
+        self.quota.close()
+        if self.enricher is not None:
+            self.enricher.close()
     
-    def _save_daily_requests(self, requests_data: Dict[str, int]):
-        """Guardar contador de requests diarias"""
-        try:
-            with open(self.requests_file, 'w') as f:
-                json.dump(requests_data, f, indent=2)
-        except Exception as e:
-            logger.error(f"Error guardando requests diarias: {e}")
-    
-    def _increment_daily_requests(self) -> int:
-        """Incrementar y retornar contador de requests del día actual"""
-        today = self._get_today_key()
-        requests_data = self._load_daily_requests()
+    def _log_article(self, message: str, *args) -> None:
+        """
+        Log por artículo: DEBUG y muestreado (LOG_ARTICLE_SAMPLE_RATE)
         
-        # Limpiar requests de días anteriores (opcional, mantener solo últimos 7 días)
-        cutoff_date = (datetime.now() - timedelta(days=7)).strftime("%Y-%m-%d")
-        requests_data = {k: v for k, v in requests_data.items() if k >= cutoff_date}
+        Se llama en cada artículo del modo "article", así que el mensaje solo
+        se formatea si el nivel DEBUG está activo y la muestra lo elige.
+        """
+        if self.log_sample_rate > 0 and logger.isEnabledFor(logging.DEBUG) and random.random() < self.log_sample_rate:
+            logger.debug(message, *args)
+    
+    async def get_daily_requests_count(self) -> int:
+        """Obtener número de requests realizadas hoy (en memoria si el valor es reciente)"""
+        cached = self.quota.cached_used()
+        if cached is not None:
+            return cached
+        return await asyncio.to_thread(self.quota.used_today)
+    
+    def _clean_url(self, url: str) -> str:
+        """Limpiar URL removiendo parámetros UTM y tracking (forma canónica cacheada)"""
+        return canonical_url(url)
+    
+    def _match_keywords(self, article: Dict) -> Dict[str, List[str]]:
+        """Keywords de cada categoría en título y descripción, con una sola pasada del matcher"""
+        title = str(article.get("title", "") or "").lower()
+        description = str(article.get("description", "") or "").lower()
+        content = f"{title} {description}"
         
-        # Incrementar contador del día actual
-        requests_data[today] = requests_data.get(today, 0) + 1
-        self._save_daily_requests(requests_data)
+        # Una sola pasada sobre el texto, con límites de palabra
+        return self.keyword_matcher.match(content)
+    
+    def _match_topics(self, article: Dict) -> Tuple[bool, bool]:
+        """Detectar (IA, Marketing) en título y descripción"""
+        matches = self._match_keywords(article)
+        return "ai" in matches, "marketing" in matches
+    
+    def _classify_article(self, article: Dict, filter_type: str) -> str:
+        """Obtener la categoría del artículo para el filtro pedido ('none' si no encaja)"""
+        has_ai, has_marketing = self._match_topics(article)
+        return self._category_for_filter(has_ai, has_marketing, filter_type)
+    
+    def _topic_category(self, article: Dict) -> str:
+        """Temas del artículo como categoría única: 'ai', 'marketing', 'both' o 'none'"""
+        has_ai, has_marketing = self._match_topics(article)
+        if has_ai and has_marketing:
+            return "both"
+        return "ai" if has_ai else "marketing" if has_marketing else "none"
+    
+    @staticmethod
+    def _category_for_filter(has_ai: bool, has_marketing: bool, filter_type: str) -> str:
+        """Categoría para un filtro a partir de los temas detectados"""
+        # Lógica más permisiva para "both"
+        if filter_type == "ai" and has_ai:
+            return "ai"
+        elif filter_type == "marketing" and has_marketing:
+            return "marketing"
+        elif filter_type == "both":
+            if has_ai and has_marketing:
+                return "both"
+            elif has_ai:  # También acepta solo AI para "both"
+                return "both"
+            elif has_marketing:  # También acepta solo Marketing para "both"
+                return "both"
+            else:
+                return "none"
+        else:
+            return "none"
+    
+    def _image_url(self, source_url: Optional[str]) -> str:
+        """Miniatura servida por el proxy si está activo; si no, la original o el placeholder local"""
+        if self.image_proxy is not None:
+            return self.image_proxy.url_for(source_url)
+        return source_url or f"{settings.IMAGE_BASE_URL}/api/image/{PLACEHOLDER_KEY}"
+    
+    def _build_processed_article(
+        self,
+        article: Dict,
+        category: str,
+        matches: Optional[Dict[str, List[str]]] = None
+    ) -> Dict[str, Any]:
+        """
+        Construir el artículo de salida a partir del artículo bruto de NewsAPI
         
-        return requests_data[today]
+        `matches` son las keywords que ya encontró la clasificación; se
+        guardan las de la categoría (puntuación de relevancia del ranking).
+        """
+        if matches is None:
+            matches = self._match_keywords(article)
+        topics = ("ai", "marketing") if category == "both" else (category,)
+        source = article.get("source") or {}
+        return {
+            "title": article.get("title") or "",
+            "description": (article.get("description") or "")[:200],
+            "url": article.get("url", ""),
+            "image": self._image_url(article.get("urlToImage")),
+            "category": category,
+            "publishedAt": article.get("publishedAt") or "",
+            "source": (source.get("name") if isinstance(source, dict) else "") or "",
+            "keywords": [keyword for topic in topics for keyword in matches.get(topic, [])]
+        }
     
-    def _get_daily_requests_count(self) -> int:
-        """Obtener número de requests realizadas hoy"""
-        today = self._get_today_key()
-        requests_data = self._load_daily_requests()
-        return requests_data.get(today, 0)
+    def _merge_results(self, new_news: List[Dict], previous_news: List[Dict]) -> List[Dict]:
+        """Fusionar artículos nuevos y anteriores: más recientes primero, sin URLs repetidas"""
+        merged = []
+        seen_urls = set()
+        # sorted es estable: con el mismo publishedAt, el nuevo va antes que el anterior
+        for article in sorted(new_news + previous_news, key=lambda a: a.get("publishedAt") or "", reverse=True):
+            url = canonical_url(article.get("url", ""))
+            if url in seen_urls:
+                continue
+            seen_urls.add(url)
+            merged.append(article)
+        return merged[:self.result_set_max]
     
-    def _clean_url(self, url: str) -> str:
-        """Limpiar URL removiendo parámetros UTM y tracking"""
-        if not url:
-            return ""
+    def _rank(self, news: List[Dict], k: Optional[int] = None) -> List[Dict]:
+        """Artículos ordenados por relevancia (como mucho NEWS_RESULT_SET_MAX, o `k`)"""
+        return rank_articles(news, self.ranking_weights, min(k or self.result_set_max, self.result_set_max))
+    
+    def _rank_incremental(
+        self, state: Dict[str, Any], filter_type: str, new_news: List[Dict]
+    ) -> Tuple[List[Dict], List[Dict], bool]:
+        """
+        Fusionar los artículos nuevos de un filtro con los anteriores y ordenarlos
+        
+        Con el ranking de la versión guardada aún en memoria, un refresco sin
+        artículos nuevos lo reutiliza tal cual (hasta RANKING_REUSE_SECONDS) y
+        uno con nuevos solo analiza esos: los anteriores conservan sus partes
+        de la puntuación y el orden es el mismo que rankeando todo de cero.
+        
+        Returns:
+            (merged_news por fecha, conjunto ordenado, sin cambios respecto a la versión guardada)
+        """
+        previous = state.get("previous_results", {}).get(filter_type, [])
+        cached = self._ranked_sets.pop((state.get("query", ""), filter_type), None)
+        if cached is not None and cached[0] != state.get("state_version"):
+            cached = None
+        
+        if not new_news and previous:
+            if self.ranking_weights is None:
+                return previous, list(previous), True
+            if cached is not None and time.time() - cached[1] < self.RANKING_REUSE_SECONDS:
+                state["ranking_cache"][filter_type] = (cached[1], cached[3])
+                return previous, list(cached[2]), True
+        
+        merged = self._merge_results(new_news, previous)
+        if self.ranking_weights is None:
+            return merged, list(merged), False
+        known = cached[3] if cached is not None else {}
+        parts_by_url = {}
+        for article in merged:
+            url = article.get("url", "")
+            parts_by_url[url] = known.get(url) or score_parts(article)
+        ranked = rank_articles(
+            merged, self.ranking_weights, self.result_set_max,
+            parts=[parts_by_url[article.get("url", "")] for article in merged]
+        )
+        state["ranking_cache"][filter_type] = (time.time(), parts_by_url)
+        return merged, ranked, False
+    
+    async def _fetch_page(
+        self, query: str, page: int, since: Optional[str] = None, until: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Pedir una página a NewsAPI reservando antes su cuota
+        
+        Con `since` (marca de agua del fetch incremental) solo se piden
+        artículos publicados desde ese instante (`from` de NewsAPI, inclusivo);
+        con `until`, hasta ese instante (`to`, para completar un hueco).
         
+        Con el circuito abierto no se llama al upstream (ni se reserva cuota).
+        Los errores transitorios (conexión, 5xx, 429 con Retry-After corto) se
+        reintentan con backoff dentro de la misma reserva.
+        
+        Returns:
+            {"ok", "articles", "total_results", "quota_used", "error",
+            "circuit_open"}; la reserva se devuelve al ledger si la request
+            no fue exitosa.
+        """
+        result = {
+            "ok": False, "articles": [], "total_results": 0, "quota_used": 0,
+            "error": "", "circuit_open": False
+        }
+        
+        # Circuito abierto: respuesta inmediata, sin esperar al timeout del upstream
+        if not self.breaker.allow():
+            retry_in = self.breaker.retry_in()
+            logger.warning(f"🔌 NewsAPI no disponible: circuito abierto (reintento en {retry_in:.0f} s)")
+            metrics.inc("news_upstream_requests_total", status="circuit_open")
+            result["error"] = f"NewsAPI no disponible (circuito abierto, reintento en {retry_in:.0f} s)"
+            result["circuit_open"] = True
+            return result
+        
+        # Reservar cuota ANTES de llamar al upstream (atómico entre workers)
         try:
-            parsed = urlparse(url)
-            query_params = parse_qs(parsed.query)
+            reserved = await asyncio.to_thread(self.quota.try_reserve)
+        except BaseException as e:
+            # Sin liberar la prueba, un circuito semiabierto rechazaría todo lo siguiente
+            self.breaker.release()
+            if not isinstance(e, Exception):
+                raise
+            logger.error(f"❌ No se pudo reservar cuota: {e}")
+            result["error"] = f"No se pudo reservar cuota: {e}"
+            return result
+        if not reserved:
+            daily_limit = self.quota.daily_limit
+            logger.error(f"🚫 LÍMITE ALCANZADO: {daily_limit}/{daily_limit} requests hoy")
+            result["error"] = f"Límite diario alcanzado ({daily_limit}/{daily_limit})"
+            # La llamada de prueba (si lo era) no llegó a hacerse
+            self.breaker.release()
+            return result
+        
+        refund_pending = True
+        try:
+            params = {
+                "q": query,
+                "language": "en", 
+                "sortBy": "publishedAt",
+                "pageSize": self.page_size,  # ← MÁXIMO por request
+                "page": page,
+                "apiKey": self.news_api_key
+            }
+            if since:
+                # NewsAPI trabaja en UTC con fechas ISO 8601 sin zona
+                params["from"] = since.rstrip("Z")
+            if until:
+                params["to"] = until.rstrip("Z")
+            
+            logger.info(f"📡 LangGraph: Llamando a NewsAPI (página {page})...")
             
-            # Parámetros a remover (UTM y tracking)
-            utm_params = ['utm_source', 'utm_medium', 'utm_campaign', 'utm_term', 'utm_content',
-                         'fbclid', 'gclid', 'ref', 'source', 'medium', 'campaign']
+            # Llamada no bloqueante: el event loop sigue atendiendo otras requests
+            response = await self._get_with_retry(params)
+            retry_after = parse_retry_after(response.headers.get("retry-after"))
             
-            # Filtrar parámetros
-            clean_params = {k: v for k, v in query_params.items() if k not in utm_params}
+            # Solo cuenta la request si fue exitosa: si no, devolver la reserva
+            refund_pending = False
+            if response.status_code == 200:
+                current_requests = await self.get_daily_requests_count()
+                logger.info(f"✅ Request exitosa ({current_requests}/{self.quota.daily_limit} requests hoy)")
+            else:
+                await asyncio.to_thread(self.quota.refund)
+            
+            # Manejo de errores
+            if response.status_code == 426:
+                # También lo devuelve el plan gratuito al pedir más allá de los primeros 100 resultados
+                logger.error("💳 Plan gratuito agotado - necesita upgrade")
+                if page == 1:
+                    self.breaker.record_failure("426 plan agotado", retry_after, trip=True)
+                else:
+                    self.breaker.record_success()
+                return result
+            elif response.status_code == 429:
+                logger.error("⏰ Rate limit - espera antes de la próxima request")
+                self.breaker.record_failure("429 rate limit", retry_after, trip=True)
+                return result
+            elif response.status_code == 403:
+                logger.error("🔑 API Key inválida o bloqueada")
+                self.breaker.record_failure("403 API key", retry_after, trip=True)
+                return result
+            elif response.status_code >= 500:
+                self.breaker.record_failure(f"HTTP {response.status_code}", retry_after)
+            else:
+                # El upstream responde (aunque sea con un 4xx de la consulta)
+                self.breaker.record_success()
             
-            # Reconstruir URL
-            clean_query = urlencode(clean_params, doseq=True)
-            clean_parsed = parsed._replace(query=clean_query)
+            response.raise_for_status()
+            data = response.json()
+            articles = data.get("articles", [])
             
-            return urlunparse(clean_parsed)
-        except:
-            return url
+            logger.info(f"✅ LangGraph: Obtenidos {len(articles)} artículos (página {page})")
+            
+            result.update(
+                ok=True,
+                articles=articles,
+                total_results=data.get("totalResults", len(articles)),
+                quota_used=1
+            )
+            return result
+            
+        except Exception as e:
+            logger.error(f"❌ Error API: {str(e)}")
+            if refund_pending:
+                # Timeout o error de conexión tras los reintentos
+                self.breaker.record_failure(type(e).__name__)
+                await asyncio.to_thread(self.quota.refund)
+            return result
+    
+    async def _get_with_retry(self, params: Dict[str, Any]) -> httpx.Response:
+        """
+        GET a NewsAPI con reintentos (tenacity)
+        
+        Se reintentan errores de conexión, 5xx y 429 cuyo Retry-After no supere
+        NEWS_RETRY_MAX_WAIT; la espera es el Retry-After o, si no lo hay,
+        backoff exponencial con jitter. Los timeouts de lectura no se reintentan:
+        multiplicarían la latencia justo cuando el upstream está lento.
+        
+        Returns:
+            La última respuesta (también si sigue siendo un error HTTP).
+        """
+        retrying = AsyncRetrying(
+            stop=stop_after_attempt(max(settings.NEWS_RETRY_ATTEMPTS, 1)),
+            wait=self._retry_wait,
+            retry=retry_if_exception(self._is_retryable),
+            reraise=True
+        )
+        try:
+            async for attempt in retrying:
+                with attempt:
+                    if attempt.retry_state.attempt_number > 1:
+                        logger.warning(f"🔁 Reintentando NewsAPI (intento {attempt.retry_state.attempt_number})")
+                    start = time.perf_counter()
+                    try:
+                        response = await self.http_client.get(settings.NEWS_API_URL, params=params)
+                    except Exception:
+                        self._observe_upstream("error", time.perf_counter() - start)
+                        raise
+                    self._observe_upstream(str(response.status_code), time.perf_counter() - start)
+                    if response.status_code in RETRYABLE_STATUS:
+                        raise RetryableStatus(response)
+        except RetryableStatus as e:
+            return e.response
+        return response
+    
+    @staticmethod
+    def _is_retryable(error: BaseException) -> bool:
+        if isinstance(error, RetryableStatus):
+            return error.retry_after is None or error.retry_after <= settings.NEWS_RETRY_MAX_WAIT
+        return isinstance(error, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout, httpx.RemoteProtocolError))
+    
+    @staticmethod
+    def _retry_wait(retry_state: RetryCallState) -> float:
+        """Retry-After del upstream si lo indica; si no, backoff exponencial con jitter"""
+        error = retry_state.outcome.exception() if retry_state.outcome else None
+        if isinstance(error, RetryableStatus) and error.retry_after is not None:
+            return min(error.retry_after, settings.NEWS_RETRY_MAX_WAIT)
+        return RETRY_BACKOFF(retry_state)
     
-    def _is_similar_title(self, title: str, seen_titles: set, threshold: float = 0.85) -> bool:
-        """Verificar si el título es similar a alguno ya visto (Jaccard similarity)"""
-        title_words = set(re.findall(r'\w+', title.lower()))
+    @staticmethod
+    def _observe_upstream(status: str, duration: float) -> None:
+        """Registrar duración y código de estado de una llamada a NewsAPI"""
+        metrics.observe("news_upstream_request_duration_seconds", duration, status=status)
+        metrics.inc("news_upstream_requests_total", status=status)
+    
+    async def _iter_pages(
+        self, query: str, since: Optional[str] = None, until: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream perezoso de páginas de NewsAPI (hasta max_pages)
         
-        for seen_title in seen_titles:
-            seen_words = set(re.findall(r'\w+', seen_title.lower()))
-            
-            if title_words and seen_words:
-                intersection = len(title_words.intersection(seen_words))
-                union = len(title_words.union(seen_words))
-                
-                if union > 0:
-                    similarity = intersection / union
-                    if similarity >= threshold:
-                        return True
-        return False
+        Cada página se pide solo cuando el consumidor la necesita, así que una
+        ejecución que llega al objetivo con la página 1 no gasta más cuota.
+        Cada elemento lleva "last" = True cuando ya no quedan páginas útiles,
+        y "more" = True si NewsAPI tiene más artículos que los descargados
+        hasta esa página (el consumidor paró antes o se llegó a max_pages).
+        """
+        for page in range(1, self.max_pages + 1):
+            result = await self._fetch_page(query, page, since, until)
+            result["more"] = bool(
+                result["ok"] and result["articles"] and page * self.page_size < result["total_results"]
+            )
+            result["last"] = (
+                not result["ok"]
+                or not result["articles"]
+                or page >= self.max_pages
+                or not result["more"]
+            )
+            yield result
+            if result["last"]:
+                return
+    
+    async def _enrich_articles(self, articles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Añadir "summary" y "llm_category" a cada artículo (copias; sin cambios si falla)"""
+        results = await self.enricher.enrich(articles)
+        enriched = []
+        for article, result in zip(articles, results):
+            if result is None:
+                enriched.append(article)
+            else:
+                enriched.append({**article, "summary": result["summary"], "llm_category": result["category"]})
+        return enriched
     
-    def _create_langgraph(self) -> StateGraph:
-        """Crear el grafo de procesamiento GRANULAR con LangGraph"""
+    def _create_langgraph(self, pipeline_mode: str = "batch") -> "CompiledStateGraph":
+        """
+        Crear el grafo de procesamiento con LangGraph
+        
+        - batch: clasificación, deduplicación y selección como nodos únicos
+          sobre toda la lista raw_news (un salto de grafo por etapa); con
+          NEWS_RANKING la selección es el top por relevancia de todo el lote.
+        - article: el grafo GRANULAR original, cinco saltos por artículo.
+          Se mantiene como modo debug y devuelve exactamente el mismo
+          resultado que batch: con ranking recorre toda la primera página
+          y aplica el mismo ranking antes de finalizar.
+        """
+        
+        from langgraph.graph import StateGraph, END
+        
+        async def emit_article(state: AgentState, filter_type: str, article: Dict) -> None:
+            """Notificar un artículo aceptado al consumidor en streaming, si lo hay"""
+            on_article = state.get("on_article")
+            if on_article is not None:
+                await on_article(filter_type, article)
         
         # NODO 0: Verificar límite de requests diarias
-        def check_daily_limit_node(state: AgentState) -> AgentState:
+        async def check_daily_limit_node(state: AgentState) -> AgentState:
             """Verificar si podemos hacer requests hoy (límite: 100/día)"""
             logger.info("🔄 NODO 0: Verificando límite de requests diarias...")
             
-            current_requests = self._get_daily_requests_count()
-            daily_limit = 100
+            current_requests = await self.get_daily_requests_count()
+            daily_limit = self.quota.daily_limit
             
             if current_requests >= daily_limit:
                 logger.error(f"🚫 LÍMITE ALCANZADO: {current_requests}/{daily_limit} requests hoy")
@@ -168,78 +687,81 @@ class NewsAgent:
                 logger.info(f"✅ LÍMITE OK: {current_requests}/{daily_limit} requests hoy")
                 return state
         
-        # NODO 1: Obtener noticias (una sola vez)
-        def fetch_raw_news_node(state: AgentState) -> AgentState:
-            """Obtener 100 noticias brutas de la API"""
+        # NODO 1: Obtener la siguiente página de noticias
+        async def fetch_raw_news_node(state: AgentState) -> AgentState:
+            """Pedir la siguiente página al stream perezoso de NewsAPI y acumularla en raw_news"""
             logger.info("🔄 NODO 1: Obteniendo noticias de NewsAPI...")
             
             # Si ya hay error de límite, no hacer request
             if state.get("error_message"):
                 logger.error(f"❌ Saltando request: {state['error_message']}")
+                state["pages_exhausted"] = True
                 return state
             
-            query = state["query"]
+            # El generador se crea en la primera página y se reanuda en las siguientes
+            if state.get("page_stream") is None:
+                state["page_stream"] = self._iter_pages(
+                    state["query"], state.get("watermark"), state.get("backfill_to")
+                )
+            
             try:
-                url = "https://newsapi.org/v2/everything"
-                
-                params = {
-                    "q": query,
-                    "language": "en", 
-                    "sortBy": "publishedAt",
-                    "pageSize": 100,  # ← MÁXIMO por request
-                    "page": 1,        # ← SOLO página 1
-                    "apiKey": self.news_api_key
-                }
-                
-                logger.info(f"📡 LangGraph: Llamando a NewsAPI...")
-                
-                response = requests.get(url, params=params, timeout=15)
-                
-                # Solo incrementar contador si la request fue exitosa
-                if response.status_code == 200:
-                    current_requests = self._increment_daily_requests()
-                    logger.info(f"✅ Request exitosa ({current_requests}/100 requests hoy)")
-                
-                # Manejo de errores
-                if response.status_code == 426:
-                    logger.error("💳 Plan gratuito agotado - necesita upgrade")
-                    state["raw_news"] = []
-                    return state
-                elif response.status_code == 429:
-                    logger.error("⏰ Rate limit - espera antes de la próxima request")
-                    state["raw_news"] = []
-                    return state
-                elif response.status_code == 403:
-                    logger.error("🔑 API Key inválida o bloqueada")
-                    state["raw_news"] = []
-                    return state
-                
-                response.raise_for_status()
-                data = response.json()
-                articles = data.get("articles", [])
-                
-                logger.info(f"✅ LangGraph: Obtenidos {len(articles)} artículos")
-                
-                state["raw_news"] = articles
-                return state
-                
-            except Exception as e:
-                logger.error(f"❌ Error API: {str(e)}")
-                state["raw_news"] = []
+                page = await state["page_stream"].__anext__()
+            except StopAsyncIteration:
+                state["pages_exhausted"] = True
                 return state
+            
+            state["pages_fetched"] = state.get("pages_fetched", 0) + (1 if page["ok"] else 0)
+            state["quota_used"] = state.get("quota_used", 0) + page["quota_used"]
+            state["pages_exhausted"] = page["last"]
+            state["more_available"] = page["more"]
+            if page["error"]:
+                state["error_message"] = page["error"]
+            
+            state["raw_news"] = state.get("raw_news", []) + page["articles"]
+            # Próxima marca de agua: el artículo más reciente descargado (ISO 8601 ordena como texto);
+            # el más antiguo acota el hueco pendiente si quedan artículos sin descargar
+            published = [a.get("publishedAt") for a in page["articles"] if isinstance(a, dict) and a.get("publishedAt")]
+            state["newest_published"] = max([state.get("newest_published") or ""] + published)
+            state["oldest_published"] = min(
+                ([state["oldest_published"]] if state.get("oldest_published") else []) + published, default=""
+            )
+            
+            if self.search_index is not None and page["articles"]:
+                try:
+                    added = await asyncio.to_thread(
+                        self.search_index.add_articles, page["articles"], self._topic_category
+                    )
+                    logger.info(f"🔎 Índice de búsqueda: {added} artículos nuevos")
+                except Exception as e:
+                    # El índice es auxiliar: nunca debe romper la obtención de noticias
+                    logger.warning(f"⚠️ Error indexando artículos: {str(e)}")
+            
+            if self.image_proxy is not None and page["articles"]:
+                try:
+                    # Antes de emitir artículos: /api/image/{hash} solo sirve URLs registradas
+                    await self.image_proxy.register(a.get("urlToImage") for a in page["articles"] if a)
+                except Exception as e:
+                    logger.warning(f"⚠️ Error registrando imágenes: {str(e)}")
+            return state
         
         # NODO 2: Inicializar procesamiento
-        def initialize_processing_node(state: AgentState) -> AgentState:
+        async def initialize_processing_node(state: AgentState) -> AgentState:
             """Inicializar variables para el procesamiento"""
             logger.info("🔄 NODO 2: Inicializando procesamiento...")
             state["current_article_index"] = 0
             state["processed_articles"] = []
             state["final_news"] = []
+            # Fetch incremental: los resultados anteriores ya están deduplicados; solo se
+            # indexan para descartar los artículos nuevos que los repitan
+            state["dedup_index"] = self._seeded_dedup_index(state, state.get("filter_type", "both"))
             state["should_continue"] = True
+            state["scan_offset"] = 0
+            state["selected"] = []
+            state["results_by_filter"] = {}
             return state
         
         # NODO 3: Seleccionar siguiente artículo
-        def select_next_article_node(state: AgentState) -> AgentState:
+        async def select_next_article_node(state: AgentState) -> AgentState:
             """Seleccionar el siguiente artículo para procesar"""
             raw_news = state.get("raw_news", [])
             index = state.get("current_article_index", 0)
@@ -250,18 +772,18 @@ class NewsAgent:
                     state["current_article"] = raw_news[index]
                 else:
                     state["current_article"] = {}
-                logger.info(f"🔄 NODO 3: Procesando artículo {index + 1}/{len(raw_news)}")
+                self._log_article("🔄 NODO 3: Procesando artículo %d/%d", index + 1, len(raw_news))
             else:
                 state["current_article"] = {}
                 state["should_continue"] = False
-                logger.info("🔄 NODO 3: No hay más artículos")
+                self._log_article("🔄 NODO 3: No hay más artículos")
             
             return state
         
         # NODO 4: Verificar categoría
-        def check_category_node(state: AgentState) -> AgentState:
+        async def check_category_node(state: AgentState) -> AgentState:
             """Verificar si el artículo pertenece a la categoría solicitada"""
-            logger.info("🔄 NODO 4: Verificando categoría...")
+            self._log_article("🔄 NODO 4: Verificando categoría...")
             article = state.get("current_article", {})
             filter_type = state.get("filter_type", "both")
             
@@ -269,179 +791,466 @@ class NewsAgent:
                 state["article_category"] = "none"
                 return state
             
-            title = str(article.get("title", "") or "").lower()
-            description = str(article.get("description", "") or "").lower()
-            content = f"{title} {description}"
-            
-            # Palabras clave expandidas y menos estrictas
-            ai_keywords = [
-                "ai", "artificial intelligence", "machine learning", "neural", "gpt", "llm", 
-                "chatgpt", "openai", "deep learning", "algorithm", "tensorflow", "pytorch",
-                "computer vision", "nlp", "natural language processing", "automation",
-                "robotics", "generative ai", "cognitive computing", "data science",
-                "predictive", "intelligent", "smart", "tech", "innovation", "digital",
-                "model", "training", "neural network", "transformer", "language model"
-            ]
-            marketing_keywords = [
-                "marketing", "advertising", "campaign", "brand", "seo", "conversion", 
-                "digital marketing", "social media", "content marketing", "email marketing",
-                "influencer", "crm", "analytics", "google ads", "facebook ads", "roi",
-                "customer acquisition", "lead generation", "brand awareness", "business",
-                "sales", "promotion", "commerce", "advertising", "media", "engagement",
-                "customer", "client", "market", "revenue", "growth", "strategy"
-            ]
-            
-            has_ai = any(keyword in content for keyword in ai_keywords)
-            has_marketing = any(keyword in content for keyword in marketing_keywords)
-            
-            # Lógica más permisiva para "both"
-            if filter_type == "ai" and has_ai:
-                state["article_category"] = "ai"
-            elif filter_type == "marketing" and has_marketing:
-                state["article_category"] = "marketing"
-            elif filter_type == "both":
-                if has_ai and has_marketing:
-                    state["article_category"] = "both"
-                elif has_ai:  # También acepta solo AI para "both"
-                    state["article_category"] = "both"
-                elif has_marketing:  # También acepta solo Marketing para "both"
-                    state["article_category"] = "both"
-                else:
-                    state["article_category"] = "none"
-            else:
-                state["article_category"] = "none"
+            state["article_category"] = self._classify_article(article, filter_type)
             
-            logger.info(f"🏷️ Categoría: {state['article_category']}")
+            self._log_article("🏷️ Categoría: %s", state["article_category"])
             return state
         
         # NODO 5: Verificar duplicados
-        def check_duplicate_node(state: AgentState) -> AgentState:
+        async def check_duplicate_node(state: AgentState) -> AgentState:
             """Verificar si el artículo es duplicado"""
-            logger.info("🔄 NODO 5: Verificando duplicados...")
+            self._log_article("🔄 NODO 5: Verificando duplicados...")
             article = state.get("current_article", {})
-            processed_articles = state.get("processed_articles", [])
             
             if not article:
                 state["is_duplicate"] = True
                 return state
             
-            url = article.get("url", "")
-            title = str(article.get("title", "") or "").lower().strip()
-            
-            # Limpiar URL
-            clean_url = self._clean_url(url)
-            
-            # Verificar URL duplicada
-            for processed in processed_articles:
-                processed_clean_url = self._clean_url(processed.get("url", ""))
-                if clean_url and clean_url == processed_clean_url:
-                    state["is_duplicate"] = True
-                    logger.info("🚫 Duplicado por URL")
-                    return state
-            
-            # Verificar título similar
-            processed_titles = {p.get("title", "").lower().strip() for p in processed_articles}
-            if self._is_similar_title(title, processed_titles):
+            # Consulta al índice incremental: URL canónica + títulos similares
+            duplicate_reason = state["dedup_index"].check(article.get("url", ""), article.get("title", ""))
+            
+            if duplicate_reason == "url":
                 state["is_duplicate"] = True
-                logger.info("🚫 Duplicado por título similar")
+                self._log_article("🚫 Duplicado por URL")
+                return state
+            if duplicate_reason == "title":
+                state["is_duplicate"] = True
+                self._log_article("🚫 Duplicado por título similar")
                 return state
             
             state["is_duplicate"] = False
-            logger.info("✅ No es duplicado")
+            self._log_article("✅ No es duplicado")
             return state
         
         # NODO 6: Procesar artículo válido
-        def process_valid_article_node(state: AgentState) -> AgentState:
+        async def process_valid_article_node(state: AgentState) -> AgentState:
             """Procesar un artículo que pasó todas las validaciones"""
-            logger.info("🔄 NODO 6: Procesando artículo válido...")
+            self._log_article("🔄 NODO 6: Procesando artículo válido...")
             article = state.get("current_article", {})
             
-            processed_article = {
-                "title": article.get("title", ""),
-                "description": article.get("description", "")[:200],
-                "url": article.get("url", ""),
-                "image": article.get("urlToImage") or "https://picsum.photos/400/200",
-                "category": state.get("article_category", "unknown")
-            }
+            processed_article = self._build_processed_article(
+                article, state.get("article_category", "unknown")
+            )
             
             # Agregar a listas
+            state["dedup_index"].add(article.get("url", ""), article.get("title", ""))
             state["processed_articles"].append(processed_article)
             state["final_news"].append(processed_article)
+            if provisional_slot(state, len(state["final_news"])):
+                await emit_article(state, state.get("filter_type", "both"), processed_article)
             
-            logger.info(f"✅ Artículo procesado. Total: {len(state['final_news'])}")
+            self._log_article("✅ Artículo procesado. Total: %d", len(state["final_news"]))
             return state
         
         # NODO 7: Incrementar índice
-        def increment_index_node(state: AgentState) -> AgentState:
+        async def increment_index_node(state: AgentState) -> AgentState:
             """Incrementar el índice para el siguiente artículo"""
             state["current_article_index"] = state.get("current_article_index", 0) + 1
             return state
         
-                # NODO 8: Verificar si necesitamos más
-        def check_completion_node(state: AgentState) -> AgentState:
+        # NODO 8: Verificar si necesitamos más
+        async def check_completion_node(state: AgentState) -> AgentState:
             """Verificar si hemos completado el objetivo"""
             final_count = len(state.get("final_news", []))
             raw_count = len(state.get("raw_news", []))
             current_index = state.get("current_article_index", 0)
             
-            # Condiciones optimizadas: mínimo 9, máximo 12 artículos
-            if final_count >= 12:  # Límite máximo: 12 artículos
+            # Con ranking (como en batch) se recorre todo lo descargado
+            if whole_batch(state):
+                state["should_continue"] = current_index < raw_count
+                if not state["should_continue"]:
+                    logger.info(f"🎯 NODO 8: Procesado todo el lote ({final_count} artículos)")
+            # Condiciones optimizadas: mínimo 9, máximo 12 artículos (configurables)
+            elif final_count >= self.max_results:  # Límite máximo: 12 artículos
                 state["should_continue"] = False
                 logger.info(f"🎯 NODO 8: Límite máximo alcanzado ({final_count} artículos)")
-            elif final_count >= 9:  # Objetivo mínimo: 9 artículos
+            elif final_count >= self.min_results:  # Objetivo mínimo: 9 artículos
                 state["should_continue"] = False
                 logger.info(f"🎯 NODO 8: Objetivo alcanzado con {final_count} artículos")
             elif current_index >= raw_count:
                 state["should_continue"] = False
                 logger.info(f"🎯 NODO 8: Procesados todos los artículos ({final_count} encontrados)")
-            elif current_index >= 50:  # Límite de seguridad para evitar procesar demasiados
+            elif current_index >= self.scan_limit:  # Límite de seguridad para evitar procesar demasiados
                 state["should_continue"] = False
                 logger.info(f"🎯 NODO 8: Límite de seguridad alcanzado ({final_count} artículos)")
             else:
                 state["should_continue"] = True
-                logger.info(f"🔄 NODO 8: Continuando... ({final_count}/9 artículos mínimo)")
+                self._log_article("🔄 NODO 8: Continuando... (%d/%d artículos mínimo)", final_count, self.min_results)
             
             return state
         
+        # NODO 8b: Rankear lo aceptado (modo por artículo)
+        async def rank_results_node(state: AgentState) -> AgentState:
+            """Mismo ranking por relevancia que select_batch sobre los artículos aceptados"""
+            if self.ranking_weights is None:
+                return state
+            
+            final_news = self._rank(state.get("final_news", []))
+            state["final_news"] = final_news
+            state["processed_articles"] = list(final_news)
+            logger.info(f"📊 NODO 8b: {len(final_news)} artículos rankeados")
+            return state
+        
         # NODO 9: Finalizar
-        def finalize_results_node(state: AgentState) -> AgentState:
+        async def finalize_results_node(state: AgentState) -> AgentState:
             """Finalizar y preparar resultados"""
             final_news = state.get("final_news", [])
+            # Conjunto ordenado completo: todo el lote por relevancia con ranking
+            # (por fecha en fetch incremental sin ranking); final_news es su cabeza
+            state["ranked_news"] = list(final_news)
             
             # Limitar a máximo 12
-            final_news = final_news[:12]
+            final_news = final_news[:self.max_results]
             
             # Si tenemos menos de 3, agregar ejemplos
             if len(final_news) < 3:
                 sample_news = self._get_sample_news_by_filter(state.get("filter_type", "both"))
                 needed = max(6 - len(final_news), 0)  # Completar hasta 6
-                final_news.extend(sample_news[:needed])
+                for sample in sample_news[:needed]:
+                    final_news.append(sample)
+                    await emit_article(state, state.get("filter_type", "both"), sample)
+                state["used_sample"] = True
             
             state["final_news"] = final_news
-            total_requests = self._get_daily_requests_count()
-            logger.info(f"🏁 FINALIZADO: {len(final_news)} noticias (reales + ejemplos) - {total_requests}/100 requests hoy")
+            total_requests = await self.get_daily_requests_count()
+            logger.info(f"🏁 FINALIZADO: {len(final_news)} noticias (reales + ejemplos) - {total_requests}/{self.quota.daily_limit} requests hoy")
+            return state
+        
+        def next_scan_chunk(state: AgentState, first_limit: Optional[int] = None) -> List[Dict]:
+            """Siguiente tramo de raw_news sin clasificar (avanza scan_offset)"""
+            raw_news = state.get("raw_news", [])
+            start = state.get("scan_offset", 0)
+            # El primer tramo respeta el límite de escaneo; los siguientes cubren lo ya descargado
+            end = first_limit if start == 0 and first_limit is not None else len(raw_news)
+            state["scan_offset"] = min(end, len(raw_news))
+            return raw_news[start:end]
+        
+        def can_scan_more(state: AgentState) -> bool:
+            """Queda raw_news descargado sin clasificar (solo con paginación activa)"""
+            return self.max_pages > 1 and state.get("scan_offset", 0) < len(state.get("raw_news", []))
+        
+        def can_fetch_more(state: AgentState) -> bool:
+            """Quedan páginas por pedir y no hay error de cuota"""
+            return not state.get("pages_exhausted", True) and not state.get("error_message")
+        
+        def whole_batch(state: AgentState) -> bool:
+            """
+            Procesar todo lo descargado en vez de parar en el objetivo
+            
+            Con ranking se elige por relevancia entre todo el lote; en fetch
+            incremental la marca de agua deja atrás lo que no se acepte ahora.
+            """
+            return self.ranking_weights is not None or state.get("incremental", False)
+        
+        def provisional_slot(state: AgentState, accepted: int) -> bool:
+            """
+            Emitir en streaming el artículo aceptado número `accepted`
+            
+            Sin lote completo se emite todo lo aceptado (es el resultado final).
+            Con lote completo el orden definitivo solo se conoce al terminar: se
+            emiten como provisionales los primeros NEWS_MAX_RESULTS aceptados para
+            no retrasar el primer artículo, y el consumidor los reordena con la
+            cabeza final del resultado.
+            """
+            return not whole_batch(state) or accepted <= self.max_results
+        
+        # NODO B1: Clasificar el siguiente tramo del lote
+        async def classify_batch_node(state: AgentState) -> AgentState:
+            """Clasificar en una sola pasada los artículos del tramo pendiente"""
+            # Con ranking o fetch incremental se clasifica todo el lote, sin límite de escaneo
+            raw_news = next_scan_chunk(state, None if whole_batch(state) else self.scan_limit)
+            filter_type = state.get("filter_type", "both")
+            
+            candidates = []
+            for article in raw_news:
+                # Validación robusta contra None
+                if not article or not isinstance(article, dict):
+                    continue
+                
+                matches = self._match_keywords(article)
+                category = self._category_for_filter("ai" in matches, "marketing" in matches, filter_type)
+                if category != "none":
+                    candidates.append({"article": article, "category": category, "matches": matches})
+            
+            state["candidates"] = candidates
+            logger.info(f"🏷️ NODO B1: {len(candidates)}/{len(raw_news)} artículos con categoría válida")
+            return state
+        
+        # NODO B2: Deduplicar el tramo
+        async def dedup_batch_node(state: AgentState) -> AgentState:
+            """Eliminar duplicados (URL limpia y título similar) acumulando los únicos entre páginas"""
+            target = min(self.min_results, self.max_results)
+            dedup_index = state["dedup_index"]
+            selected = state["selected"]
+            
+            for candidate in state.get("candidates", []):
+                # Igual que el modo por artículo: no hace falta mirar más allá del objetivo
+                # (salvo con ranking o fetch incremental)
+                if len(selected) >= target and not whole_batch(state):
+                    break
+                
+                article = candidate["article"]
+                if dedup_index.check(article.get("url", ""), article.get("title", "")):
+                    continue
+                
+                # Se construye ya para poder emitirlo en streaming en cuanto se acepta
+                candidate["processed"] = self._build_processed_article(
+                    article, candidate["category"], candidate["matches"]
+                )
+                selected.append(candidate)
+                dedup_index.add(article.get("url", ""), article.get("title", ""))
+                if provisional_slot(state, len(selected)):
+                    await emit_article(state, state.get("filter_type", "both"), candidate["processed"])
+            
+            logger.info(f"🧹 NODO B2: {len(selected)} artículos únicos")
+            return state
+        
+        # NODO B3: Seleccionar artículos finales
+        async def select_batch_node(state: AgentState) -> AgentState:
+            """Construir los artículos de salida a partir de los candidatos únicos"""
+            target = min(self.min_results, self.max_results)
+            
+            selected = state.get("selected", [])
+            if not whole_batch(state):
+                selected = selected[:target]
+            final_news = [candidate["processed"] for candidate in selected]
+            
+            if state.get("incremental") and state.get("pages_fetched"):
+                # Nuevos + anteriores: el conjunto de resultados crece en vez de sustituirse
+                # (si NewsAPI falla no se fusiona: se sirve el último resultado como stale)
+                state["merged_news"], final_news, state["unchanged"] = self._rank_incremental(
+                    state, state.get("filter_type", "both"), final_news
+                )
+            elif self.ranking_weights is not None:
+                final_news = self._rank(final_news)
+            
+            state["processed_articles"].extend(final_news)
+            state["final_news"].extend(final_news)
+            
+            logger.info(f"✅ NODO B3: {len(state['final_news'])} artículos seleccionados ({state.get('pages_fetched', 0)} páginas)")
+            return state
+        
+        # NODO E1: Enriquecer con LLM los artículos seleccionados (opcional)
+        async def enrich_batch_node(state: AgentState) -> AgentState:
+            """Resumen y categoría LLM para los artículos reales seleccionados"""
+            if self.enricher is None or not state.get("final_news"):
+                return state
+            
+            # Con ranking final_news es todo el lote ordenado: solo se enriquece lo que se sirve
+            served = state["final_news"][:self.max_results]
+            state["final_news"] = await self._enrich_articles(served) + state["final_news"][self.max_results:]
+            state["processed_articles"] = list(state["final_news"])
+            logger.info(f"🧠 NODO E1: {len(state['final_news'])} artículos enriquecidos ({self.enricher.get_stats()['hit_ratio']:.0%} hit de caché)")
+            return state
+        
+        # Decisión por lotes: seguir con lo descargado, pedir otra página o terminar
+        def next_batch_step(state: AgentState) -> str:
+            available = len(state.get("selected", [])) + len(state.get("previous_news", []))
+            if available >= min(self.min_results, self.max_results):
+                return "select_batch"
+            if can_scan_more(state):
+                return "classify_batch"
+            if can_fetch_more(state):
+                return "fetch_raw_news"
+            return "select_batch"
+        
+        # NODO U1: Clasificar el tramo una sola vez para todos los filtros
+        async def classify_union_node(state: AgentState) -> AgentState:
+            """Detectar los temas de cada artículo una vez; la categoría por filtro se deriva"""
+            raw_news = next_scan_chunk(state)
+            
+            candidates = []
+            for article in raw_news:
+                # Validación robusta contra None
+                if not article or not isinstance(article, dict):
+                    continue
+                
+                matches = self._match_keywords(article)
+                if matches:
+                    candidates.append({
+                        "article": article,
+                        "topics": ("ai" in matches, "marketing" in matches),
+                        "matches": matches
+                    })
+            
+            state["candidates"] = candidates
+            logger.info(f"🏷️ NODO U1: {len(candidates)}/{len(raw_news)} artículos de IA o Marketing")
+            return state
+        
+        # NODO U2: Deduplicar y seleccionar por filtro sobre el mismo lote
+        async def select_union_node(state: AgentState) -> AgentState:
+            """Repartir los candidatos en los filtros pedidos, con dedup independiente por filtro"""
+            target = min(self.min_results, self.max_results)
+            results = state["results_by_filter"]
+            
+            for filter_type in state.get("filters", []):
+                if filter_type not in results:
+                    dedup_index = self._seeded_dedup_index(state, filter_type)
+                    results[filter_type] = {"news": [], "used_sample": False, "dedup_index": dedup_index}
+                selected = results[filter_type]["news"]
+                dedup_index = results[filter_type]["dedup_index"]
+                
+                for candidate in state.get("candidates", []):
+                    if len(selected) >= target and not whole_batch(state):
+                        break
+                    
+                    category = self._category_for_filter(*candidate["topics"], filter_type)
+                    # Mismo criterio que el filtrado por categoría del endpoint
+                    if category != filter_type:
+                        continue
+                    
+                    article = candidate["article"]
+                    if dedup_index.check(article.get("url", ""), article.get("title", "")):
+                        continue
+                    
+                    dedup_index.add(article.get("url", ""), article.get("title", ""))
+                    selected.append(self._build_processed_article(article, category, candidate["matches"]))
+                    if provisional_slot(state, len(selected)):
+                        await emit_article(state, filter_type, selected[-1])
+            
+            counts = ", ".join(f"{f}={len(r['news'])}" for f, r in results.items())
+            logger.info(f"✅ NODO U2: artículos seleccionados por filtro ({counts})")
+            return state
+        
+        # Decisión union: otra página solo si algún filtro no llegó al objetivo
+        def next_union_step(state: AgentState) -> str:
+            target = min(self.min_results, self.max_results)
+            previous = state.get("previous_results", {})
+            if all(len(r["news"]) + len(previous.get(f, [])) >= target for f, r in state["results_by_filter"].items()):
+                return "finalize_union"
+            if can_scan_more(state):
+                return "classify_union"
+            if can_fetch_more(state):
+                return "fetch_raw_news"
+            return "finalize_union"
+        
+        # NODO U3: Fusionar con los anteriores y ordenar por relevancia cada filtro
+        async def rank_union_node(state: AgentState) -> AgentState:
+            """Conjunto de resultados de cada filtro en su orden final"""
+            for filter_type, result in state.get("results_by_filter", {}).items():
+                if state.get("incremental") and state.get("pages_fetched"):
+                    # Nuevos + anteriores (si NewsAPI falla no se fusiona: se sirve el último como stale)
+                    result["merged_news"], result["news"], result["unchanged"] = self._rank_incremental(
+                        state, filter_type, result["news"]
+                    )
+                elif self.ranking_weights is not None:
+                    result["news"] = self._rank(result["news"])
+            return state
+        
+        # NODO E2: Enriquecer con LLM los artículos de todos los filtros (opcional)
+        async def enrich_union_node(state: AgentState) -> AgentState:
+            """Un solo pase de enriquecimiento para todos los filtros (la caché evita repetir contenido)"""
+            results = state.get("results_by_filter", {})
+            # Solo lo que se sirve: con ranking cada filtro lleva todo el lote ordenado
+            all_news = [article for result in results.values() for article in result["news"][:self.max_results]]
+            if self.enricher is None or not all_news:
+                return state
+            
+            enriched = iter(await self._enrich_articles(all_news))
+            for result in results.values():
+                served = len(result["news"][:self.max_results])
+                result["news"] = [next(enriched) for _ in range(served)] + result["news"][served:]
+            logger.info(f"🧠 NODO E2: {len(all_news)} artículos enriquecidos ({self.enricher.get_stats()['hit_ratio']:.0%} hit de caché)")
+            return state
+        
+        # NODO U4: Finalizar cada filtro
+        async def finalize_union_node(state: AgentState) -> AgentState:
+            """Completar con ejemplos los filtros con menos de 3 noticias reales"""
+            for filter_type, result in state.get("results_by_filter", {}).items():
+                # Conjunto ordenado completo del filtro; "news" es su cabeza
+                result["ranked"] = list(result["news"])
+                final_news = result["news"][:self.max_results]
+                if len(final_news) < 3:
+                    sample_news = self._get_sample_news_by_filter(filter_type)
+                    needed = max(6 - len(final_news), 0)  # Completar hasta 6
+                    for sample in sample_news[:needed]:
+                        final_news.append(sample)
+                        await emit_article(state, filter_type, sample)
+                    result["used_sample"] = True
+                result["news"] = final_news
+            
+            total_requests = await self.get_daily_requests_count()
+            logger.info(f"🏁 FINALIZADO (union): {len(state.get('results_by_filter', {}))} filtros, {state.get('pages_fetched', 0)} páginas - {total_requests}/{self.quota.daily_limit} requests hoy")
             return state
         
         # Crear el grafo
         workflow = StateGraph(AgentState)
         
-        # Agregar todos los nodos
-        workflow.add_node("check_daily_limit", check_daily_limit_node)
-        workflow.add_node("fetch_raw_news", fetch_raw_news_node)
-        workflow.add_node("initialize_processing", initialize_processing_node)
-        workflow.add_node("select_next_article", select_next_article_node)
-        workflow.add_node("check_category", check_category_node)
-        workflow.add_node("check_duplicate", check_duplicate_node)
-        workflow.add_node("process_valid_article", process_valid_article_node)
-        workflow.add_node("increment_index", increment_index_node)
-        workflow.add_node("check_completion", check_completion_node)
-        workflow.add_node("finalize_results", finalize_results_node)
+        def add_node(name: str, node: Callable[[AgentState], Awaitable[AgentState]]) -> None:
+            """Registrar un nodo midiendo su duración (histograma por nodo y pipeline)"""
+            workflow.add_node(name, timed_node(name, pipeline_mode, node))
+        
+        # Nodos comunes a ambos modos
+        add_node("check_daily_limit", check_daily_limit_node)
+        add_node("fetch_raw_news", fetch_raw_news_node)
+        add_node("initialize_processing", initialize_processing_node)
+        add_node("finalize_results", finalize_results_node)
         
         # Flujo principal
         workflow.set_entry_point("check_daily_limit")
-        workflow.add_edge("check_daily_limit", "fetch_raw_news")
-        workflow.add_edge("fetch_raw_news", "initialize_processing")
-        workflow.add_edge("initialize_processing", "select_next_article")
+        workflow.add_edge("check_daily_limit", "initialize_processing")
+        workflow.add_edge("initialize_processing", "fetch_raw_news")
+        workflow.add_edge("finalize_results", END)
+        
+        if pipeline_mode == "union":
+            # Una consulta amplia clasificada en todos los filtros (siempre por lotes)
+            add_node("classify_union", classify_union_node)
+            add_node("select_union", select_union_node)
+            add_node("rank_union", rank_union_node)
+            add_node("enrich_union", enrich_union_node)
+            add_node("finalize_union", finalize_union_node)
+            
+            workflow.add_edge("fetch_raw_news", "classify_union")
+            workflow.add_edge("classify_union", "select_union")
+            workflow.add_conditional_edges(
+                "select_union",
+                next_union_step,
+                {
+                    "classify_union": "classify_union",
+                    "fetch_raw_news": "fetch_raw_news",
+                    "finalize_union": "rank_union"
+                }
+            )
+            workflow.add_edge("rank_union", "enrich_union")
+            workflow.add_edge("enrich_union", "finalize_union")
+            workflow.add_edge("finalize_union", END)
+            
+            return workflow.compile()
+        
+        if pipeline_mode == "batch":
+            add_node("classify_batch", classify_batch_node)
+            add_node("dedup_batch", dedup_batch_node)
+            add_node("select_batch", select_batch_node)
+            add_node("enrich_batch", enrich_batch_node)
+            
+            workflow.add_edge("fetch_raw_news", "classify_batch")
+            workflow.add_edge("classify_batch", "dedup_batch")
+            # Páginas extra solo mientras falten artículos para el objetivo
+            workflow.add_conditional_edges(
+                "dedup_batch",
+                next_batch_step,
+                {
+                    "classify_batch": "classify_batch",
+                    "fetch_raw_news": "fetch_raw_news",
+                    "select_batch": "select_batch"
+                }
+            )
+            workflow.add_edge("select_batch", "enrich_batch")
+            workflow.add_edge("enrich_batch", "finalize_results")
+            
+            return workflow.compile()
+        
+        # Modo debug: un nodo por operación y por artículo
+        add_node("select_next_article", select_next_article_node)
+        add_node("check_category", check_category_node)
+        add_node("check_duplicate", check_duplicate_node)
+        add_node("process_valid_article", process_valid_article_node)
+        add_node("increment_index", increment_index_node)
+        add_node("check_completion", check_completion_node)
+        add_node("rank_results", rank_results_node)
+        
+        # Modo debug: solo la primera página, como el grafo original
+        workflow.add_edge("fetch_raw_news", "select_next_article")
         
         # Después de seleccionar artículo, verificar categoría primero
         workflow.add_edge("select_next_article", "check_category")
@@ -489,60 +1298,384 @@ class NewsAgent:
             should_continue_processing,
             {
                 "select_next_article": "select_next_article",
-                "finalize_results": "finalize_results"
+                "finalize_results": "rank_results"
             }
         )
-        
-        workflow.add_edge("finalize_results", END)
+        workflow.add_edge("rank_results", "finalize_results")
         
         return workflow.compile()
     
-    async def get_filtered_news(self, filter_type: str = "both") -> List[Dict[str, Any]]:
+    def _recursion_limit(self) -> int:
+        """Límite de recursión de LangGraph según el modo de pipeline"""
+        if self.pipeline_mode == "batch":
+            # Hasta dos tramos (clasificar + dedup) por página, más los nodos fijos
+            return 6 * self.max_pages + 20
+        # Modo por artículo: cinco saltos por artículo escaneado (+1 si se acepta);
+        # con ranking se escanea toda la primera página
+        scanned = max(self.scan_limit, self.page_size) if self.ranking_weights is not None else self.scan_limit
+        return 6 * scanned + 20
+    
+    def _get_query(self, filter_type: str) -> str:
+        """Configurar consulta de NewsAPI según el filtro"""
+        if filter_type == "ai":
+            return "artificial intelligence OR machine learning OR AI OR deep learning OR neural network OR GPT OR ChatGPT"
+        elif filter_type == "marketing":
+            return "digital marketing OR advertising OR social media marketing OR content marketing OR SEO OR campaign"
+        else:  # both - Query más amplia para encontrar intersección
+            return "(artificial intelligence OR AI OR machine learning) AND (marketing OR advertising OR business OR campaign OR digital)"
+    
+    def _get_union_query(self) -> str:
+        """Consulta única que cubre los tres filtros (unión de las consultas de IA y Marketing)"""
+        return f"({self._get_query('ai')}) OR ({self._get_query('marketing')})"
+    
+    @staticmethod
+    def _initial_state(
+        query: str,
+        filter_type: str,
+        filters: List[str],
+        on_article: Optional[ArticleCallback] = None,
+        incremental: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Estado inicial de una ejecución del grafo (con `incremental`, el estado guardado de la consulta)"""
+        previous_results = incremental["results"] if incremental else {}
+        return {
+            "query": query,
+            "filter_type": filter_type,
+            "raw_news": [],
+            "current_article_index": 0,
+            "current_article": {},
+            "processed_articles": [],
+            "final_news": [],
+            "article_category": "",
+            "is_duplicate": False,
+            "candidates": [],
+            "dedup_index": None,
+            "should_continue": True,
+            "error_message": "",
+            "used_sample": False,
+            "filters": filters,
+            "results_by_filter": {},
+            "page_stream": None,
+            "pages_fetched": 0,
+            "quota_used": 0,
+            "pages_exhausted": False,
+            "scan_offset": 0,
+            "selected": [],
+            "on_article": on_article,
+            "incremental": incremental is not None,
+            "watermark": incremental["watermark"] if incremental else None,
+            "backfill_to": incremental.get("backfill_to") if incremental else None,
+            "high_watermark": incremental.get("newest") if incremental else None,
+            "state_version": incremental.get("updated_at") if incremental else None,
+            "newest_published": "",
+            "oldest_published": "",
+            "more_available": False,
+            "previous_news": previous_results.get(filter_type, []),
+            "previous_results": previous_results,
+            "merged_news": [],
+            "ranked_news": [],
+            "ranking_cache": {},
+            "unchanged": False
+        }
+    
+    async def _load_incremental(self, query: str) -> Optional[Dict[str, Any]]:
+        """Estado guardado de la consulta, o None si el fetch incremental no está activo"""
+        if self.incremental_store is None:
+            return None
+        state = await asyncio.to_thread(self.incremental_store.load, query)
+        if state["backfill_to"]:
+            logger.info(f"⏩ Fetch incremental del hueco {state['watermark']} → {state['backfill_to']}")
+        elif state["watermark"]:
+            logger.info(f"⏩ Fetch incremental desde {state['watermark']}")
+        return state
+    
+    def _seeded_dedup_index(self, state: Dict[str, Any], filter_type: str) -> DedupIndex:
+        """
+        Índice de dedup de un filtro con sus resultados anteriores ya indexados
+
+        Sembrarlo cuesta una firma MinHash por resultado acumulado, así que el
+        índice de la última ejecución se reutiliza si la versión guardada del
+        estado no ha cambiado (si otro worker refrescó la consulta, se reconstruye).
+        Se saca de la caché para que dos ejecuciones no compartan el mismo índice.
+        """
+        seeded = self._seeded_indexes.pop((state.get("query", ""), filter_type), None)
+        if state.get("incremental") and seeded and seeded[0] == state.get("state_version"):
+            return seeded[1]
+        
+        dedup_index = DedupIndex(threshold=self.title_similarity_threshold)
+        for article in state.get("previous_results", {}).get(filter_type, []):
+            dedup_index.add(article.get("url", ""), article.get("title", ""))
+        return dedup_index
+    
+    async def _save_incremental(
+        self,
+        query: str,
+        state: Dict[str, Any],
+        results: Dict[str, List[Dict]],
+        indexes: Optional[Dict[str, DedupIndex]] = None,
+        ranked: Optional[Dict[str, List[Dict]]] = None,
+        unchanged: bool = False
+    ) -> None:
         """
-        Método principal para obtener noticias filtradas usando el grafo granular
+        Avanzar la marca de agua y guardar los resultados fusionados (solo si el fetch fue bien)
+
+        Si quedaron artículos sin descargar (NewsAPI tenía más que las páginas
+        leídas), lo que falta es más antiguo que lo descargado: la marca de
+        agua no avanza y el artículo más antiguo descargado pasa a ser el `to`
+        del siguiente fetch, hasta cubrir el hueco.
+
+        Con `unchanged` (ningún filtro aceptó artículos nuevos) y la misma
+        marca de agua no se escribe nada. Los índices de dedup y los conjuntos
+        ordenados (`ranked`) quedan en memoria para el siguiente refresco.
         """
+        if self.incremental_store is None or not state.get("incremental"):
+            return
+        if state.get("error_message") or not state.get("pages_fetched"):
+            return
+        newest = max(
+            state.get("watermark") or "", state.get("high_watermark") or "", state.get("newest_published") or ""
+        )
+        if not newest:
+            return
+        if state.get("watermark") and state.get("more_available") and state.get("oldest_published"):
+            watermark, backfill_to = state["watermark"], state["oldest_published"]
+        else:
+            watermark, backfill_to = newest, None
+        saved_marks = (state.get("watermark"), state.get("backfill_to"), state.get("high_watermark"))
         try:
-            # Configurar consulta según el filtro
-            if filter_type == "ai":
-                query = "artificial intelligence OR machine learning OR AI OR deep learning OR neural network OR GPT OR ChatGPT"
-            elif filter_type == "marketing":
-                query = "digital marketing OR advertising OR social media marketing OR content marketing OR SEO OR campaign"
-            else:  # both - Query más amplia para encontrar intersección
-                query = "(artificial intelligence OR AI OR machine learning) AND (marketing OR advertising OR business OR campaign OR digital)"
-            
-            # Estado inicial
-            initial_state = {
-                "query": query,
-                "filter_type": filter_type,
-                "raw_news": [],
-                "current_article_index": 0,
-                "current_article": {},
-                "processed_articles": [],
-                "final_news": [],
-                "article_category": "",
-                "is_duplicate": False,
-                "should_continue": True,
-                "error_message": ""
-            }
+            if unchanged and (watermark, backfill_to, newest if backfill_to else None) == saved_marks:
+                # Nada nuevo que guardar: la versión cargada sigue siendo la actual
+                version = state.get("state_version")
+            else:
+                # Los filtros que esta ejecución no cubre conservan sus resultados
+                results = {**state.get("previous_results", {}), **results}
+                version = await asyncio.to_thread(
+                    self._commit_incremental, query, state.get("state_version"), watermark, backfill_to, newest, results
+                )
+            if version is None:
+                return
+            for filter_type, dedup_index in (indexes or {}).items():
+                if dedup_index is not None:
+                    self._seeded_indexes[(query, filter_type)] = (version, dedup_index)
+            for filter_type, ranked_set in (ranked or {}).items():
+                ranking_cache = state.get("ranking_cache", {}).get(filter_type)
+                if ranking_cache is not None:
+                    self._ranked_sets[(query, filter_type)] = (version, ranking_cache[0], ranked_set, ranking_cache[1])
+        except Exception as e:
+            # Sin estado guardado el siguiente fetch es completo: nunca rompe la ejecución
+            logger.warning(f"⚠️ Error guardando el estado incremental: {str(e)}")
+    
+    def _commit_incremental(
+        self,
+        query: str,
+        loaded_version: Optional[float],
+        watermark: str,
+        backfill_to: Optional[str],
+        newest: str,
+        results: Dict[str, List[Dict]]
+    ) -> Optional[float]:
+        """
+        Leer, fusionar y guardar el estado de la consulta bajo su lock (bloqueante, en un hilo)
+
+        Si otra ejecución guardó desde que se cargó el estado, sus artículos se
+        fusionan con los nuevos y se conserva la marca de agua más atrasada
+        (volver a pedir un tramo solo cuesta dedup; saltarlo pierde artículos).
+        Devuelve la versión guardada, o None si hubo fusión: los índices de
+        dedup de esta ejecución no incluyen los artículos de la otra.
+        """
+        with self.incremental_store.lock(query):
+            current = self.incremental_store.load(query)
+            merged = current["updated_at"] != loaded_version
+            if merged:
+                logger.info("🔀 Estado incremental guardado por otra ejecución: fusionando resultados")
+                results = {
+                    filter_type: self._merge_results(
+                        results.get(filter_type, []), current["results"].get(filter_type, [])
+                    )
+                    for filter_type in {*results, *current["results"]}
+                }
+                if current["watermark"] and (
+                    current["watermark"] < watermark
+                    or (current["watermark"] == watermark and (current["backfill_to"] or "") > (backfill_to or ""))
+                ):
+                    watermark, backfill_to = current["watermark"], current["backfill_to"]
+                newest = max(newest, current["newest"] or "")
+            version = self.incremental_store.save(
+                query, watermark, results, backfill_to, newest if backfill_to else None
+            )
+        return None if merged else version
+    
+    @staticmethod
+    async def _close_page_stream(state: Dict[str, Any]) -> None:
+        """Cerrar el generador de páginas si la ejecución terminó antes de agotarlo"""
+        page_stream = state.get("page_stream")
+        if page_stream is not None:
+            await page_stream.aclose()
+    
+    def _prefetch_images(self, articles) -> None:
+        """Descargar en segundo plano las miniaturas de los artículos seleccionados"""
+        if self.image_proxy is not None:
+            self.image_proxy.schedule_prefetch(article.get("image", "") for article in articles)
+    
+    @staticmethod
+    def _observe_run(pipeline: str, results: Dict[str, Dict[str, Any]], quota_used: int) -> None:
+        """Contar ejecuciones, artículos devueltos por filtro y cuota gastada"""
+        for filter_type, result in results.items():
+            used_sample = str(bool(result.get("used_sample"))).lower()
+            metrics.inc("news_graph_runs_total", pipeline=pipeline, filter=filter_type, used_sample=used_sample)
+            metrics.inc(
+                "news_articles_returned_total",
+                len(result.get("final_news", [])),
+                filter=filter_type,
+                used_sample=used_sample
+            )
+        if quota_used:
+            metrics.inc("news_quota_requests_total", quota_used, pipeline=pipeline)
+    
+    async def run(self, filter_type: str = "both", on_article: Optional[ArticleCallback] = None) -> Dict[str, Any]:
+        """
+        Ejecutar el grafo y devolver las noticias junto con metadatos de la ejecución
+        
+        Args:
+            filter_type: Filtro a ejecutar
+            on_article: Callback async (filtro, artículo) llamado en cuanto se acepta
+                        cada artículo, para servir la respuesta en streaming. Con
+                        ranking o fetch incremental son provisionales (los primeros
+                        NEWS_MAX_RESULTS aceptados): el orden y la cabeza definitivos
+                        son los de "news"
+        
+        Returns:
+            {"news": [...], "used_sample": bool, "error": str,
+             "pages": páginas descargadas, "quota_used": requests de cuota gastadas,
+             "ranked": conjunto ordenado completo del que "news" es la cabeza,
+             "unchanged": True si el refresco incremental no aceptó nada nuevo}
+        """
+        try:
+            # Estado inicial (el modo "article" de debug siempre hace el fetch completo)
+            query = self._get_query(filter_type)
+            incremental = await self._load_incremental(query) if self.pipeline_mode == "batch" else None
+            initial_state = self._initial_state(query, filter_type, [filter_type], on_article, incremental)
             
-            logger.info(f"🚀 Iniciando LangGraph Agent para: {filter_type}")
+            logger.info(f"🚀 Iniciando LangGraph Agent ({self.pipeline_mode}) para: {filter_type}")
             
             # VALIDACIÓN ROBUSTA: Envolver toda la ejecución en try-catch
             try:
-                result = self.graph.invoke(initial_state, config={"recursion_limit": 200})
+                result = await self.graph.ainvoke(initial_state, config={"recursion_limit": self._recursion_limit()})
                 
+                await self._close_page_stream(result)
                 final_news = result.get("final_news", [])
-                logger.info(f"🎯 LangGraph Agent completado: {len(final_news)} noticias")
+                logger.info(
+                    f"🎯 LangGraph Agent completado: {len(final_news)} noticias "
+                    f"({result.get('pages_fetched', 0)} páginas, {result.get('quota_used', 0)} requests de cuota)"
+                )
+                self._observe_run(self.pipeline_mode, {filter_type: result}, result.get("quota_used", 0))
+                self._prefetch_images(final_news)
+                await self._save_incremental(
+                    query, result,
+                    {filter_type: result.get("merged_news", [])},
+                    {filter_type: result.get("dedup_index")},
+                    {filter_type: result.get("ranked_news", [])},
+                    result.get("unchanged", False)
+                )
                 
-                return final_news
+                return {
+                    "news": final_news,
+                    "used_sample": result.get("used_sample", False),
+                    "error": result.get("error_message", ""),
+                    "pages": result.get("pages_fetched", 0),
+                    "quota_used": result.get("quota_used", 0),
+                    "ranked": result.get("ranked_news", []),
+                    "unchanged": result.get("unchanged", False)
+                }
                 
             except Exception as e:
                 logger.error(f"❌ Error crítico en LangGraph: {str(e)}")
-                return self._get_sample_news_by_filter(filter_type)
+                return {
+                    "news": self._get_sample_news_by_filter(filter_type),
+                    "used_sample": True,
+                    "error": str(e),
+                    "pages": 0,
+                    "quota_used": 0
+                }
             
         except Exception as e:
             logger.error(f"Error en el agente de noticias: {str(e)}")
-            return self._get_sample_news_by_filter(filter_type)
+            return {
+                "news": self._get_sample_news_by_filter(filter_type),
+                "used_sample": True,
+                "error": str(e),
+                "pages": 0,
+                "quota_used": 0
+            }
+    
+    async def run_union(
+        self,
+        filters: Optional[List[str]] = None,
+        on_article: Optional[ArticleCallback] = None
+    ) -> Dict[str, Any]:
+        """
+        Una sola consulta a NewsAPI clasificada localmente en todos los filtros
+        (on_article como en run())
+        
+        Returns:
+            {"results": {filtro: {"news": [...], "used_sample": bool, "ranked": [...], "unchanged": bool}},
+             "error": str, "pages": int, "quota_used": int}
+        """
+        filters = list(filters or self.FILTERS)
+        
+        def sample_results(error: str) -> Dict[str, Any]:
+            return {
+                "results": {
+                    f: {"news": self._get_sample_news_by_filter(f), "used_sample": True}
+                    for f in filters
+                },
+                "error": error,
+                "pages": 0,
+                "quota_used": 0
+            }
+        
+        query = self._get_union_query()
+        
+        logger.info(f"🚀 Iniciando LangGraph Agent (union) para: {', '.join(filters)}")
+        
+        try:
+            initial_state = self._initial_state(query, "union", filters, on_article, await self._load_incremental(query))
+            result = await self.union_graph.ainvoke(
+                initial_state, config={"recursion_limit": 6 * self.max_pages + 20}
+            )
+            await self._close_page_stream(result)
+            logger.info(f"📄 Union: {result.get('pages_fetched', 0)} páginas, {result.get('quota_used', 0)} requests de cuota")
+            self._observe_run("union", {
+                f: {"final_news": r.get("news", []), "used_sample": r.get("used_sample", False)}
+                for f, r in result.get("results_by_filter", {}).items()
+            }, result.get("quota_used", 0))
+            self._prefetch_images(
+                article for r in result.get("results_by_filter", {}).values() for article in r.get("news", [])
+            )
+            results = result.get("results_by_filter", {})
+            await self._save_incremental(
+                query, result,
+                {f: r.pop("merged_news", []) for f, r in results.items()},
+                {f: r.pop("dedup_index", None) for f, r in results.items()},
+                {f: r.get("ranked", []) for f, r in results.items()},
+                bool(results) and all(r.get("unchanged") for r in results.values())
+            )
+            return {
+                "results": result.get("results_by_filter", {}),
+                "error": result.get("error_message", ""),
+                "pages": result.get("pages_fetched", 0),
+                "quota_used": result.get("quota_used", 0)
+            }
+        except Exception as e:
+            logger.error(f"❌ Error crítico en LangGraph (union): {str(e)}")
+            return sample_results(str(e))
+    
+    async def get_filtered_news(self, filter_type: str = "both") -> List[Dict[str, Any]]:
+        """
+        Método principal para obtener noticias filtradas usando el grafo
+        """
+        result = await self.run(filter_type)
+        return result["news"]
     
     def _get_sample_news_by_filter(self, filter_type: str) -> List[Dict[str, Any]]:
         """Obtener noticias de ejemplo específicas por filtro"""
@@ -552,21 +1685,21 @@ class NewsAgent:
                 "title": "OpenAI Introduces Advanced GPT-4 Turbo with Enhanced Capabilities",
                 "description": "New model features improved reasoning, longer context windows, and better instruction following for enterprise applications.",
                 "url": "https://example.com/openai-gpt4-turbo",
-                "image": "https://picsum.photos/400/200?random=1",
+                "image": self._image_url(None),
                 "category": "ai"
             },
             {
                 "title": "Google's Gemini Ultra Achieves Human-Level Performance on MMLU Benchmark", 
                 "description": "Latest AI model demonstrates remarkable capabilities across diverse academic subjects and professional domains.",
                 "url": "https://example.com/google-gemini-ultra",
-                "image": "https://picsum.photos/400/200?random=2",
+                "image": self._image_url(None),
                 "category": "ai"
             },
             {
                 "title": "Microsoft Copilot Integration Transforms Workplace Productivity",
                 "description": "AI assistant now embedded across Office suite, enabling natural language document creation and data analysis.",
                 "url": "https://example.com/microsoft-copilot",
-                "image": "https://picsum.photos/400/200?random=3",
+                "image": self._image_url(None),
                 "category": "ai"
             }
         ]
@@ -576,21 +1709,21 @@ class NewsAgent:
                 "title": "Programmatic Advertising Reaches $200B Milestone in 2024",
                 "description": "Automated ad buying continues growth trajectory, driven by AI optimization and cross-platform integration.",
                 "url": "https://example.com/programmatic-200b",
-                "image": "https://picsum.photos/400/200?random=4",
+                "image": self._image_url(None),
                 "category": "marketing"
             },
             {
                 "title": "Social Commerce Revenue Projected to Hit $1.2T by 2025",
                 "description": "Integration of shopping features in social platforms drives unprecedented e-commerce growth rates.",
                 "url": "https://example.com/social-commerce-1t",
-                "image": "https://picsum.photos/400/200?random=5",
+                "image": self._image_url(None),
                 "category": "marketing"
             },
             {
                 "title": "Cookie-less Future: New Identity Solutions Gain Traction",
                 "description": "Privacy-focused advertising technologies emerge as third-party cookies phase out across major browsers.",
                 "url": "https://example.com/cookieless-future",
-                "image": "https://picsum.photos/400/200?random=6",
+                "image": self._image_url(None),
                 "category": "marketing"
             }
         ]
@@ -600,21 +1733,21 @@ class NewsAgent:
                 "title": "AI-Powered Personalization Drives 40% Increase in Marketing ROI",
                 "description": "Machine learning algorithms revolutionize customer targeting, delivering unprecedented campaign performance metrics.",
                 "url": "https://example.com/ai-personalization-roi",
-                "image": "https://picsum.photos/400/200?random=7",
+                "image": self._image_url(None),
                 "category": "both"
             },
             {
                 "title": "ChatGPT Integration Transforms Content Marketing Strategies",
                 "description": "Brands leverage conversational AI for automated content creation, customer service, and lead generation.",
                 "url": "https://example.com/chatgpt-content-marketing",
-                "image": "https://picsum.photos/400/200?random=8",
+                "image": self._image_url(None),
                 "category": "both"
             },
             {
                 "title": "Computer Vision Technology Revolutionizes Retail Analytics",
                 "description": "AI-powered visual recognition systems provide real-time insights into customer behavior and inventory optimization.",
                 "url": "https://example.com/computer-vision-retail",
-                "image": "https://picsum.photos/400/200?random=9",
+                "image": self._image_url(None),
                 "category": "both"
             }
         ]
@@ -0,0 +1,139 @@
+"""
+Ranking de relevancia sobre todo el lote de artículos
+
+La puntuación de cada artículo combina:
+- keywords: nº de keywords distintas que encontró el clasificador
+  (saturado en KEYWORD_SATURATION, escala 0-1);
+- recencia: decaimiento exponencial según la antigüedad de `publishedAt`
+  (1 recién publicado, 0.5 al cabo de `half_life_hours`);
+- diversidad: penalización por cada artículo de la misma fuente que ya
+  está por delante en el ranking.
+
+Todo el lote se puntúa en una sola pasada y se selecciona el top-k con un
+heap (heapify O(n) + k extracciones O(log n)). La penalización de fuente
+depende de lo ya elegido, así que se aplica de forma perezosa: al extraer
+un artículo cuya fuente ganó artículos desde que se puntuó, se vuelve a
+meter en el heap con la puntuación actualizada. Como la penalización solo
+crece, el primero que sale con la puntuación al día es el mejor.
+
+En un refresco incremental las partes de la puntuación que no dependen del
+instante (`score_parts`: keywords y `publishedAt` ya interpretado) se
+guardan y se pasan a `rank_articles`, así que solo se analizan los
+artículos nuevos y el ranking sigue siendo el mismo que sin ellas.
+"""
+
+import heapq
+import math
+from dataclasses import dataclass, replace
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from core.config import settings
+
+# A partir de estas keywords distintas el artículo no gana más relevancia
+KEYWORD_SATURATION = 5
+
+# (fracción de keywords 0-1, epoch de publicación o None)
+ScoreParts = Tuple[float, Optional[float]]
+
+
+@dataclass(frozen=True)
+class RankingWeights:
+    """Pesos de la puntuación de relevancia (ver NEWS_RANK_* en la configuración)"""
+    keywords: float = 1.0
+    recency: float = 1.0
+    diversity: float = 0.3
+    half_life_hours: float = 24.0
+
+
+def configured_weights(**overrides: Optional[float]) -> RankingWeights:
+    """Pesos de NEWS_RANK_*; los `overrides` que no sean None (p. ej. de la request) los sustituyen"""
+    weights = RankingWeights(
+        keywords=settings.NEWS_RANK_WEIGHT_KEYWORDS,
+        recency=settings.NEWS_RANK_WEIGHT_RECENCY,
+        diversity=settings.NEWS_RANK_WEIGHT_DIVERSITY,
+        half_life_hours=settings.NEWS_RANK_HALF_LIFE_HOURS
+    )
+    return replace(weights, **{name: value for name, value in overrides.items() if value is not None})
+
+
+def _source(article: Dict) -> str:
+    """Fuente del artículo: nombre de NewsAPI o, si no hay, el dominio de la URL"""
+    return article.get("source") or urlparse(article.get("url", "")).netloc
+
+
+def _timestamp(published_at: Optional[str]) -> Optional[float]:
+    """Epoch de un `publishedAt` ISO 8601 (None si falta o no se puede leer)"""
+    if not published_at:
+        return None
+    try:
+        published = datetime.fromisoformat(published_at)
+    except ValueError:
+        return None
+    if published.tzinfo is None:
+        published = published.replace(tzinfo=timezone.utc)
+    return published.timestamp()
+
+
+def score_parts(article: Dict) -> ScoreParts:
+    """Partes de la puntuación que no dependen del instante ni de los pesos"""
+    keywords = min(len(article.get("keywords") or ()), KEYWORD_SATURATION) / KEYWORD_SATURATION
+    return keywords, _timestamp(article.get("publishedAt"))
+
+
+def _score(parts: ScoreParts, weights: RankingWeights, now: float) -> float:
+    keywords, published = parts
+    recency = 0.0
+    if published is not None:
+        age_hours = max(now - published, 0.0) / 3600
+        recency = math.exp(-math.log(2) * age_hours / max(weights.half_life_hours, 1e-6))
+
+    return weights.keywords * keywords + weights.recency * recency
+
+
+def relevance_score(article: Dict, weights: RankingWeights, now: float) -> float:
+    """Puntuación del artículo sin la penalización de fuente"""
+    return _score(score_parts(article), weights, now)
+
+
+def rank_articles(
+    articles: List[Dict],
+    weights: RankingWeights,
+    k: Optional[int] = None,
+    now: Optional[float] = None,
+    parts: Optional[List[ScoreParts]] = None
+) -> List[Dict]:
+    """
+    Los `k` artículos más relevantes (todos si k es None), de mayor a menor
+
+    A igual puntuación se conserva el orden de entrada. `parts` (una por
+    artículo, de `score_parts`) evita volver a analizar los ya conocidos.
+    """
+    if now is None:
+        now = datetime.now(timezone.utc).timestamp()
+    limit = len(articles) if k is None else min(k, len(articles))
+
+    sources = [_source(article) for article in articles]
+    # (-puntuación, posición, artículos de su fuente ya elegidos al puntuarlo)
+    if parts is None:
+        parts = [score_parts(article) for article in articles]
+    heap = [(-_score(article_parts, weights, now), index, 0) for index, article_parts in enumerate(parts)]
+    heapq.heapify(heap)
+
+    chosen_by_source: Dict[str, int] = {}
+    ranked: List[Dict] = []
+    while heap and len(ranked) < limit:
+        negative_score, index, penalized = heapq.heappop(heap)
+        chosen = chosen_by_source.get(sources[index], 0)
+        if chosen != penalized:
+            # Su fuente ganó artículos desde que se puntuó: volver a encolarlo con la penalización al día
+            score = -negative_score - weights.diversity * (chosen - penalized)
+            heapq.heappush(heap, (-score, index, chosen))
+            continue
+
+        ranked.append(articles[index])
+        chosen_by_source[sources[index]] = chosen + 1
+
+    return ranked
+
@@ -0,0 +1,239 @@
+"""
+Dependencias compartidas de la API: ciclo de vida de la app e inyección del agente,
+de la caché de noticias, del registro de artículos vistos, del almacén de prefetch,
+del índice de búsqueda y del proxy de miniaturas
+"""
+
+from contextlib import asynccontextmanager
+from typing import Optional
+import asyncio
+import logging
+import time
+
+import httpx
+from fastapi import FastAPI, HTTPException, Request
+
+from agent.langgraph_agent import NewsAgent
+from api.news_service import load_all_news, load_news
+from core.article_store import ArticleStore
+from core.cache import NewsCache
+from core.config import settings
+from core.image_cache import ImageCache, ImageProxy
+from core.incremental_store import IncrementalStore
+from core.metrics import metrics, prepare_snapshots
+from core.prefetch import PrefetchScheduler
+from core.search_index import ArticleSearchIndex
+from core.seen_store import SeenArticleStore
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Crear el NewsAgent una sola vez por worker al arrancar la aplicación.
+
+    El grafo compilado, el cliente de OpenAI y las tablas de keywords se
+    comparten entre todas las requests del worker.
+    """
+    app.state.news_agent = None
+    app.state.news_agent_error = ""
+    app.state.news_cache = NewsCache(
+        ttl=settings.NEWS_CACHE_TTL,
+        stale_ttl=settings.NEWS_CACHE_STALE_TTL
+    )
+    app.state.seen_store = SeenArticleStore(
+        settings.SEEN_STORE_PATH,
+        retention_days=settings.SEEN_RETENTION_DAYS,
+        bloom_capacity=settings.SEEN_BLOOM_CAPACITY
+    )
+    app.state.article_store = ArticleStore(settings.ARTICLE_STORE_DIR)
+    app.state.search_index = ArticleSearchIndex(
+        settings.SEARCH_INDEX_PATH,
+        retention_days=settings.SEARCH_RETENTION_DAYS
+    )
+    app.state.image_proxy = create_image_proxy() if settings.IMAGE_PROXY else None
+    app.state.prefetch = None
+    app.state.warmup = None
+
+    if settings.FAST_START:
+        # Arranque rápido: el puerto se abre ya y el agente se calienta en segundo plano
+        app.state.warmup = asyncio.create_task(warm_up_agent(app))
+    else:
+        await warm_up_agent(app)
+
+    # Volcado periódico de las métricas del worker para agregarlas en /metrics; las
+    # instantáneas de una ejecución anterior se descartan y las de workers
+    # reiniciados se agregan (los contadores no bajan)
+    await asyncio.to_thread(prepare_snapshots, settings.METRICS_DIR)
+    metrics_flusher = asyncio.create_task(
+        metrics.flush_forever(settings.METRICS_DIR, settings.METRICS_FLUSH_INTERVAL)
+    )
+
+    yield
+
+    metrics_flusher.cancel()
+    try:
+        await metrics_flusher
+    except asyncio.CancelledError:
+        pass
+    metrics.write_snapshot(settings.METRICS_DIR)
+    if app.state.warmup is not None:
+        # El hilo de construcción no se puede cancelar: esperar para cerrar el agente
+        await asyncio.gather(app.state.warmup, return_exceptions=True)
+    if app.state.prefetch is not None:
+        await app.state.prefetch.stop()
+    if app.state.news_agent is not None:
+        await app.state.news_agent.aclose()
+    app.state.news_agent = None
+    app.state.news_cache.invalidate()
+    app.state.seen_store.close()
+    app.state.search_index.close()
+    if app.state.image_proxy is not None:
+        await app.state.image_proxy.aclose()
+
+
+def build_news_agent(
+    search_index: ArticleSearchIndex,
+    image_proxy: Optional[ImageProxy] = None
+) -> NewsAgent:
+    """Crear el agente (compila los grafos y las keywords) y calentar el clasificador"""
+    agent = NewsAgent(
+        search_index=search_index,
+        image_proxy=image_proxy,
+        incremental_store=create_incremental_store()
+    )
+    agent._topic_category({"title": "warm-up", "description": ""})
+    return agent
+
+
+async def warm_up_agent(app: FastAPI) -> None:
+    """
+    Crear el NewsAgent del worker en un hilo, sin bloquear el event loop.
+
+    Con FAST_START corre en segundo plano tras abrir el puerto: /health
+    responde desde el primer momento y las requests que necesitan el agente
+    esperan a que termine (get_ready_news_agent).
+    """
+    start = time.perf_counter()
+    try:
+        app.state.news_agent = await asyncio.to_thread(
+            build_news_agent, app.state.search_index, app.state.image_proxy
+        )
+        logger.info(f"✅ NewsAgent inicializado y compartido por el worker ({time.perf_counter() - start:.2f} s)")
+    except Exception as e:
+        # No tumbar el servidor: /health y /api/status deben seguir respondiendo
+        app.state.news_agent_error = str(e)
+        logger.error(f"❌ Error inicializando NewsAgent: {str(e)}")
+        return
+
+    agent = app.state.news_agent
+    if settings.NEWS_SERVING_MODE == "prefetch" and settings.PREFETCH_IN_APP:
+        app.state.prefetch = create_prefetch_scheduler(agent, app.state.article_store, app.state.seen_store)
+        app.state.prefetch.start()
+
+
+def create_incremental_store() -> Optional[IncrementalStore]:
+    """Estado del fetch incremental (app y prefetch_worker.py), None si está desactivado"""
+    if not settings.NEWS_INCREMENTAL:
+        return None
+    return IncrementalStore(settings.NEWS_INCREMENTAL_DIR)
+
+
+def create_image_proxy() -> ImageProxy:
+    """Proxy de miniaturas configurado desde settings (app y prefetch_worker.py)"""
+    return ImageProxy(
+        ImageCache(settings.IMAGE_CACHE_DIR, max_bytes=settings.IMAGE_CACHE_MAX_BYTES),
+        http_client=httpx.AsyncClient(timeout=settings.IMAGE_FETCH_TIMEOUT),
+        max_concurrency=settings.IMAGE_PREFETCH_CONCURRENCY,
+        width=settings.IMAGE_WIDTH,
+        height=settings.IMAGE_HEIGHT,
+        base_url=settings.IMAGE_BASE_URL,
+        allow_private_hosts=settings.IMAGE_ALLOW_PRIVATE_HOSTS
+    )
+
+
+def create_prefetch_scheduler(
+    agent: NewsAgent,
+    store: ArticleStore,
+    seen_store: Optional[SeenArticleStore] = None
+) -> PrefetchScheduler:
+    """Planificador de prefetch configurado desde settings (app y prefetch_worker.py)"""
+    async def loader(filter_type: str):
+        return await load_news(agent, filter_type, seen_store)
+
+    async def union_loader():
+        return await load_all_news(agent, seen_store)
+
+    return PrefetchScheduler(
+        loader,
+        store,
+        agent.quota,
+        filters=agent.FILTERS,
+        min_interval=settings.PREFETCH_MIN_INTERVAL,
+        quota_reserve=settings.PREFETCH_QUOTA_RESERVE,
+        traffic_half_life=settings.PREFETCH_TRAFFIC_HALF_LIFE,
+        union_loader=union_loader if agent.fetch_mode == "union" else None
+    )
+
+
+def get_news_agent(request: Request) -> NewsAgent:
+    """Dependencia de FastAPI que devuelve el agente compartido del worker"""
+    agent = getattr(request.app.state, "news_agent", None)
+
+    if agent is None:
+        error = getattr(request.app.state, "news_agent_error", "") or "agente no inicializado"
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error interno del servidor: {error}"
+        )
+
+    return agent
+
+
+async def get_ready_news_agent(request: Request) -> NewsAgent:
+    """Como get_news_agent, pero esperando al calentamiento en segundo plano (FAST_START)"""
+    warmup = getattr(request.app.state, "warmup", None)
+    if warmup is not None and not warmup.done():
+        await asyncio.shield(warmup)
+    return get_news_agent(request)
+
+
+def agent_status(app: FastAPI) -> str:
+    """Estado del agente del worker: ready, warming o error"""
+    if getattr(app.state, "news_agent", None) is not None:
+        return "ready"
+    warmup = getattr(app.state, "warmup", None)
+    if warmup is not None and not warmup.done():
+        return "warming"
+    return "error"
+
+
+def get_news_cache(request: Request) -> NewsCache:
+    """Dependencia de FastAPI que devuelve la caché de noticias del worker"""
+    return request.app.state.news_cache
+
+
+def get_seen_store(request: Request) -> SeenArticleStore:
+    """Dependencia de FastAPI que devuelve el registro de artículos vistos"""
+    return request.app.state.seen_store
+
+
+def get_article_store(request: Request) -> ArticleStore:
+    """Dependencia de FastAPI que devuelve el almacén local de artículos"""
+    return request.app.state.article_store
+
+
+def get_search_index(request: Request) -> ArticleSearchIndex:
+    """Dependencia de FastAPI que devuelve el índice local de búsqueda"""
+    return request.app.state.search_index
+
+
+def get_image_proxy(request: Request) -> Optional[ImageProxy]:
+    """Proxy de miniaturas del worker (None si IMAGE_PROXY está desactivado)"""
+    return request.app.state.image_proxy
+
+
+def get_prefetch(request: Request) -> Optional[PrefetchScheduler]:
+    """Planificador de prefetch del worker (None si corre en otro proceso)"""
+    return request.app.state.prefetch
@@ -2,78 +2,245 @@
 Endpoints de la API para la plataforma de noticias
 """
 
-from fastapi import APIRouter, HTTPException
-from typing import Dict, List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse
+from typing import Any, AsyncIterator, Dict, Optional
+from datetime import datetime
+import asyncio
+import json
 import logging
-import sys
-import os
-
-# Agregar el directorio padre al path para poder importar desde la raíz del proyecto
-sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+import time
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Importar el agente LangGraph
-from agent.langgraph_agent import NewsAgent
+from agent.ranking import configured_weights, rank_articles
+from api.dependencies import (
+    agent_status,
+    get_article_store,
+    get_image_proxy,
+    get_ready_news_agent,
+    get_news_cache,
+    get_prefetch,
+    get_search_index,
+    get_seen_store,
+)
+from api.news_service import cache_key_for, cursor_after, expire_stale, load_shared, paginate, stream_news
+from api.responses import image_response, payload_response, snapshot_response
+from core.article_store import ArticleStore
+from core.cache import NewsCache
+from core.config import settings
+from core.image_cache import (
+    IMAGE_KEY_RE,
+    PLACEHOLDER_KEY,
+    PLACEHOLDER_MEDIA_TYPE,
+    PLACEHOLDER_SVG,
+    ImageProxy,
+)
+from core.prefetch import PrefetchScheduler
+from core.search_index import ArticleSearchIndex
+from core.seen_store import SeenArticleStore
 logger.info("✅ Usando agente LangGraph")
 AGENT_TYPE = "langgraph"
 
 router = APIRouter()
 
+# Solo los filtros del agente (sin distinguir mayúsculas): el filtro acaba en
+# rutas de fichero y claves de caché y lock
+FILTER_PATTERN = "(?i)^(ai|marketing|both)$"
+
 @router.get("/get-news")
-async def get_news(filter_type: str = "both") -> Dict:
+async def get_news(
+    request: Request,
+    filter_type: str = Query("both", pattern=FILTER_PATTERN),
+    unseen_since: Optional[datetime] = None,
+    k: Optional[int] = Query(None, ge=1, le=settings.NEWS_RESULT_SET_MAX),
+    w_keywords: Optional[float] = Query(None, ge=0),
+    w_recency: Optional[float] = Query(None, ge=0),
+    w_diversity: Optional[float] = Query(None, ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=settings.NEWS_RESULT_SET_MAX),
+    cursor: Optional[str] = Query(None, min_length=1, max_length=200),
+    cache: NewsCache = Depends(get_news_cache),
+    seen_store: SeenArticleStore = Depends(get_seen_store),
+    article_store: ArticleStore = Depends(get_article_store),
+    prefetch: Optional[PrefetchScheduler] = Depends(get_prefetch)
+) -> Response:
     """
     Obtiene noticias filtradas de IA y Marketing
     
+    Responde con ETag (304 si coincide `If-None-Match`), comprimido según
+    `Accept-Encoding` y en MessagePack con `Accept: application/msgpack`.
+    
     Args:
         filter_type: Tipo de filtro ('ai', 'marketing', 'both')
+        unseen_since: Si se indica (ISO 8601), solo noticias no vistas antes de esa fecha
+                      en ningún filtro
+        k: Nº de noticias del ranking por relevancia (por defecto NEWS_MAX_RESULTS)
+        w_keywords, w_recency, w_diversity: Pesos del ranking (por defecto NEWS_RANK_WEIGHT_*).
+                      Con `k` o algún peso se vuelve a rankear el conjunto ordenado
+                      completo ya cargado, sin llamar a NewsAPI ni al agente
+        limit: Tamaño de página (por defecto NEWS_MAX_RESULTS si hay `cursor`). Sin
+               `cursor` es la primera página del conjunto ordenado completo
+        cursor: `next_cursor` de la página anterior. La página se sirve del conjunto
+                ordenado publicado (sin NewsAPI ni agente, en cualquier modo) con
+                coste constante por profunda que sea; si desde entonces se publicó
+                otra versión, sigue tras el último artículo servido
+        cache: Caché TTL por filtro con coalescing de requests concurrentes
+        seen_store: Registro persistente de artículos ya vistos
+        article_store: Snapshots por filtro compartidos entre workers: los publica
+                       el prefetch (modo "prefetch") o cualquier carga real (modo
+                       "cache") y se sirven como stale si NewsAPI no está disponible
+        prefetch: Planificador de prefetch del worker, si corre dentro de la app
     
     Returns:
-        JSON con las noticias filtradas
+        JSON con las noticias filtradas ("stale" y "stale_since" si son el
+        último resultado bueno porque NewsAPI no está disponible; "total" y
+        "next_cursor", None en la última página, si se pagina)
     """
     try:
         logger.info(f"Solicitando noticias con filtro: {filter_type}")
+        filter_key = filter_type.lower()
+        paginated = limit is not None or cursor is not None
+        if paginated and (k is not None or any(w is not None for w in (w_keywords, w_recency, w_diversity))):
+            raise HTTPException(
+                status_code=400,
+                detail="La paginación (limit/cursor) no se combina con k ni con pesos de ranking"
+            )
         
-        # Crear instancia del agente
-        agent = NewsAgent()
+        # Las lecturas del almacén van a un hilo: tras publicarse una versión nueva, la
+        # primera lectura mapea el fichero y decodifica el JSON (grande en el ranking)
+        if cursor is not None:
+            # Páginas siguientes: solo del conjunto ordenado publicado, sin agente ni NewsAPI
+            ranked_set = await asyncio.to_thread(article_store.ranked, filter_key)
+            if ranked_set is None:
+                raise HTTPException(
+                    status_code=410,
+                    detail="El conjunto de resultados ya no está disponible: vuelve a pedir la primera página"
+                )
+            try:
+                news_data, next_cursor = paginate(ranked_set, limit or settings.NEWS_MAX_RESULTS, cursor)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            if unseen_since is not None:
+                news_data = await asyncio.to_thread(
+                    seen_store.filter_unseen_since, news_data, unseen_since
+                )
+            return payload_response(request, {
+                "status": "success",
+                "filter": filter_key,
+                "count": len(news_data),
+                "news": news_data,
+                "total": len(ranked_set),
+                "next_cursor": next_cursor,
+                "upstream": {"pages": 0, "quota_used": 0}
+            })
         
-        # Ejecutar el agente para obtener noticias
-        # Ambos agentes ahora usan solo filter_type
-        news_data = await agent.get_filtered_news(filter_type.lower())
+        warming = False
+        stale_since = None
+        # Páginas y cuota de NewsAPI de la carga que produjo estos datos
+        upstream = {"pages": 0, "quota_used": 0}
+        # Ranking por request: no se puede servir el snapshot tal cual
+        rerank = k is not None or any(w is not None for w in (w_keywords, w_recency, w_diversity))
+        ranked = None
         
-        # Filtrar por categoría específica
-        if filter_type.lower() == "both":
-            # Solo noticias que tengan AMBOS temas (IA + Marketing)
-            filtered_news = []
-            for article in news_data:
-                article_category = article.get("category", "")
-                if article_category == "both":
-                    filtered_news.append(article)
-            news_data = filtered_news
-        elif filter_type.lower() != "both":
-            # Para AI o Marketing individual
-            filtered_news = []
-            for article in news_data:
-                article_category = article.get("category", "")
-                
-                if filter_type.lower() == "ai" and article_category == "ai":
-                    filtered_news.append(article)
-                elif filter_type.lower() == "marketing" and article_category == "marketing":
-                    filtered_news.append(article)
+        if settings.NEWS_SERVING_MODE == "prefetch":
+            # Nunca se llama a NewsAPI en la ruta de la request
+            if prefetch is not None:
+                prefetch.record_request(filter_key)
             
-            news_data = filtered_news
+            snapshot = await asyncio.to_thread(article_store.snapshot, filter_key)
+            if snapshot is None:
+                # Almacén aún frío: responder ya y pedir un refresco prioritario
+                warming = True
+                news_data = []
+                if prefetch is not None:
+                    prefetch.request_refresh(filter_key)
+            elif unseen_since is None and not rerank and not paginated:
+                # El snapshot ya es el cuerpo de la respuesta: sin deserializar
+                return snapshot_response(request, snapshot)
+            else:
+                news_data = snapshot.payload()["news"]
+        else:
+            if settings.NEWS_SERVING_MODE == "cache" and unseen_since is None and not rerank and not paginated:
+                # Resultado fresco publicado por cualquier worker: sin agente ni llamada a NewsAPI
+                snapshot = await asyncio.to_thread(article_store.snapshot, filter_key)
+                if snapshot is not None and snapshot.age() < settings.NEWS_CACHE_TTL:
+                    return snapshot_response(request, snapshot)
+            
+            # El agente compartido (creado en el lifespan) solo hace falta en estos modos
+            agent = await get_ready_news_agent(request)
+            # En fetch "union" una sola consulta a NewsAPI sirve los tres filtros
+            cache_key = cache_key_for(agent, filter_key)
+            
+            async def load() -> Dict:
+                return await load_shared(
+                    agent, filter_key, seen_store,
+                    store=article_store,
+                    coordinate=settings.NEWS_SERVING_MODE != "live"
+                )
+            
+            if settings.NEWS_SERVING_MODE == "live":
+                results = await load()
+            else:
+                # Un único grafo por clave aunque lleguen N requests a la vez
+                results = await cache.get_or_load(cache_key, load)
+                expire_stale(cache, cache_key, results, agent)
+            result = results.get(filter_key, {"news": []})
+            news_data = result["news"]
+            ranked = result.get("ranked")
+            upstream = {"pages": result.get("pages", 0), "quota_used": result.get("quota_used", 0)}
+            if result.get("stale"):
+                # NewsAPI no disponible: último resultado bueno del filtro
+                stale_since = result["stale_since"]
+        
+        if rerank and news_data:
+            # Conjunto ordenado completo (el publicado si viene de otro worker o es stale)
+            ranked_set = await asyncio.to_thread(article_store.ranked, filter_key)
+            news_data = ranked or (ranked_set.news if ranked_set else None) or news_data
+        
+        if paginated:
+            # Primera página: la carga acaba de publicar (o ya había) el conjunto ordenado
+            ranked_set = await asyncio.to_thread(article_store.ranked, filter_key)
+            if ranked_set:
+                total = len(ranked_set)
+                news_data, next_cursor = paginate(ranked_set, limit)
+            else:
+                # Sin conjunto publicado (almacén frío o noticias de ejemplo): una sola página
+                total = len(news_data)
+                news_data, next_cursor = news_data[:limit], None
+        
+        if unseen_since is not None:
+            news_data = await asyncio.to_thread(
+                seen_store.filter_unseen_since, news_data, unseen_since
+            )
+        
+        if rerank:
+            weights = configured_weights(keywords=w_keywords, recency=w_recency, diversity=w_diversity)
+            news_data = rank_articles(news_data, weights, k or settings.NEWS_MAX_RESULTS)
         
         logger.info(f"Obtenidas {len(news_data)} noticias después del filtrado")
         
-        return {
+        response = {
             "status": "success",
-            "filter": filter_type,
+            "filter": filter_key,
             "count": len(news_data),
-            "news": news_data
+            "news": news_data,
+            "upstream": upstream
         }
+        if paginated:
+            response["total"] = total
+            response["next_cursor"] = next_cursor
+        if warming:
+            response["warming"] = True
+        if stale_since is not None:
+            response["stale"] = True
+            response["stale_since"] = stale_since
+        return payload_response(request, response)
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error al obtener noticias: {str(e)}")
         raise HTTPException(
@@ -81,10 +248,217 @@ async def get_news(filter_type: str = "both") -> Dict:
             detail=f"Error interno del servidor: {str(e)}"
         )
 
-@router.get("/status")
-async def api_status() -> Dict:
-    """Verificar estado de la API"""
+def _encode_event(event: Dict[str, Any], stream_format: str) -> str:
+    """Serializar un evento como línea NDJSON o como evento SSE"""
+    data = json.dumps(event, ensure_ascii=False)
+    if stream_format == "sse":
+        return f"event: {event['type']}\ndata: {data}\n\n"
+    return data + "\n"
+
+@router.get("/get-news/stream")
+async def get_news_stream(
+    request: Request,
+    filter_type: str = Query("both", pattern=FILTER_PATTERN),
+    stream_format: str = Query("ndjson", alias="format", pattern="^(ndjson|sse)$"),
+    cache: NewsCache = Depends(get_news_cache),
+    seen_store: SeenArticleStore = Depends(get_seen_store),
+    article_store: ArticleStore = Depends(get_article_store),
+    prefetch: Optional[PrefetchScheduler] = Depends(get_prefetch)
+) -> StreamingResponse:
+    """
+    Variante en streaming de /get-news: cada artículo se envía en cuanto el
+    agente lo acepta, en vez de esperar a que termine todo el grafo
+    
+    Con NEWS_RANKING (o fetch incremental) la cabeza por relevancia solo se
+    conoce con todo el lote: los artículos se envían igualmente al aceptarse,
+    como provisionales, y un evento {"type": "ranked", "urls": [...]} antes
+    del resumen fija el orden y la selección de la respuesta (lo emitido que
+    no aparezca en él se descarta).
+    
+    Args:
+        filter_type: Tipo de filtro ('ai', 'marketing', 'both')
+        stream_format: 'ndjson' (una línea JSON por evento) o 'sse' (Server-Sent Events)
+    
+    Returns:
+        Eventos {"type": "article", "article": {...}}, {"type": "ranked"} si el
+        orden cambió y un evento final {"type": "summary", "count", "used_sample",
+        "upstream", "source", "next_cursor"}; las páginas siguientes se piden a
+        /get-news?cursor=...
+    """
+    logger.info(f"Solicitando noticias en streaming con filtro: {filter_type}")
+    filter_key = filter_type.lower()
+    
+    if settings.NEWS_SERVING_MODE == "prefetch":
+        if prefetch is not None:
+            prefetch.record_request(filter_key)
+        
+        entry = await asyncio.to_thread(article_store.get, filter_key)
+        if entry is None and prefetch is not None:
+            prefetch.request_refresh(filter_key)
+        
+        async def events() -> AsyncIterator[Dict[str, Any]]:
+            news_data = entry["news"] if entry else []
+            for article in news_data:
+                yield {"type": "article", "article": article}
+            yield {
+                "type": "summary",
+                "count": len(news_data),
+                "used_sample": False,
+                "upstream": {"pages": 0, "quota_used": 0},
+                "source": "store",
+                "warming": entry is None,
+                "next_cursor": cursor_after(await asyncio.to_thread(article_store.ranked, filter_key), news_data)
+            }
+    else:
+        # El agente compartido (creado en el lifespan) solo hace falta en estos modos
+        agent = await get_ready_news_agent(request)
+        
+        def events() -> AsyncIterator[Dict[str, Any]]:
+            use_cache = settings.NEWS_SERVING_MODE != "live"
+            return stream_news(agent, filter_key, seen_store, cache if use_cache else None, article_store)
+    
+    async def body() -> AsyncIterator[str]:
+        try:
+            async for event in events():
+                yield _encode_event(event, stream_format)
+        except Exception as e:
+            logger.error(f"Error en streaming de noticias: {str(e)}")
+            yield _encode_event(
+                {"type": "error", "detail": f"Error interno del servidor: {str(e)}"}, stream_format
+            )
+    
+    media_type = "text/event-stream" if stream_format == "sse" else "application/x-ndjson"
+    return StreamingResponse(
+        body(),
+        media_type=media_type,
+        # Sin buffering en proxies (nginx) para que cada artículo llegue al momento
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/search")
+async def search_news(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    category: Optional[str] = Query(None, pattern="^(ai|marketing|both)$"),
+    search_index: ArticleSearchIndex = Depends(get_search_index),
+    image_proxy: Optional[ImageProxy] = Depends(get_image_proxy)
+) -> Dict:
+    """
+    Búsqueda full-text sobre los artículos ya descargados (sin gastar cuota de NewsAPI)
+    
+    Args:
+        q: Palabras clave (todas deben aparecer; si no hay resultados, cualquiera)
+        limit: Máximo de resultados, ordenados por relevancia BM25
+        category: Tema opcional ('ai', 'marketing', 'both')
+    """
+    try:
+        start = time.perf_counter()
+        results = await asyncio.to_thread(search_index.search, q, limit, category)
+        took_ms = (time.perf_counter() - start) * 1000
+        
+        for result in results:
+            if image_proxy is not None:
+                result["image"] = image_proxy.url_for(result["image"])
+            elif not result["image"]:
+                result["image"] = f"{settings.IMAGE_BASE_URL}/api/image/{PLACEHOLDER_KEY}"
+        
+        logger.info(f"🔎 Búsqueda '{q}': {len(results)} resultados en {took_ms:.1f} ms")
+        
+        return {
+            "status": "success",
+            "query": q,
+            "count": len(results),
+            "took_ms": round(took_ms, 2),
+            "results": results
+        }
+        
+    except Exception as e:
+        logger.error(f"Error en la búsqueda: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error interno del servidor: {str(e)}"
+        )
+
+@router.get("/image/{key}")
+async def get_image(
+    request: Request,
+    key: str,
+    image_proxy: Optional[ImageProxy] = Depends(get_image_proxy)
+) -> Response:
+    """
+    Miniatura de un artículo desde la caché local en disco (o el placeholder local)
+    
+    Args:
+        key: Hash de la URL original (solo se sirven imágenes registradas al
+             descargar noticias) o "placeholder"
+    """
+    if key == PLACEHOLDER_KEY:
+        return image_response(request, PLACEHOLDER_SVG, PLACEHOLDER_MEDIA_TYPE, "placeholder-v1", max_age=86400)
+    if not IMAGE_KEY_RE.match(key):
+        raise HTTPException(status_code=404, detail="Imagen no encontrada")
+    
+    image = await image_proxy.get(key) if image_proxy is not None else None
+    if image is None:
+        # Origen caído o clave desconocida: placeholder con caché corta para reintentar
+        return image_response(request, PLACEHOLDER_SVG, PLACEHOLDER_MEDIA_TYPE, "placeholder-v1", max_age=300)
+    
+    body, media_type, content_hash = image
+    return image_response(request, body, media_type, content_hash, max_age=7 * 86400)
+
+@router.get("/image-stats")
+async def image_stats(image_proxy: Optional[ImageProxy] = Depends(get_image_proxy)) -> Dict:
+    """Estadísticas del proxy de miniaturas del worker"""
+    if image_proxy is None:
+        return {"status": "success", "enabled": False}
+    cache = image_proxy.cache
+    return {
+        "status": "success",
+        "enabled": True,
+        "images": await asyncio.to_thread(len, cache),
+        "total_bytes": await asyncio.to_thread(cache.total_bytes),
+        "max_bytes": cache.max_bytes,
+        **image_proxy.stats
+    }
+
+@router.get("/cache-stats")
+async def cache_stats(cache: NewsCache = Depends(get_news_cache)) -> Dict:
+    """Contadores de hit/miss de la caché de noticias para dimensionar el TTL"""
     return {
+        "status": "success",
+        "cache": cache.get_stats()
+    }
+
+@router.get("/prefetch-status")
+async def prefetch_status(
+    article_store: ArticleStore = Depends(get_article_store),
+    prefetch: Optional[PrefetchScheduler] = Depends(get_prefetch)
+) -> Dict:
+    """Plan de refresco, tráfico y edad de cada filtro en el almacén"""
+    if prefetch is not None:
+        return {"status": "success", "mode": settings.NEWS_SERVING_MODE, "prefetch": prefetch.status()}
+    
+    # El prefetch corre en otro proceso (o está desactivado): solo la edad del almacén
+    now = time.time()
+    return {
+        "status": "success",
+        "mode": settings.NEWS_SERVING_MODE,
+        "prefetch": {
+            "filters": {
+                f: {"age_seconds": round(now - article_store.updated_at(f), 1) if article_store.updated_at(f) else None}
+                for f in ("ai", "marketing", "both")
+            }
+        }
+    }
+
+@router.get("/status")
+async def api_status(request: Request) -> Dict:
+    """Verificar estado de la API (si el agente del worker ya está caliente y su circuito de NewsAPI)"""
+    status = {
         "status": "active",
-        "message": "API de noticias funcionando correctamente"
+        "message": "API de noticias funcionando correctamente",
+        "agent": agent_status(request.app)
     }
+    agent = getattr(request.app.state, "news_agent", None)
+    if agent is not None:
+        status["upstream"] = agent.breaker.status()
+    return status
@@ -0,0 +1,459 @@
+"""
+Carga de noticias compartida por los endpoints y el prefetch en segundo plano
+(y paginación por cursor sobre el conjunto ordenado publicado)
+"""
+
+import asyncio
+import base64
+import binascii
+import json
+import logging
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+
+from agent.langgraph_agent import ArticleCallback, NewsAgent
+from core.article_store import ArticleStore, RankedSet
+from core.cache import NewsCache
+from core.config import settings
+from core.seen_store import SeenArticleStore
+
+logger = logging.getLogger(__name__)
+
+
+def filter_by_category(news_data: List[Dict], filter_type: str) -> List[Dict]:
+    """Filtrar por categoría específica"""
+    if filter_type == "both":
+        # Solo noticias que tengan AMBOS temas (IA + Marketing)
+        filtered_news = []
+        for article in news_data:
+            article_category = article.get("category", "")
+            if article_category == "both":
+                filtered_news.append(article)
+        return filtered_news
+
+    # Para AI o Marketing individual
+    filtered_news = []
+    for article in news_data:
+        article_category = article.get("category", "")
+
+        if filter_type == "ai" and article_category == "ai":
+            filtered_news.append(article)
+        elif filter_type == "marketing" and article_category == "marketing":
+            filtered_news.append(article)
+
+    return filtered_news
+
+
+def cache_key_for(agent: NewsAgent, filter_type: str) -> str:
+    """Clave de caché (y de lock entre workers) que produce los datos de un filtro"""
+    return "union" if agent.fetch_mode == "union" else filter_type
+
+
+def published_results(
+    store: ArticleStore,
+    filters: List[str],
+    max_age: Optional[float] = None
+) -> Optional[Dict[str, Dict[str, Any]]]:
+    """
+    Últimos resultados publicados (por cualquier worker) de todos los filtros
+
+    Returns:
+        None si falta alguno (o, con `max_age`, si alguno es más antiguo)
+    """
+    results = {}
+    for f in filters:
+        snapshot = store.snapshot(f)
+        if snapshot is None or not snapshot.count:
+            return None
+        if max_age is not None and snapshot.age() >= max_age:
+            return None
+        entry = snapshot.payload()
+        results[f] = {
+            "news": entry["news"],
+            "used_sample": False,
+            "pages": 0,
+            "quota_used": 0,
+            "updated_at": snapshot.updated_at
+        }
+    return results
+
+
+def mark_stale(results: Dict[str, Dict[str, Any]], max_age: float) -> Dict[str, Dict[str, Any]]:
+    """Marcar como stale (con "stale_since") los resultados publicados hace `max_age` o más"""
+    now = time.time()
+    for result in results.values():
+        if "updated_at" in result and now - result["updated_at"] >= max_age:
+            result.update(stale=True, stale_since=result.pop("updated_at"))
+    return results
+
+
+def stale_result(last_good: ArticleStore, filter_type: str) -> Optional[Dict[str, Any]]:
+    """Último resultado bueno del filtro marcado como stale (None si no hay)"""
+    published = published_results(last_good, [filter_type])
+    if published is None:
+        return None
+    result = published[filter_type]
+    result.update(stale=True, stale_since=result.pop("updated_at"))
+    return result
+
+
+async def _keep_last_good(
+    last_good: Optional[ArticleStore],
+    filter_type: str,
+    result: Dict[str, Any]
+) -> Dict[str, Any]:
+    """
+    Guardar un resultado real como último bueno, o sustituir uno de ejemplo por él
+
+    Si NewsAPI falló (o el circuito está abierto) el agente rellena con
+    noticias de ejemplo: mejor servir las últimas reales, marcadas como stale.
+    """
+    if last_good is None:
+        return result
+    if result["used_sample"]:
+        stale = await asyncio.to_thread(stale_result, last_good, filter_type)
+        if stale is not None:
+            logger.warning(f"⚠️ NewsAPI no disponible: sirviendo el último resultado bueno de '{filter_type}'")
+            return stale
+    elif result["news"]:
+        upstream = {"pages": result["pages"], "quota_used": result["quota_used"]}
+        await asyncio.to_thread(
+            last_good.put, filter_type, result["news"], upstream, result.get("ranked"), result.get("unchanged", False)
+        )
+    return result
+
+
+async def _stale_while_open(
+    agent: NewsAgent,
+    last_good: Optional[ArticleStore],
+    filters: List[str]
+) -> Optional[Dict[str, Dict[str, Any]]]:
+    """Con el circuito abierto, los últimos resultados buenos sin ejecutar el grafo (si hay de todos)"""
+    if last_good is None or not agent.breaker.is_open():
+        return None
+    results = {}
+    for f in filters:
+        stale = await asyncio.to_thread(stale_result, last_good, f)
+        if stale is None:
+            return None
+        results[f] = stale
+    logger.info(f"🔌 Circuito abierto: sirviendo resultados stale de {', '.join(filters)}")
+    return results
+
+
+def expire_stale(cache: NewsCache, cache_key: str, results: Dict[str, Dict[str, Any]], agent: NewsAgent) -> None:
+    """
+    Descartar de la caché un resultado stale en cuanto el circuito deja pasar llamadas
+
+    Así la siguiente request vuelve a probar NewsAPI sin esperar al TTL de la caché.
+    """
+    if any(r.get("stale") for r in results.values()) and not agent.breaker.is_open():
+        cache.invalidate(cache_key)
+
+
+async def load_news(
+    agent: NewsAgent,
+    filter_type: str,
+    seen_store: Optional[SeenArticleStore] = None,
+    on_article: Optional[ArticleCallback] = None,
+    last_good: Optional[ArticleStore] = None
+) -> Dict[str, Any]:
+    """
+    Ejecutar el agente para un filtro y preparar el resultado servible
+
+    Con `last_good`, cada resultado real se guarda allí y, si NewsAPI no está
+    disponible, se sirve el último guardado con "stale" y "stale_since".
+
+    Returns:
+        {"news": [...], "used_sample": bool, "pages": int, "quota_used": int,
+         "ranked": conjunto ordenado completo del que "news" es la cabeza,
+         "unchanged": True si el refresco incremental no encontró nada nuevo}
+    """
+    stale = await _stale_while_open(agent, last_good, [filter_type])
+    if stale is not None:
+        return stale[filter_type]
+
+    result = await agent.run(filter_type, on_article=on_article)
+    news_data = filter_by_category(result["news"], filter_type)
+
+    if seen_store is not None and not result.get("unchanged"):
+        # Registrar la primera vez que vemos cada artículo (SQLite fuera del event loop)
+        await asyncio.to_thread(seen_store.mark_seen, news_data)
+
+    return await _keep_last_good(last_good, filter_type, {
+        "news": news_data,
+        "used_sample": result["used_sample"],
+        "pages": result["pages"],
+        "quota_used": result["quota_used"],
+        "ranked": filter_by_category(result.get("ranked", []), filter_type),
+        "unchanged": result.get("unchanged", False)
+    })
+
+
+async def load_all_news(
+    agent: NewsAgent,
+    seen_store: Optional[SeenArticleStore] = None,
+    filters: Optional[List[str]] = None,
+    on_article: Optional[ArticleCallback] = None,
+    last_good: Optional[ArticleStore] = None
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Cargar de una vez todos los filtros
+
+    En modo de fetch "union" es una sola consulta a NewsAPI clasificada en
+    todos los filtros; en "per_filter", una ejecución del agente por filtro.
+
+    Returns:
+        {filtro: {"news": [...], "used_sample": bool, "pages": int, "quota_used": int}};
+        en modo "union" pages/quota_used son los de la consulta compartida
+    """
+    filters = list(filters or agent.FILTERS)
+
+    if agent.fetch_mode != "union":
+        loaded = await asyncio.gather(*[load_news(agent, f, seen_store, on_article, last_good) for f in filters])
+        return dict(zip(filters, loaded))
+
+    stale = await _stale_while_open(agent, last_good, filters)
+    if stale is not None:
+        return stale
+
+    result = await agent.run_union(filters, on_article=on_article)
+    results = {
+        f: {
+            "news": filter_by_category(r["news"], f),
+            "used_sample": r["used_sample"],
+            "pages": result["pages"],
+            "quota_used": result["quota_used"],
+            "ranked": filter_by_category(r.get("ranked", []), f),
+            "unchanged": r.get("unchanged", False)
+        }
+        for f, r in result["results"].items()
+    }
+
+    if seen_store is not None:
+        # Un filtro sin cambios ya registró sus artículos en el refresco anterior
+        all_news = [article for r in results.values() if not r["unchanged"] for article in r["news"]]
+        if all_news:
+            await asyncio.to_thread(seen_store.mark_seen, all_news)
+
+    for f in filters:
+        results[f] = await _keep_last_good(last_good, f, results[f])
+    return results
+
+
+async def load_shared(
+    agent: NewsAgent,
+    filter_type: str,
+    seen_store: Optional[SeenArticleStore] = None,
+    on_article: Optional[ArticleCallback] = None,
+    store: Optional[ArticleStore] = None,
+    coordinate: bool = True
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Cargar la clave de caché de un filtro (todos los filtros en fetch "union")
+
+    Con `store` cada resultado real se publica como snapshot compartido y se
+    usa como último resultado bueno. Con `coordinate`, solo un proceso
+    refresca cada clave a la vez (lock de fichero no bloqueante): los demás
+    workers devuelven lo último publicado (o esperan a que se publique, si
+    el almacén está frío) en vez de repetir la llamada a NewsAPI.
+
+    Returns:
+        {filtro: {"news": [...], "used_sample": bool, "pages": int, "quota_used": int}}
+    """
+    union = agent.fetch_mode == "union"
+
+    async def load() -> Dict[str, Dict[str, Any]]:
+        if union:
+            return await load_all_news(agent, seen_store, on_article=on_article, last_good=store)
+        return {filter_type: await load_news(agent, filter_type, seen_store, on_article, store)}
+
+    if store is None or not coordinate:
+        return await load()
+
+    cache_key = cache_key_for(agent, filter_type)
+    filters = list(agent.FILTERS) if union else [filter_type]
+    deadline = time.monotonic() + settings.NEWS_API_TIMEOUT
+    while True:
+        with store.refresh_lock(cache_key) as acquired:
+            if acquired:
+                # El worker que tenía el lock pudo publicar justo antes de soltarlo
+                fresh = await asyncio.to_thread(published_results, store, filters, settings.NEWS_CACHE_TTL)
+                return fresh if fresh is not None else await load()
+
+        published = await asyncio.to_thread(published_results, store, filters)
+        if published is not None:
+            logger.info(f"🤝 Otro worker está refrescando '{cache_key}': sirviendo lo último publicado")
+            # Más antiguo que el TTL: se sirve como stale y expire_stale no lo deja en caché
+            return mark_stale(published, settings.NEWS_CACHE_TTL)
+        if time.monotonic() >= deadline:
+            return await load()
+        # Almacén frío: esperar a que el otro worker publique (un stat() por sondeo)
+        await asyncio.sleep(0.05)
+
+
+# Cargas lanzadas por streams: siguen hasta el final aunque el cliente se desconecte
+_stream_loads: Set[asyncio.Task] = set()
+
+
+async def stream_news(
+    agent: NewsAgent,
+    filter_type: str,
+    seen_store: Optional[SeenArticleStore] = None,
+    cache: Optional[NewsCache] = None,
+    last_good: Optional[ArticleStore] = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Emitir las noticias de un filtro a medida que el agente las acepta
+
+    Produce eventos {"type": "article", "article": {...}} y termina con
+    {"type": "summary", "count", "used_sample", "upstream", "source"}
+    (más "stale" y "stale_since" si se sirve el último resultado bueno, y
+    con `last_good` "next_cursor" para seguir con /get-news?cursor=...).
+    Si el upstream falla a mitad de carga, los artículos de ejemplo ya
+    emitidos se anulan con {"type": "reset"} antes del resultado stale.
+    Con ranking (o fetch incremental) los artículos llegan en el orden en
+    que se aceptan y son provisionales: antes del resumen, un evento
+    {"type": "ranked", "urls": [...]} da el orden definitivo de la
+    respuesta, y lo emitido que no esté en él se descarta.
+    Con caché, un hit se reenvía al momento y un miss ejecuta el agente
+    como loader de la caché (single-flight): el resultado queda cacheado y
+    las requests concurrentes, en streaming o no, comparten la misma carga.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    loader_ran = False
+
+    async def on_article(article_filter: str, article: Dict[str, Any]) -> None:
+        # Mismo criterio que el filtrado por categoría de la respuesta completa
+        if article_filter == filter_type and filter_by_category([article], filter_type):
+            queue.put_nowait(article)
+
+    cache_key = cache_key_for(agent, filter_type)
+
+    async def load() -> Dict[str, Any]:
+        nonlocal loader_ran
+        loader_ran = True
+        return await load_shared(agent, filter_type, seen_store, on_article, last_good, coordinate=cache is not None)
+
+    load_task = asyncio.create_task(cache.get_or_load(cache_key, load) if cache is not None else load())
+    _stream_loads.add(load_task)
+    load_task.add_done_callback(_stream_loads.discard)
+
+    sent_urls = set()
+    sent_order = []
+    while not load_task.done() or not queue.empty():
+        if queue.empty():
+            next_article = asyncio.create_task(queue.get())
+            await asyncio.wait({next_article, load_task}, return_when=asyncio.FIRST_COMPLETED)
+            if not next_article.done():
+                next_article.cancel()
+                continue
+            article = next_article.result()
+        else:
+            article = queue.get_nowait()
+
+        sent_urls.add(article.get("url"))
+        sent_order.append(article.get("url"))
+        yield {"type": "article", "article": article}
+
+    results = await load_task
+    result = results.get(filter_type, {"news": [], "used_sample": False})
+    if cache is not None:
+        expire_stale(cache, cache_key, results, agent)
+
+    if result.get("stale") and sent_urls:
+        # Lo emitido eran noticias de ejemplo: el cliente debe descartarlas
+        sent_urls.clear()
+        sent_order.clear()
+        yield {"type": "reset"}
+
+    # Hit de caché o carga coalescida: reenviar lo que no llegó en streaming
+    for article in result["news"]:
+        if article.get("url") not in sent_urls:
+            sent_order.append(article.get("url"))
+            yield {"type": "article", "article": article}
+
+    served_order = [article.get("url") for article in result["news"]]
+    if sent_order != served_order:
+        # Lo emitido era provisional: orden definitivo tras el ranking
+        yield {"type": "ranked", "urls": served_order}
+
+    summary = {
+        "type": "summary",
+        "count": len(result["news"]),
+        "used_sample": result["used_sample"],
+        "upstream": {"pages": result.get("pages", 0), "quota_used": result.get("quota_used", 0)},
+        "source": "live" if loader_ran else "cache"
+    }
+    if result.get("stale"):
+        summary.update(stale=True, stale_since=result["stale_since"])
+    if last_good is not None:
+        ranked = await asyncio.to_thread(last_good.ranked, filter_type)
+        summary["next_cursor"] = cursor_after(ranked, result["news"])
+    yield summary
+
+
+def encode_cursor(ranked: RankedSet, end: int) -> Optional[str]:
+    """
+    Cursor opaco de la página que empieza en `end` (None si no quedan artículos)
+
+    Guarda la versión del conjunto, la clave del último artículo servido
+    (keyset) y la posición siguiente.
+    """
+    if end <= 0 or end >= len(ranked):
+        return None
+    state = {"v": ranked.version, "k": RankedSet.key(ranked.news[end - 1]), "o": end}
+    raw = json.dumps(state, separators=(",", ":")).encode("ascii")
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    """Estado de un cursor de `encode_cursor`; ValueError si no es válido"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        state = json.loads(raw)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError("Cursor no válido")
+    if (
+        not isinstance(state, dict)
+        or not isinstance(state.get("v"), int)
+        or not isinstance(state.get("k"), str)
+        or not isinstance(state.get("o"), int)
+        or state["o"] < 0
+    ):
+        raise ValueError("Cursor no válido")
+    return state
+
+
+def page_start(ranked: RankedSet, state: Dict[str, Any]) -> int:
+    """
+    Posición del conjunto en la que sigue un cursor
+
+    Sobre la misma versión es su posición guardada. Si desde entonces se
+    publicó otra, se sigue tras el último artículo servido (que pudo cambiar
+    de posición); si ya no está en el conjunto, desde la posición guardada.
+    """
+    if state["v"] == ranked.version:
+        return min(state["o"], len(ranked))
+    position = ranked.position_after(state["k"])
+    return position if position is not None else min(state["o"], len(ranked))
+
+
+def paginate(ranked: RankedSet, limit: int, cursor: Optional[str] = None) -> Tuple[List[Dict], Optional[str]]:
+    """
+    Página de `limit` artículos del conjunto ordenado y el cursor de la siguiente
+
+    Coste constante por página (un slice) por mucho que avance el cliente.
+    Lanza ValueError si el cursor no es válido.
+    """
+    start = page_start(ranked, decode_cursor(cursor)) if cursor is not None else 0
+    page = ranked.news[start:start + limit]
+    return page, encode_cursor(ranked, start + len(page))
+
+
+def cursor_after(ranked: Optional[RankedSet], served: List[Dict]) -> Optional[str]:
+    """Cursor para seguir tras unas noticias ya servidas (la cabeza de un snapshot o un stream)"""
+    if ranked is None or not served:
+        return None
+    end = ranked.position_after(RankedSet.key(served[-1]))
+    return encode_cursor(ranked, end) if end is not None else None
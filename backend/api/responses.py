@@ -0,0 +1,215 @@
+"""
+Respuestas de noticias con GET condicional, compresión y serialización compacta
+(y respuestas condicionales de miniaturas para /api/image)
+
+Los snapshots del almacén de artículos ya son el cuerpo JSON de la respuesta:
+`snapshot_response` los sirve desde el mmap sin deserializarlos.
+
+- ETag débil por contenido (`payload_etag`, igual para un snapshot que para
+  una respuesta construida en la request): con `If-None-Match` coincidente
+  se responde 304 sin cuerpo.
+- JSON con orjson (o json estándar si no está instalado) y MessagePack con
+  `Accept: application/msgpack`.
+- Compresión brotli (paquete opcional `brotli`) o gzip según
+  `Accept-Encoding`, memoizada por cuerpo (o versión del snapshot) para no
+  recomprimir en cada sondeo.
+
+La compresión se hace aquí y no con GZipMiddleware: el middleware acumularía
+los eventos de /get-news/stream y rompería el streaming.
+"""
+
+import gzip
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from fastapi import Request
+from fastapi.responses import Response
+
+from core.article_store import Snapshot, payload_etag
+from core.config import settings
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dependencia opcional
+    orjson = None
+
+try:
+    import ormsgpack
+except ImportError:  # pragma: no cover - dependencia opcional
+    ormsgpack = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - dependencia opcional
+    brotli = None
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+MSGPACK_MEDIA_TYPES = (MSGPACK_MEDIA_TYPE, "application/x-msgpack")
+
+
+def preferred_media_type(accept: str) -> str:
+    """MessagePack solo si el cliente lo pide explícitamente (y hay serializador)"""
+    if ormsgpack is not None and any(media in accept.lower() for media in MSGPACK_MEDIA_TYPES):
+        return MSGPACK_MEDIA_TYPE
+    return JSON_MEDIA_TYPE
+
+
+def serialize(payload: Any, media_type: str) -> bytes:
+    if media_type == MSGPACK_MEDIA_TYPE:
+        return ormsgpack.packb(payload)
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+
+def content_etag(body: bytes) -> str:
+    """Hash del cuerpo serializado (clave de la caché de cuerpos comprimidos)"""
+    return f'W/"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Comparación débil de If-None-Match (RFC 9110), incluida la forma `*`"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in if_none_match.split(","))
+
+
+def _accepted_encodings(accept_encoding: str) -> List[str]:
+    """Codificaciones aceptadas (q > 0) en minúsculas"""
+    accepted = []
+    for item in accept_encoding.lower().split(","):
+        coding, _, params = item.strip().partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding and quality > 0:
+            accepted.append(coding)
+    return accepted
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """brotli si está instalado y se acepta; si no, gzip; None sin compresión"""
+    accepted = _accepted_encodings(accept_encoding)
+    if brotli is not None and ("br" in accepted or "*" in accepted):
+        return "br"
+    if "gzip" in accepted or "*" in accepted:
+        return "gzip"
+    return None
+
+
+class CompressedBodyCache:
+    """LRU de cuerpos comprimidos por (ETag, codificación), compartido por el worker"""
+
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compress(self, etag: str, encoding: str, body: bytes) -> bytes:
+        key = (etag, encoding)
+        with self._lock:
+            compressed = self._entries.get(key)
+            if compressed is not None:
+                self._entries.move_to_end(key)
+                return compressed
+
+        if encoding == "br":
+            compressed = brotli.compress(body, quality=settings.RESPONSE_BROTLI_QUALITY)
+        else:
+            compressed = gzip.compress(body, compresslevel=settings.RESPONSE_GZIP_LEVEL)
+
+        with self._lock:
+            self._entries[key] = compressed
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return compressed
+
+
+compressed_bodies = CompressedBodyCache()
+
+
+def payload_response(request: Request, payload: Dict[str, Any]) -> Response:
+    """
+    Serializar `payload` según `Accept` y responder 304 si el cliente ya lo tiene
+
+    Returns:
+        304 con el ETag si coincide `If-None-Match`; si no, el cuerpo
+        (comprimido si compensa) con ETag y `Cache-Control: no-cache` para
+        que el navegador revalide en el siguiente sondeo.
+    """
+    media_type = preferred_media_type(request.headers.get("accept", ""))
+    # Mismo ETag que el snapshot con los mismos datos (ver payload_etag)
+    etag = payload_etag(payload)
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "no-cache",
+        "Vary": "Accept, Accept-Encoding",
+    }
+
+    if etag_matches(request.headers.get("if-none-match", ""), etag):
+        return Response(status_code=304, headers=headers)
+
+    body = serialize(payload, media_type)
+    encoding = choose_encoding(request.headers.get("accept-encoding", ""))
+    if encoding is not None and len(body) >= settings.RESPONSE_COMPRESS_MIN_SIZE:
+        # Por cuerpo exacto: el ETag no distingue JSON de MessagePack ni los metadatos
+        body = compressed_bodies.get_or_compress(content_etag(body), encoding, body)
+        headers["Content-Encoding"] = encoding
+
+    return Response(content=body, media_type=media_type, headers=headers)
+
+
+def snapshot_response(request: Request, snapshot: Snapshot) -> Response:
+    """
+    Servir un snapshot publicado tal cual, con su ETag y 304 condicional
+
+    Solo MessagePack obliga a decodificarlo; el JSON sale de los bytes
+    mapeados y su versión comprimida se memoiza por versión del snapshot.
+    """
+    media_type = preferred_media_type(request.headers.get("accept", ""))
+    if media_type != JSON_MEDIA_TYPE:
+        return payload_response(request, snapshot.payload())
+
+    headers = {
+        "ETag": snapshot.etag,
+        "Cache-Control": "no-cache",
+        "Vary": "Accept, Accept-Encoding",
+    }
+    if etag_matches(request.headers.get("if-none-match", ""), snapshot.etag):
+        return Response(status_code=304, headers=headers)
+
+    body = snapshot.body[:]
+    encoding = choose_encoding(request.headers.get("accept-encoding", ""))
+    if encoding is not None and len(body) >= settings.RESPONSE_COMPRESS_MIN_SIZE:
+        # El ETag es por contenido de noticias; la clave por versión evita mezclar cuerpos
+        body = compressed_bodies.get_or_compress(f"{snapshot.filter_type}:{snapshot.version}", encoding, body)
+        headers["Content-Encoding"] = encoding
+
+    return Response(content=body, media_type=media_type, headers=headers)
+
+
+def image_response(
+    request: Request,
+    body: bytes,
+    media_type: str,
+    content_hash: str,
+    max_age: int
+) -> Response:
+    """Imagen con ETag fuerte (hash de contenido), 304 condicional y caché del navegador"""
+    etag = f'"{content_hash[:32]}"'
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={max_age}"}
+    if etag_matches(request.headers.get("if-none-match", ""), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type=media_type, headers=headers)
@@ -10,12 +10,14 @@ load_dotenv("../.env")
 
 # Importar rutas
 from api.endpoints import router
+from api.dependencies import lifespan
 
 # Crear instancia de FastAPI
 app = FastAPI(
     title="Plataforma de Noticias IA y Marketing",
     description="API para obtener y filtrar noticias de Inteligencia Artificial y Marketing",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan  # Un único NewsAgent por worker
 )
 
 # Configurar CORS
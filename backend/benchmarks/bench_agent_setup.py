@@ -0,0 +1,79 @@
+"""
+Benchmark: coste de setup por request del NewsAgent
+
+Compara crear un NewsAgent nuevo en cada request (comportamiento anterior)
+con reutilizar la instancia compartida del worker que inyecta la dependencia
+`get_news_agent`.
+
+Uso (desde backend/):
+    python -m benchmarks.bench_agent_setup --iterations 200
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+# Claves ficticias: el benchmark no llama a ninguna API externa
+os.environ.setdefault("NEWS_API_KEY", "benchmark-key")
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+os.environ.setdefault("QUOTA_DB_PATH", os.path.join(tempfile.mkdtemp(), "quota.db"))
+
+from fastapi import FastAPI
+from starlette.requests import Request
+
+from agent.langgraph_agent import NewsAgent
+from api.dependencies import get_news_agent
+
+
+def _percentile(samples, pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _report(name: str, samples) -> None:
+    print(
+        f"{name:<28} p50={_percentile(samples, 50) * 1000:9.3f} ms  "
+        f"p95={_percentile(samples, 95) * 1000:9.3f} ms  "
+        f"mean={statistics.mean(samples) * 1000:9.3f} ms"
+    )
+
+
+def bench_fresh_agent(iterations: int):
+    """Setup por request anterior: NewsAgent() en cada llamada"""
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        NewsAgent()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def bench_shared_agent(iterations: int):
+    """Setup por request actual: resolver la dependencia del agente compartido"""
+    app = FastAPI()
+    app.state.news_agent = NewsAgent()
+    request = Request({"type": "http", "app": app})
+
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        get_news_agent(request)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de setup del NewsAgent")
+    parser.add_argument("--iterations", type=int, default=100)
+    args = parser.parse_args()
+
+    print(f"📊 Setup del agente por request ({args.iterations} iteraciones)")
+    _report("NewsAgent() por request", bench_fresh_agent(args.iterations))
+    _report("Agente compartido (Depends)", bench_shared_agent(args.iterations))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Prueba de carga: escalado con la concurrencia contra un NewsAPI falso local
+
+Lanza N ejecuciones concurrentes de `get_filtered_news` sobre un único
+agente compartido. Con el grafo async y el cliente httpx compartido, el
+tiempo total se mantiene cercano a la latencia del upstream aunque crezca
+N; con la llamada bloqueante anterior (requests.get dentro del event loop)
+las llamadas se serializan y el tiempo crece linealmente.
+
+Uso (desde backend/):
+    python -m benchmarks.bench_concurrency --latency 0.2 --concurrency 1 5 10 20
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import tempfile
+import time
+
+os.environ.setdefault("NEWS_API_KEY", "benchmark-key")
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+import requests
+
+from agent.langgraph_agent import NewsAgent
+from benchmarks.fake_newsapi import FakeNewsAPIServer
+from benchmarks.synthetic import make_articles
+from core.config import settings
+from core.quota import QuotaLedger
+
+
+async def run_async(agent: NewsAgent, concurrency: int) -> float:
+    """N ejecuciones concurrentes del grafo async"""
+    start = time.perf_counter()
+    await asyncio.gather(*[agent.get_filtered_news("ai") for _ in range(concurrency)])
+    return time.perf_counter() - start
+
+
+async def run_blocking(url: str, concurrency: int) -> float:
+    """Referencia: la llamada bloqueante anterior ejecutada dentro del event loop"""
+    async def blocking_call():
+        requests.get(url, params={"q": "ai", "pageSize": 100, "page": 1}, timeout=15)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[blocking_call() for _ in range(concurrency)])
+    return time.perf_counter() - start
+
+
+async def main_async(args):
+    with FakeNewsAPIServer(make_articles(100, duplicate_rate=0.1), latency=args.latency) as server:
+        settings.NEWS_API_URL = server.url
+        # Ledger de cuota en un directorio temporal para no tocar el real
+        agent = NewsAgent(quota_ledger=QuotaLedger(
+            os.path.join(tempfile.mkdtemp(), "quota.db"), daily_limit=1_000_000
+        ))
+
+        print(f"📊 Latencia upstream simulada: {args.latency * 1000:.0f} ms")
+        print(f"{'concurrencia':>12} {'async (s)':>10} {'bloqueante (s)':>15}")
+        for concurrency in args.concurrency:
+            async_time = await run_async(agent, concurrency)
+            blocking_time = await run_blocking(server.url, concurrency)
+            print(f"{concurrency:>12} {async_time:>10.3f} {blocking_time:>15.3f}")
+
+        await agent.aclose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Escalado con concurrencia del agente async")
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 5, 10, 20])
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
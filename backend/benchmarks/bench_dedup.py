@@ -0,0 +1,90 @@
+"""
+Benchmark: deduplicación incremental vs. comparación por pares
+
+La versión anterior comparaba cada artículo nuevo contra todos los ya
+aceptados, re-limpiando URLs y re-tokenizando títulos en cada consulta
+(O(n²)). El DedupIndex usa un conjunto de URLs canónicas y MinHash/LSH
+sobre los títulos, con el mismo umbral Jaccard de 0.85.
+
+Uso (desde backend/):
+    python -m benchmarks.bench_dedup --sizes 1000 10000 100000 --legacy-max 5000
+"""
+
+import argparse
+import re
+import time
+
+from agent.dedup import DedupIndex, canonical_url
+from benchmarks.synthetic import make_articles
+
+
+def _legacy_is_similar_title(title: str, seen_titles: set, threshold: float = 0.85) -> bool:
+    """Implementación anterior de NewsAgent._is_similar_title"""
+    title_words = set(re.findall(r"\w+", title.lower()))
+    for seen_title in seen_titles:
+        seen_words = set(re.findall(r"\w+", seen_title.lower()))
+        if title_words and seen_words:
+            intersection = len(title_words.intersection(seen_words))
+            union = len(title_words.union(seen_words))
+            if union > 0 and intersection / union >= threshold:
+                return True
+    return False
+
+
+def run_legacy(articles):
+    canonical_url.cache_clear()
+    accepted = []
+    for article in articles:
+        clean = canonical_url.__wrapped__(article["url"])
+        if any(clean and clean == canonical_url.__wrapped__(p["url"]) for p in accepted):
+            continue
+        titles = {p["title"].lower().strip() for p in accepted}
+        if _legacy_is_similar_title(article["title"].lower().strip(), titles):
+            continue
+        accepted.append(article)
+    return accepted
+
+
+def run_index(articles):
+    canonical_url.cache_clear()
+    index = DedupIndex()
+    accepted = []
+    for article in articles:
+        if index.check(article["url"], article["title"]):
+            continue
+        index.add(article["url"], article["title"])
+        accepted.append(article)
+    return accepted
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Deduplicación incremental")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--duplicate-rate", type=float, default=0.2)
+    parser.add_argument("--legacy-max", type=int, default=5000,
+                        help="Tamaño máximo para ejecutar la versión O(n²)")
+    args = parser.parse_args()
+
+    print(f"{'títulos':>8} {'únicos':>8} {'índice (s)':>11} {'µs/título':>10} {'pares (s)':>10} {'iguales':>8}")
+    for size in args.sizes:
+        articles = make_articles(size, duplicate_rate=args.duplicate_rate)
+
+        start = time.perf_counter()
+        accepted = run_index(articles)
+        index_time = time.perf_counter() - start
+
+        legacy_time, same = "-", "-"
+        if size <= args.legacy_max:
+            start = time.perf_counter()
+            legacy_accepted = run_legacy(articles)
+            legacy_time = f"{time.perf_counter() - start:.3f}"
+            same = "sí" if legacy_accepted == accepted else "NO"
+
+        print(
+            f"{size:>8} {len(accepted):>8} {index_time:>11.3f} "
+            f"{index_time / size * 1e6:>10.1f} {legacy_time:>10} {same:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
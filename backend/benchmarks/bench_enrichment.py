@@ -0,0 +1,83 @@
+"""
+Benchmark: enriquecimiento LLM por lotes, concurrencia y caché en disco
+
+Usa el LLM falso determinista (latencia fija por llamada + coste por
+artículo) para medir sin red ni coste:
+- rendimiento (artículos/s) según el tamaño de lote y la concurrencia;
+- tasa de hit de la caché en una segunda pasada y con contenido repetido.
+
+Uso (desde backend/):
+    python -m benchmarks.bench_enrichment --articles 200 --latency 0.4
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import tempfile
+import time
+
+from agent.enrichment import ArticleEnricher, FakeEnrichmentLLM
+from agent.keywords import KeywordMatcher
+from agent.langgraph_agent import NewsAgent
+from benchmarks.synthetic import make_articles
+from core.llm_cache import LLMResultCache
+
+
+def _matcher() -> KeywordMatcher:
+    return KeywordMatcher({"ai": NewsAgent.AI_KEYWORDS, "marketing": NewsAgent.MARKETING_KEYWORDS})
+
+
+async def bench_throughput(articles, batch_size: int, concurrency: int, args):
+    llm = FakeEnrichmentLLM(_matcher(), latency=args.latency, per_article_latency=args.per_article_latency)
+    enricher = ArticleEnricher(
+        llm,
+        LLMResultCache(os.path.join(tempfile.mkdtemp(), "llm_cache.db")),
+        batch_size=batch_size,
+        max_concurrency=concurrency
+    )
+
+    start = time.perf_counter()
+    await enricher.enrich(articles)
+    cold = time.perf_counter() - start
+
+    start = time.perf_counter()
+    await enricher.enrich(articles)
+    warm = time.perf_counter() - start
+
+    stats = enricher.get_stats()
+    print(
+        f"{batch_size:>6} {concurrency:>6} {llm.calls:>8} {llm.max_in_flight:>9} "
+        f"{cold:>9.2f} {len(articles) / cold:>10.1f} {warm * 1000:>10.1f} {stats['hit_ratio']:>9.0%}"
+    )
+    enricher.close()
+
+
+async def main_async(args):
+    articles = make_articles(args.articles, duplicate_rate=args.duplicate_rate)
+
+    print(f"📊 {args.articles} artículos, latencia LLM {args.latency * 1000:.0f} ms/llamada "
+          f"+ {args.per_article_latency * 1000:.0f} ms/artículo")
+    print(f"{'lote':>6} {'conc.':>6} {'llamadas':>8} {'en vuelo':>9} {'frío (s)':>9} "
+          f"{'art./s':>10} {'caliente':>10} {'hit total':>9}")
+    for batch_size in args.batch_sizes:
+        for concurrency in args.concurrency:
+            await bench_throughput(articles, batch_size, concurrency, args)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Enriquecimiento LLM por lotes con caché")
+    parser.add_argument("--articles", type=int, default=200)
+    parser.add_argument("--duplicate-rate", type=float, default=0.1)
+    parser.add_argument("--latency", type=float, default=0.4)
+    parser.add_argument("--per-article-latency", type=float, default=0.02)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 10, 25])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4])
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Benchmark: proxy de miniaturas con caché en disco
+
+Contra el servidor de imágenes falso (sin red real):
+- prefetch de N imágenes con concurrencia acotada (descargas en vuelo máximas);
+- latencia de una miniatura en frío (descarga + redimensionado) y en caliente (disco);
+- expulsión LRU: bytes en disco frente al límite configurado;
+- end-to-end: las noticias del agente apuntan a /api/image/{hash} y sus
+  miniaturas quedan precalentadas tras la ejecución.
+
+Uso (desde backend/):
+    python -m benchmarks.bench_images --images 100 --latency 0.1 --concurrency 8
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import tempfile
+import time
+
+os.environ.setdefault("NEWS_API_KEY", "benchmark-key")
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+from agent.langgraph_agent import NewsAgent
+from benchmarks.fake_images import FakeImageServer
+from benchmarks.fake_newsapi import FakeNewsAPIServer
+from benchmarks.synthetic import make_articles
+from core.config import settings
+from core.image_cache import Image, ImageCache, ImageProxy, image_key
+from core.quota import QuotaLedger
+
+
+def _proxy(args, max_bytes: int) -> ImageProxy:
+    return ImageProxy(
+        ImageCache(tempfile.mkdtemp(), max_bytes=max_bytes),
+        max_concurrency=args.concurrency,
+        width=settings.IMAGE_WIDTH,
+        height=settings.IMAGE_HEIGHT,
+        # El servidor de imágenes falso escucha en 127.0.0.1
+        allow_private_hosts=True
+    )
+
+
+async def bench_prefetch(server: FakeImageServer, args) -> int:
+    proxy = _proxy(args, max_bytes=1 << 40)
+    urls = [server.image_url(f"photo-{i}") for i in range(args.images)]
+    keys = await proxy.register(urls)
+
+    start = time.perf_counter()
+    fetched = await proxy.prefetch(keys)
+    elapsed = time.perf_counter() - start
+    print(f"📥 Prefetch: {fetched}/{len(keys)} miniaturas en {elapsed:.2f} s "
+          f"(máx. {server.max_in_flight} descargas en vuelo, límite {args.concurrency})")
+
+    warm = []
+    for key in keys:
+        start = time.perf_counter()
+        await proxy.get(key)
+        warm.append(time.perf_counter() - start)
+    print(f"⚡ En caliente: media {statistics.mean(warm) * 1000:.2f} ms por miniatura")
+
+    cold_key = (await proxy.register([server.image_url("cold-photo")]))[0]
+    start = time.perf_counter()
+    await proxy.get(cold_key)
+    print(f"🧊 En frío: {(time.perf_counter() - start) * 1000:.1f} ms (latencia del origen {args.latency * 1000:.0f} ms)")
+
+    broken = await proxy.register([server.image_url("missing-1"), server.image_url("html-1")])
+    results = [await proxy.get(key) for key in broken]
+    print(f"🚫 404 / tipo no válido: {sum(r is None for r in results)}/2 servidos como placeholder")
+
+    total = await asyncio.to_thread(proxy.cache.total_bytes)
+    print(f"💾 Disco: {len(proxy.cache)} miniaturas, {total / 1024:.0f} KB")
+    await proxy.aclose()
+    return total // max(fetched, 1)
+
+
+async def bench_eviction(server: FakeImageServer, args, average_size: int) -> None:
+    max_bytes = average_size * args.images // 4
+    proxy = _proxy(args, max_bytes=max_bytes)
+    keys = await proxy.register(server.image_url(f"evict-{i}") for i in range(args.images))
+    await proxy.prefetch(keys)
+    total = await asyncio.to_thread(proxy.cache.total_bytes)
+    print(f"🧹 LRU: límite {max_bytes / 1024:.0f} KB -> {total / 1024:.0f} KB en disco, "
+          f"{len(proxy.cache)}/{len(keys)} miniaturas conservadas")
+    await proxy.aclose()
+
+
+async def bench_end_to_end(server: FakeImageServer, args) -> None:
+    articles = make_articles(300)
+    for index, article in enumerate(articles):
+        article["urlToImage"] = server.image_url(f"article-{index}")
+
+    with FakeNewsAPIServer(articles) as newsapi:
+        settings.NEWS_API_URL = newsapi.url
+        proxy = _proxy(args, max_bytes=1 << 40)
+        agent = NewsAgent(
+            image_proxy=proxy,
+            quota_ledger=QuotaLedger(os.path.join(tempfile.mkdtemp(), "quota.db"), daily_limit=1000)
+        )
+        news = await agent.get_filtered_news("both")
+        await asyncio.gather(*proxy._background)
+
+        proxied = [a for a in news if "/api/image/" in a["image"]]
+        cached = sum(
+            proxy.cache.get(a["image"].rsplit("/", 1)[1]) is not None for a in proxied
+        )
+        print(f"🔗 End-to-end: {len(proxied)}/{len(news)} imágenes vía proxy, {cached} precalentadas")
+        expected = image_key(articles[0]["urlToImage"])
+        assert all(len(a["image"].rsplit("/", 1)[1]) == len(expected) for a in proxied)
+        await agent.aclose()
+        await proxy.aclose()
+
+
+async def main_async(args):
+    print(f"🖼️  Redimensionado: {'Pillow' if Image is not None else 'no (Pillow no instalado)'} "
+          f"-> {settings.IMAGE_WIDTH}x{settings.IMAGE_HEIGHT}")
+    with FakeImageServer(latency=args.latency) as server:
+        average_size = await bench_prefetch(server, args)
+        await bench_eviction(server, args, average_size)
+        await bench_end_to_end(server, args)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Proxy de miniaturas con caché en disco")
+    parser.add_argument("--images", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.1, help="Latencia del servidor de imágenes (s)")
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
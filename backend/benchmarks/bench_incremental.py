@@ -0,0 +1,104 @@
+"""
+Benchmark: refrescos con fetch incremental (marca de agua de publishedAt)
+
+Contra el NewsAPI falso (respeta `from`), la carga union (agente y
+publicación en el almacén de artículos, como en la app) se refresca varias
+veces; antes de cada refresco llegan `--new` artículos nuevos y al final
+hay `--quiet` refrescos sin novedades:
+- completo: cada refresco descarga, clasifica y publica la ventana entera;
+- incremental: solo los artículos desde la marca de agua; los nuevos se
+  rankean y se fusionan con el conjunto anterior, y un refresco sin
+  novedades no vuelve a rankear, guardar ni publicar.
+
+Por refresco se mide el tiempo de CPU del proceso (incluye el NewsAPI
+falso, que corre en un hilo), los artículos recibidos del upstream y el
+tamaño del conjunto de resultados acumulado.
+
+Uso (desde backend/):
+    python -m benchmarks.bench_incremental --articles 300 --new 20 --refreshes 5 --quiet 3
+"""
+
+import argparse
+import asyncio
+import gc
+import logging
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault("NEWS_API_KEY", "benchmark-key")
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+from agent.langgraph_agent import NewsAgent
+from api.news_service import load_all_news
+from benchmarks.fake_newsapi import FakeNewsAPIServer
+from benchmarks.synthetic import make_articles
+from core.article_store import ArticleStore
+from core.config import settings
+from core.incremental_store import IncrementalStore
+from core.quota import QuotaLedger
+
+
+async def refreshes(incremental: bool, args) -> None:
+    initial = make_articles(args.articles, duplicate_rate=0.1)
+    newest = datetime.strptime(initial[0]["publishedAt"], "%Y-%m-%dT%H:%M:%SZ")
+
+    with FakeNewsAPIServer(initial) as server:
+        settings.NEWS_API_URL = server.url
+        store = IncrementalStore(tempfile.mkdtemp()) if incremental else None
+        agent = NewsAgent(
+            fetch_mode="union",
+            incremental_store=store,
+            quota_ledger=QuotaLedger(os.path.join(tempfile.mkdtemp(), "quota.db"), daily_limit=10_000)
+        )
+
+        article_store = ArticleStore(tempfile.mkdtemp())
+
+        label = "incremental" if incremental else "completo"
+        print(f"\n{label}")
+        print(f"{'refresco':>8} {'nuevos':>7} {'recibidos':>10} {'CPU (ms)':>9} {'conjunto ai/mkt/both':>22} {'top-12 nuevos':>14}")
+        served = set()
+        for refresh in range(args.refreshes + args.quiet):
+            arrived = args.new if 0 < refresh < args.refreshes else 0
+            if arrived:
+                newest += timedelta(minutes=args.new)
+                server.publish(make_articles(
+                    args.new, seed=refresh, start_index=100_000 * refresh, newest=newest
+                ))
+
+            returned = server.returned
+            # Una recolección completa dentro de la muestra falsearía el refresco medido
+            gc.collect()
+            cpu = time.process_time()
+            news = await load_all_news(agent, last_good=article_store)
+            cpu = time.process_time() - cpu
+
+            if store is not None:
+                kept = store.load(agent._get_union_query())["results"]
+                sizes = "/".join(str(len(kept.get(f, []))) for f in agent.FILTERS)
+            else:
+                sizes = "/".join(str(len(news[f]["news"])) for f in agent.FILTERS)
+            urls = {a["url"] for a in news["both"]["news"]}
+            changed = len(urls - served) if served else len(urls)
+            served = urls
+            print(f"{refresh:>8} {arrived:>7} {server.returned - returned:>10} {cpu * 1000:>9.1f} {sizes:>22} {changed:>14}")
+
+        await agent.aclose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fetch completo frente a incremental")
+    parser.add_argument("--articles", type=int, default=300, help="Artículos iniciales en el upstream")
+    parser.add_argument("--new", type=int, default=20, help="Artículos nuevos antes de cada refresco")
+    parser.add_argument("--refreshes", type=int, default=5, help="Refrescos con artículos nuevos (el primero es el inicial)")
+    parser.add_argument("--quiet", type=int, default=3, help="Refrescos finales sin artículos nuevos")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    for incremental in (False, True):
+        asyncio.run(refreshes(incremental, args))
+
+
+if __name__ == "__main__":
+    main()
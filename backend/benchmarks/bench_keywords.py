@@ -0,0 +1,76 @@
+"""
+Benchmark: throughput del clasificador de keywords
+
+Compara el escaneo anterior (`any(keyword in content ...)` por keyword)
+con el KeywordMatcher compilado, con el vocabulario por defecto (~60
+términos) y con vocabularios sintéticos de miles de términos.
+
+Uso (desde backend/):
+    python -m benchmarks.bench_keywords --articles 5000 --vocab 60 1000 5000
+"""
+
+import argparse
+import logging
+import time
+
+from agent.keywords import KeywordMatcher
+from agent.langgraph_agent import NewsAgent
+from benchmarks.synthetic import make_articles
+
+
+def _vocabulary(size: int):
+    """Vocabulario por defecto ampliado con términos sintéticos hasta `size`"""
+    ai = list(NewsAgent.AI_KEYWORDS)
+    marketing = list(NewsAgent.MARKETING_KEYWORDS)
+    extra = max(size - len(ai) - len(marketing), 0)
+    ai += [f"aiterm{i} model{i}" for i in range(extra // 2)]
+    marketing += [f"mktterm{i}" for i in range(extra - extra // 2)]
+    return ai, marketing
+
+
+def bench_legacy(texts, ai, marketing) -> float:
+    start = time.perf_counter()
+    for content in texts:
+        any(keyword in content for keyword in ai)
+        any(keyword in content for keyword in marketing)
+    return time.perf_counter() - start
+
+
+def bench_matcher(texts, matcher: KeywordMatcher) -> float:
+    start = time.perf_counter()
+    for content in texts:
+        matcher.match(content)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput del clasificador de keywords")
+    parser.add_argument("--articles", type=int, default=5000)
+    parser.add_argument("--vocab", type=int, nargs="+", default=[60, 1000, 5000])
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    texts = [
+        f"{article['title']} {article['description']}".lower()
+        for article in make_articles(args.articles, relevant_rate=0.5)
+    ]
+
+    print(f"📊 Clasificación de {args.articles} artículos (artículos/segundo)")
+    print(f"{'keywords':>9} {'substring':>12} {'matcher':>12} {'build (ms)':>11}")
+    for size in args.vocab:
+        ai, marketing = _vocabulary(size)
+
+        build_start = time.perf_counter()
+        matcher = KeywordMatcher({"ai": ai, "marketing": marketing})
+        build_ms = (time.perf_counter() - build_start) * 1000
+
+        legacy = bench_legacy(texts, ai, marketing)
+        compiled = bench_matcher(texts, matcher)
+        print(
+            f"{len(ai) + len(marketing):>9} {len(texts) / legacy:>12,.0f} "
+            f"{len(texts) / compiled:>12,.0f} {build_ms:>11.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
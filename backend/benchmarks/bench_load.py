@@ -0,0 +1,232 @@
+"""
+Prueba de carga de extremo a extremo de /api/get-news
+
+Arranca en subprocesos el NewsAPI falso (latencia y errores configurables)
+y la app con `python main.py`, y lanza /api/get-news en bucle abierto a un
+ritmo objetivo con una mezcla de filtros: cada request sale a su hora
+aunque las anteriores no hayan terminado, y su latencia se cuenta desde esa
+hora, así que las colas (del servidor o del propio generador) se ven en
+los percentiles en vez de rebajar el ritmo. Sin gastar cuota real.
+
+El mismo escenario se repite en cada modo de servicio (NEWS_SERVING_MODE):
+- live: sin caché, cada request ejecuta el agente;
+- cache: caché TTL + snapshots compartidos entre workers;
+- prefetch: el prefetch en segundo plano llena el almacén y las requests
+  nunca llaman a NewsAPI.
+
+Por modo: p50/p95/p99 de latencia, throughput, tasa de error, respuestas
+stale y llamadas al upstream por request (tras un calentamiento que no
+se mide).
+
+Uso (desde backend/):
+    python -m benchmarks.bench_load --rps 50 --duration 30 --mix ai=2,marketing=1,both=1
+    python -m benchmarks.bench_load --modes cache prefetch --latency 0.5 --error-rate 0.1 --output load.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+from benchmarks.bench_startup import BACKEND_DIR, _env, _free_port, _wait_until
+
+MODES = ("live", "cache", "prefetch")
+
+
+def _parse_mix(text: str) -> List[Tuple[str, float]]:
+    """"ai=2,marketing=1,both=1" -> [("ai", 2.0), ("marketing", 1.0), ("both", 1.0)]"""
+    mix = []
+    for item in text.split(","):
+        name, _, weight = item.partition("=")
+        mix.append((name.strip(), float(weight or 1)))
+    return mix
+
+
+def start_upstream(args) -> Tuple[subprocess.Popen, str]:
+    """NewsAPI falso en su propio proceso (no compite por el GIL con el generador)"""
+    port = _free_port()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.fake_newsapi", "--port", str(port),
+         "--articles", str(args.articles), "--latency", str(args.latency),
+         "--error-rate", str(args.error_rate), "--error-status", str(args.error_status)],
+        cwd=BACKEND_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    base = f"http://127.0.0.1:{port}"
+    _wait_until(f"{base}/stats", lambda r: True, time.perf_counter() + args.startup_timeout)
+    return proc, base
+
+
+def upstream_calls(upstream: str) -> int:
+    return httpx.get(f"{upstream}/stats").json()["calls"]
+
+
+def start_app(mode: str, upstream: str, args) -> Tuple[subprocess.Popen, str]:
+    """`python main.py` en el modo de servicio pedido, con datos en un directorio temporal"""
+    port = _free_port()
+    env = _env(fast_start=False)
+    env.update(
+        HOST="127.0.0.1",
+        PORT=str(port),
+        DEBUG="false",
+        WEB_CONCURRENCY=str(args.workers),
+        NEWS_API_URL=f"{upstream}/v2/everything",
+        NEWS_SERVING_MODE=mode,
+        NEWS_CACHE_TTL=str(args.ttl),
+        # La cuota del NewsAPI falso es ilimitada: que el ledger no la corte
+        NEWS_DAILY_LIMIT=str(10 ** 9),
+    )
+    proc = subprocess.Popen(
+        [sys.executable, "main.py"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    base = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.perf_counter() + args.startup_timeout
+        _wait_until(f"{base}/health", lambda r: True, deadline)
+        if mode == "prefetch":
+            # El almacén empieza frío: esperar a que el prefetch publique todos los filtros
+            for filter_type, _ in _parse_mix(args.mix):
+                _wait_until(
+                    f"{base}/api/get-news?filter_type={filter_type}",
+                    lambda r: r.json().get("count", 0) > 0, deadline
+                )
+    except Exception:
+        stop(proc)
+        raise
+    return proc, base
+
+
+def stop(proc: subprocess.Popen) -> None:
+    proc.terminate()
+    try:
+        proc.wait(timeout=15)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+
+
+async def drive(base: str, args, duration: float) -> List[Dict]:
+    """Lanzar requests a `args.rps` durante `duration` segundos (bucle abierto)"""
+    filters, weights = zip(*_parse_mix(args.mix))
+    rng = random.Random(args.seed)
+    limits = httpx.Limits(max_connections=args.max_in_flight, max_keepalive_connections=args.max_in_flight)
+
+    async with httpx.AsyncClient(base_url=base, timeout=args.timeout, limits=limits) as client:
+        async def one(filter_type: str, scheduled: float) -> Dict:
+            sample = {"filter": filter_type, "status": None, "stale": False, "error": ""}
+            try:
+                response = await client.get("/api/get-news", params={"filter_type": filter_type})
+                sample["status"] = response.status_code
+                if response.status_code == 200:
+                    sample["stale"] = bool(response.json().get("stale"))
+            except httpx.HTTPError as e:
+                sample["error"] = type(e).__name__
+            sample["end"] = time.perf_counter()
+            sample["latency"] = sample["end"] - scheduled
+            return sample
+
+        start = time.perf_counter()
+        tasks = []
+        for i in range(int(duration * args.rps)):
+            scheduled = start + i / args.rps
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(one(rng.choices(filters, weights)[0], scheduled)))
+        samples = await asyncio.gather(*tasks)
+
+    for sample in samples:
+        sample["elapsed"] = sample["end"] - start
+    return samples
+
+
+def summarize(mode: str, samples: List[Dict], calls: int) -> Dict:
+    ok = [s for s in samples if s["status"] == 200]
+    latencies = sorted(s["latency"] * 1000 for s in ok)
+    elapsed = max((s["elapsed"] for s in samples), default=0.0)
+    percentiles = statistics.quantiles(latencies, n=100, method="inclusive") if len(latencies) > 1 else latencies * 99
+    return {
+        "mode": mode,
+        "requests": len(samples),
+        "ok": len(ok),
+        "throughput_rps": round(len(ok) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentiles[49], 1) if percentiles else None,
+        "p95_ms": round(percentiles[94], 1) if percentiles else None,
+        "p99_ms": round(percentiles[98], 1) if percentiles else None,
+        "max_ms": round(latencies[-1], 1) if latencies else None,
+        "error_rate": round(1 - len(ok) / len(samples), 4) if samples else 0.0,
+        "errors": {
+            key: sum(1 for s in samples if (s["error"] or s["status"]) == key)
+            for key in {s["error"] or s["status"] for s in samples if s["status"] != 200}
+        },
+        "stale": sum(s["stale"] for s in ok),
+        "upstream_calls": calls,
+        "upstream_per_request": round(calls / len(samples), 3) if samples else 0.0,
+    }
+
+
+def run_mode(mode: str, upstream: str, args) -> Dict:
+    proc, base = start_app(mode, upstream, args)
+    try:
+        if args.warmup:
+            asyncio.run(drive(base, args, args.warmup))
+        calls = upstream_calls(upstream)
+        samples = asyncio.run(drive(base, args, args.duration))
+        calls = upstream_calls(upstream) - calls
+    finally:
+        stop(proc)
+    return summarize(mode, samples, calls)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Prueba de carga de /api/get-news por modo de servicio")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--rps", type=float, default=50, help="Requests por segundo objetivo")
+    parser.add_argument("--duration", type=float, default=20, help="Segundos medidos por modo")
+    parser.add_argument("--warmup", type=float, default=3, help="Segundos de carga previa sin medir")
+    parser.add_argument("--mix", default="ai=1,marketing=1,both=1", help="Pesos de cada filtro")
+    parser.add_argument("--workers", type=int, default=1, help="Workers de uvicorn (WEB_CONCURRENCY)")
+    parser.add_argument("--ttl", type=float, default=300, help="NEWS_CACHE_TTL de la app")
+    parser.add_argument("--articles", type=int, default=300, help="Artículos del NewsAPI falso")
+    parser.add_argument("--latency", type=float, default=0.2, help="Latencia del NewsAPI falso (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fracción de errores del NewsAPI falso")
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--timeout", type=float, default=10, help="Timeout por request (s)")
+    parser.add_argument("--max-in-flight", type=int, default=200, help="Conexiones abiertas como mucho")
+    parser.add_argument("--startup-timeout", type=float, default=60)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", default="", help="Guardar el informe en JSON")
+    args = parser.parse_args(argv)
+
+    upstream_proc, upstream = start_upstream(args)
+    report = {"scenario": {k: v for k, v in vars(args).items() if k not in ("modes", "output")}, "modes": {}}
+    try:
+        print(f"🚦 {args.rps:g} req/s durante {args.duration:g} s | mezcla {args.mix} | "
+              f"NewsAPI falso {args.latency * 1000:.0f} ms, {args.error_rate:.0%} errores | {args.workers} worker(s)")
+        print(f"{'modo':<9} {'requests':>8} {'ok/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+              f"{'errores':>8} {'stale':>6} {'upstream/req':>13}")
+        for mode in args.modes:
+            r = run_mode(mode, upstream, args)
+            report["modes"][mode] = r
+            print(f"{mode:<9} {r['requests']:>8} {r['throughput_rps']:>7.1f} {r['p50_ms'] or 0:>8.1f} "
+                  f"{r['p95_ms'] or 0:>8.1f} {r['p99_ms'] or 0:>8.1f} {r['error_rate']:>8.1%} "
+                  f"{r['stale']:>6} {r['upstream_per_request']:>13.3f}")
+    finally:
+        stop(upstream_proc)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Informe guardado en {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Benchmark: latencia de /get-news durante una caída de NewsAPI
+
+Contra el NewsAPI falso (sin red real), carga todos los filtros con
+`load_all_news` guardando el último resultado bueno en un ArticleStore y:
+- sano: latencia de referencia y resultado guardado;
+- caída 503 lenta: las primeras cargas pagan timeout + reintentos hasta
+  que el circuito se abre; después se sirve el resultado stale al momento;
+- 429 con Retry-After: se reintenta esperando lo indicado y el circuito
+  se abre a la primera (sin esperar a NEWS_BREAKER_THRESHOLD fallos);
+- recuperación: pasado el enfriamiento, la llamada de prueba cierra el circuito.
+
+Uso (desde backend/):
+    python -m benchmarks.bench_outage --loads 10 --outage-latency 0.5
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import tempfile
+import time
+from typing import List
+
+os.environ.setdefault("NEWS_API_KEY", "benchmark-key")
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+from agent.langgraph_agent import NewsAgent
+from api.news_service import load_all_news
+from benchmarks.fake_newsapi import FakeNewsAPIServer
+from benchmarks.synthetic import make_articles
+from core.article_store import ArticleStore
+from core.config import settings
+from core.quota import QuotaLedger
+
+
+async def _loads(agent: NewsAgent, store: ArticleStore, count: int) -> List[dict]:
+    samples = []
+    for _ in range(count):
+        was_open = agent.breaker.is_open()
+        start = time.perf_counter()
+        results = await load_all_news(agent, last_good=store)
+        samples.append({
+            "ms": (time.perf_counter() - start) * 1000,
+            "stale": all(r.get("stale") for r in results.values()),
+            "sample": any(r["used_sample"] for r in results.values()),
+            "circuit": agent.breaker.status()["state"],
+            "short_circuit": was_open
+        })
+    return samples
+
+
+def _report(label: str, samples: List[dict]) -> None:
+    latencies = ", ".join(f"{s['ms']:.0f}" for s in samples)
+    stale = sum(s["stale"] for s in samples)
+    sample = sum(s["sample"] for s in samples)
+    print(f"{label}: [{latencies}] ms | stale {stale}/{len(samples)} | ejemplo {sample} "
+          f"| circuito {samples[-1]['circuit']}")
+
+
+async def main_async(args):
+    settings.NEWS_BREAKER_RECOVERY = args.recovery
+    with FakeNewsAPIServer(make_articles(300), latency=args.latency) as server:
+        settings.NEWS_API_URL = server.url
+        agent = NewsAgent(
+            quota_ledger=QuotaLedger(os.path.join(tempfile.mkdtemp(), "quota.db"), daily_limit=10_000)
+        )
+        store = ArticleStore(tempfile.mkdtemp())
+
+        healthy = await _loads(agent, store, args.loads)
+        _report("🟢 Sano", healthy)
+
+        server.outage(503, latency=args.outage_latency)
+        calls = server.calls
+        outage = await _loads(agent, store, args.loads)
+        _report("🔴 Caída 503", outage)
+        print(f"   requests al upstream durante la caída: {server.calls - calls}")
+        flat = [s["ms"] for s in outage if s["short_circuit"]]
+        if flat:
+            print(f"   con el circuito abierto: media {statistics.mean(flat):.1f} ms "
+                  f"(sano {statistics.mean(s['ms'] for s in healthy):.1f} ms)")
+
+        await asyncio.sleep(args.recovery)
+        server.outage(429, retry_after=1)
+        calls = server.calls
+        rate_limited = await _loads(agent, store, args.loads)
+        _report("⏰ 429 Retry-After", rate_limited)
+        print(f"   requests al upstream: {server.calls - calls}")
+
+        server.recover()
+        await asyncio.sleep(args.recovery)
+        recovered = await _loads(agent, store, 2)
+        _report("🟡 Recuperado", recovered)
+        await agent.aclose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latencia con NewsAPI caído (circuit breaker + stale)")
+    parser.add_argument("--loads", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.05, help="Latencia sana de NewsAPI (s)")
+    parser.add_argument("--outage-latency", type=float, default=0.5, help="Latencia de las respuestas de error (s)")
+    parser.add_argument("--recovery", type=float, default=2.0, help="Enfriamiento del circuito (s)")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
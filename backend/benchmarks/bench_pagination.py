@@ -0,0 +1,104 @@
+"""
+Benchmark: paginación por cursor de /api/get-news (scroll infinito)
+
+Con el NewsAPI falso y la app en subprocesos (como bench_load), en cada
+modo de servicio se pide la primera página (`limit`) y se recorre el
+conjunto ordenado siguiendo `next_cursor` hasta el final, varias veces:
+- latencia por profundidad de página (p50 de las pasadas): debe ser plana,
+  cada página es un slice del conjunto publicado;
+- llamadas al upstream durante las páginas con cursor: deben ser 0;
+- que el recorrido no repite ni salta artículos.
+
+Uso (desde backend/):
+    python -m benchmarks.bench_pagination --limit 12 --passes 20
+    python -m benchmarks.bench_pagination --modes live --articles 1000
+"""
+
+import argparse
+import statistics
+import time
+from typing import Dict, List, Optional
+
+import httpx
+
+from benchmarks.bench_load import MODES, start_app, start_upstream, stop, upstream_calls
+
+
+def walk(client: httpx.Client, filter_type: str, limit: int) -> Dict:
+    """Primera página y todas las siguientes por cursor, con la latencia de cada una"""
+    latencies: List[float] = []
+    urls: List[str] = []
+    params = {"filter_type": filter_type, "limit": limit}
+    calls_after_first = None
+    while True:
+        start = time.perf_counter()
+        response = client.get("/api/get-news", params=params)
+        latencies.append((time.perf_counter() - start) * 1000)
+        response.raise_for_status()
+        page = response.json()
+        urls.extend(article["url"] for article in page["news"])
+        if calls_after_first is None:
+            calls_after_first = upstream_calls(client.upstream)
+        if not page["next_cursor"]:
+            break
+        params = {"filter_type": filter_type, "limit": limit, "cursor": page["next_cursor"]}
+    return {
+        "latencies": latencies,
+        "total": page["total"],
+        "served": len(urls),
+        "unique": len(set(urls)),
+        "upstream_calls": upstream_calls(client.upstream) - calls_after_first
+    }
+
+
+def run_mode(mode: str, upstream: str, args) -> None:
+    proc, base = start_app(mode, upstream, args)
+    try:
+        with httpx.Client(base_url=base, timeout=args.timeout) as client:
+            client.upstream = upstream
+            walks = [walk(client, args.filter, args.limit) for _ in range(args.passes)]
+    finally:
+        stop(proc)
+
+    pages = min(len(w["latencies"]) for w in walks)
+    by_depth = [statistics.median(w["latencies"][depth] for w in walks) for depth in range(pages)]
+    last = walks[-1]
+    print(f"\n{mode}: {last['total']} artículos en {pages} páginas de {args.limit} | "
+          f"servidos {last['served']} ({last['unique']} distintos) | "
+          f"upstream en páginas con cursor: {sum(w['upstream_calls'] for w in walks)}")
+    print(f"  primera página p50 {by_depth[0]:.1f} ms")
+    if pages > 1:
+        cursor_pages = by_depth[1:]
+        print(f"  con cursor: p50 {statistics.median(cursor_pages):.1f} ms | "
+              f"página 2 {cursor_pages[0]:.1f} ms | última {cursor_pages[-1]:.1f} ms")
+        step = max(len(cursor_pages) // 8, 1)
+        print("  profundidad: " + "  ".join(
+            f"{depth + 2}:{latency:.1f}" for depth, latency in list(enumerate(cursor_pages))[::step]
+        ))
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Paginación por cursor de /api/get-news")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--filter", default="ai", choices=["ai", "marketing", "both"])
+    parser.add_argument("--limit", type=int, default=12, help="Artículos por página")
+    parser.add_argument("--passes", type=int, default=10, help="Recorridos completos por modo")
+    parser.add_argument("--articles", type=int, default=500, help="Artículos del NewsAPI falso")
+    parser.add_argument("--latency", type=float, default=0.2, help="Latencia del NewsAPI falso (s)")
+    parser.add_argument("--timeout", type=float, default=30, help="Timeout por request (s)")
+    parser.add_argument("--startup-timeout", type=float, default=60)
+    args = parser.parse_args(argv)
+    # Parámetros que espera el arranque de bench_load
+    args.workers, args.ttl, args.mix = 1, 300, args.filter
+    args.error_rate, args.error_status = 0.0, 503
+
+    upstream_proc, upstream = start_upstream(args)
+    try:
+        for mode in args.modes:
+            run_mode(mode, upstream, args)
+    finally:
+        stop(upstream_proc)
+
+
+if __name__ == "__main__":
+    main()
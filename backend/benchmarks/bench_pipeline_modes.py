@@ -0,0 +1,96 @@
+"""
+Benchmark: pipeline por lotes vs. bucle por artículo
+
+Ejecuta el mismo lote de artículos sintéticos con ambos modos del grafo,
+comprueba que la salida es idéntica y mide el tiempo de cada uno, con la
+configuración por defecto (ranking incluido) y en orden de llegada
+(NEWS_RANKING=False). Para que el modo por artículo recorra el lote entero
+sin ranking se amplían el límite de escaneo y el objetivo de resultados al
+tamaño del lote.
+
+Uso (desde backend/):
+    python -m benchmarks.bench_pipeline_modes --sizes 100 1000 10000
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import tempfile
+import time
+
+os.environ.setdefault("NEWS_API_KEY", "benchmark-key")
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+import httpx
+
+from agent.langgraph_agent import NewsAgent
+from benchmarks.synthetic import make_articles
+from core.quota import QuotaLedger
+
+
+def _mock_client(articles) -> httpx.AsyncClient:
+    """Cliente httpx que responde con el lote completo sin tocar la red"""
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json={"status": "ok", "articles": articles})
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+def _make_agent(mode: str, articles, size: int, ranking: bool) -> NewsAgent:
+    agent = NewsAgent(
+        http_client=_mock_client(articles),
+        pipeline_mode=mode,
+        quota_ledger=QuotaLedger(os.path.join(tempfile.mkdtemp(), "quota.db"))
+    )
+    agent.scan_limit = size
+    agent.min_results = size
+    agent.max_results = size
+    # El modo por artículo solo usa la primera página: comparar sobre el mismo lote
+    agent.max_pages = 1
+    if not ranking:
+        agent.ranking_weights = None
+    return agent
+
+
+async def bench_size(size: int, relevant_rate: float, duplicate_rate: float, ranking: bool):
+    articles = make_articles(size, duplicate_rate=duplicate_rate, relevant_rate=relevant_rate)
+    results = {}
+
+    for mode in NewsAgent.PIPELINE_MODES:
+        agent = _make_agent(mode, articles, size, ranking)
+        start = time.perf_counter()
+        news = await agent.get_filtered_news("both")
+        results[mode] = (time.perf_counter() - start, news)
+        await agent.aclose()
+
+    batch_time, batch_news = results["batch"]
+    article_time, article_news = results["article"]
+    identical = "sí" if batch_news == article_news else "NO"
+    print(
+        f"{'sí' if ranking else 'no':>8} {size:>8} {len(batch_news):>10} {article_time:>13.3f} {batch_time:>11.3f} "
+        f"{article_time / batch_time:>8.1f}x {identical:>10}"
+    )
+
+
+async def main_async(args):
+    print(f"{'ranking':>8} {'artículos':>8} {'resultados':>10} {'article (s)':>13} {'batch (s)':>11} "
+          f"{'speedup':>9} {'idénticos':>10}")
+    for ranking in (True, False):
+        for size in args.sizes:
+            await bench_size(size, args.relevant_rate, args.duplicate_rate, ranking)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch vs. bucle por artículo")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--relevant-rate", type=float, default=0.05)
+    parser.add_argument("--duplicate-rate", type=float, default=0.1)
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Benchmark: ranking de relevancia con top-k por heap sobre lotes grandes
+
+1. Micro: lotes sintéticos de N artículos ya clasificados (keywords del
+   KeywordMatcher real, fuentes y publishedAt de `make_articles`):
+   - heap: una pasada de puntuación + heapify + k extracciones con la
+     penalización de fuente perezosa (agent.ranking);
+   - sort: ordenar todo el lote por puntuación (sin diversidad);
+   - greedy: k recorridos lineales del lote (misma selección que el heap).
+   Se comprueba que heap y greedy eligen lo mismo.
+2. Agente: el grafo union contra el NewsAPI falso con y sin ranking, y la
+   calidad del top servido (keywords, antigüedad y fuentes distintas).
+
+Uso (desde backend/):
+    python -m benchmarks.bench_ranking --sizes 1000 10000 100000 --k 12
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Dict, List
+
+os.environ.setdefault("NEWS_API_KEY", "benchmark-key")
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+from agent.keywords import KeywordMatcher
+from agent.langgraph_agent import NewsAgent
+from agent.ranking import configured_weights, rank_articles, relevance_score
+from benchmarks.fake_newsapi import FakeNewsAPIServer
+from benchmarks.synthetic import make_articles
+from core.config import settings
+from core.quota import QuotaLedger
+
+
+def _classified(count: int) -> List[Dict]:
+    """Artículos de salida (source, keywords, publishedAt) como los que produce el agente"""
+    matcher = KeywordMatcher({"ai": NewsAgent.AI_KEYWORDS, "marketing": NewsAgent.MARKETING_KEYWORDS})
+    articles = []
+    for article in make_articles(count, seed=count):
+        matches = matcher.match(f"{article['title']} {article['description']}")
+        articles.append({
+            "url": article["url"],
+            "publishedAt": article["publishedAt"],
+            "source": article["source"]["name"],
+            "keywords": [keyword for found in matches.values() for keyword in found]
+        })
+    return articles
+
+
+def _greedy(articles: List[Dict], weights, k: int, now: float) -> List[Dict]:
+    """Selección de referencia: k recorridos lineales con la penalización al día"""
+    scores = [relevance_score(article, weights, now) for article in articles]
+    chosen_by_source: Dict[str, int] = {}
+    remaining = set(range(len(articles)))
+    ranked = []
+    for _ in range(min(k, len(articles))):
+        best = max(
+            remaining,
+            key=lambda i: (scores[i] - weights.diversity * chosen_by_source.get(articles[i]["source"], 0), -i)
+        )
+        remaining.remove(best)
+        ranked.append(articles[best])
+        chosen_by_source[articles[best]["source"]] = chosen_by_source.get(articles[best]["source"], 0) + 1
+    return ranked
+
+
+def _best_ms(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return min(samples)
+
+
+def micro(args) -> None:
+    weights = configured_weights()
+    now = datetime.now(timezone.utc).timestamp()
+    print(f"{'artículos':>10} {'heap (ms)':>10} {'µs/art':>7} {'sort (ms)':>10} {'greedy (ms)':>12} {'iguales':>8}")
+    for size in args.sizes:
+        articles = _classified(size)
+        heap_ms = _best_ms(lambda: rank_articles(articles, weights, args.k, now), args.repeat)
+        sort_ms = _best_ms(
+            lambda: sorted(articles, key=lambda a: relevance_score(a, weights, now), reverse=True)[:args.k],
+            args.repeat
+        )
+        greedy_ms = _best_ms(lambda: _greedy(articles, weights, args.k, now), 1)
+        same = rank_articles(articles, weights, args.k, now) == _greedy(articles, weights, args.k, now)
+        print(f"{size:>10} {heap_ms:>10.1f} {heap_ms * 1000 / size:>7.2f} {sort_ms:>10.1f} {greedy_ms:>12.1f} {str(same):>8}")
+
+
+def _quality(news: List[Dict]) -> str:
+    now = datetime.now(timezone.utc)
+    ages = [
+        (now - datetime.fromisoformat(a["publishedAt"])).total_seconds() / 60
+        for a in news if a.get("publishedAt")
+    ]
+    keywords = statistics.mean(len(a.get("keywords", [])) for a in news) if news else 0
+    sources = len({a.get("source") for a in news})
+    return f"keywords {keywords:.2f} | antigüedad media {statistics.mean(ages) if ages else 0:.0f} min | {sources} fuentes"
+
+
+async def agent_run(ranking: bool, args) -> None:
+    settings.NEWS_RANKING = ranking
+    agent = NewsAgent(
+        fetch_mode="union",
+        quota_ledger=QuotaLedger(os.path.join(tempfile.mkdtemp(), "quota.db"), daily_limit=10_000)
+    )
+    samples = []
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        result = await agent.run_union()
+        samples.append((time.perf_counter() - start) * 1000)
+    await agent.aclose()
+
+    label = "ranking" if ranking else "orden de llegada"
+    print(f"\n{label}: p50 {statistics.median(samples):.1f} ms por ejecución del grafo")
+    for filter_type, r in result["results"].items():
+        print(f"  {filter_type:<10} {len(r['news']):>3} noticias | {_quality(r['news'])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ranking de relevancia con top-k por heap")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--k", type=int, default=12)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--articles", type=int, default=300, help="Artículos en el NewsAPI falso")
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    micro(args)
+
+    with FakeNewsAPIServer(make_articles(args.articles, duplicate_rate=0.1)) as server:
+        settings.NEWS_API_URL = server.url
+        settings.NEWS_INCREMENTAL = False
+        for ranking in (False, True):
+            asyncio.run(agent_run(ranking, args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Benchmark: arranque en frío (Cloud Run)
+
+1. Informe estilo `python -X importtime` de `import main`: tiempo total y
+   los paquetes de primer nivel más caros (tiempo propio sumado por paquete).
+2. Tiempo hasta el primer `/health` correcto y hasta que el agente está
+   listo (`/api/status` -> "agent": "ready"), con FAST_START activado y
+   desactivado, arrancando uvicorn en un subproceso.
+
+Uso (desde backend/):
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --runs 5 --output startup.json
+"""
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Dependencias pesadas que el modo rápido debe dejar fuera del arranque
+HEAVY_MODULES = ("langchain_openai", "langchain_core", "langgraph", "openai")
+
+
+def _env(fast_start: bool) -> Dict[str, str]:
+    data_dir = tempfile.mkdtemp()
+    env = dict(os.environ)
+    env.setdefault("NEWS_API_KEY", "benchmark-key")
+    env.setdefault("OPENAI_API_KEY", "sk-benchmark")
+    env.update(
+        FAST_START=str(fast_start).lower(),
+        QUOTA_DB_PATH=os.path.join(data_dir, "quota.db"),
+        SEEN_STORE_PATH=os.path.join(data_dir, "seen.db"),
+        SEARCH_INDEX_PATH=os.path.join(data_dir, "search.db"),
+        ARTICLE_STORE_DIR=os.path.join(data_dir, "article_store"),
+        METRICS_DIR=os.path.join(data_dir, "metrics"),
+        NEWS_INCREMENTAL_DIR=os.path.join(data_dir, "incremental_state"),
+        IMAGE_CACHE_DIR=os.path.join(data_dir, "image_cache"),
+        LLM_CACHE_PATH=os.path.join(data_dir, "llm_cache.db"),
+    )
+    return env
+
+
+def import_report(top: int) -> Dict:
+    """Ejecutar `python -X importtime -c 'import main'` y agregar por paquete de primer nivel"""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=BACKEND_DIR, env=_env(True), capture_output=True, text=True, check=True
+    )
+
+    # Formato: "import time: self [us] | cumulative | imported package"
+    # El tiempo propio de cada módulo se suma a su paquete de primer nivel
+    packages: Dict[str, int] = {}
+    total_us = 0
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        top_level = name.strip().split(".")[0]
+        packages[top_level] = packages.get(top_level, 0) + int(self_us)
+        total_us += int(self_us)
+
+    ranking = sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]
+    return {
+        "total_ms": round(total_us / 1000, 1),
+        "top_packages_ms": {name: round(us / 1000, 1) for name, us in ranking},
+        "heavy_modules_loaded": sorted(m for m in HEAVY_MODULES if m in packages),
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_until(url: str, predicate, deadline: float) -> float:
+    while time.perf_counter() < deadline:
+        try:
+            response = httpx.get(url, timeout=0.5)
+            if response.status_code == 200 and predicate(response):
+                return time.perf_counter()
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.01)
+    raise TimeoutError(f"Sin respuesta de {url}")
+
+
+def measure_startup(fast_start: bool, timeout: float) -> Dict[str, float]:
+    """Segundos desde lanzar uvicorn hasta /health OK y hasta el agente listo"""
+    port = _free_port()
+    base = f"http://127.0.0.1:{port}"
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=_env(fast_start), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        deadline = start + timeout
+        healthy = _wait_until(f"{base}/health", lambda r: True, deadline)
+        ready = _wait_until(f"{base}/api/status", lambda r: r.json().get("agent") == "ready", deadline)
+    finally:
+        proc.terminate()
+        proc.wait()
+
+    return {"health_s": healthy - start, "agent_ready_s": ready - start}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Arranque en frío: imports y primer /health")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--output", default="", help="Guardar el informe en JSON")
+    args = parser.parse_args()
+
+    report = {"imports": import_report(args.top), "startup": {}}
+
+    print(f"📦 import main: {report['imports']['total_ms']} ms")
+    for name, ms in report["imports"]["top_packages_ms"].items():
+        print(f"   {name:<28} {ms:>9.1f} ms")
+    heavy = report["imports"]["heavy_modules_loaded"]
+    print(f"   Dependencias pesadas cargadas al importar: {', '.join(heavy) or 'ninguna'}")
+
+    print(f"\n⏱️  Arranque de uvicorn (mediana de {args.runs})")
+    print(f"{'modo':<14} {'/health (s)':>12} {'agente (s)':>12}")
+    for fast_start in (False, True):
+        runs: List[Dict[str, float]] = [measure_startup(fast_start, args.timeout) for _ in range(args.runs)]
+        summary = {
+            key: round(statistics.median(run[key] for run in runs), 3)
+            for key in ("health_s", "agent_ready_s")
+        }
+        mode = "FAST_START" if fast_start else "normal"
+        report["startup"][mode] = summary
+        print(f"{mode:<14} {summary['health_s']:>12.3f} {summary['agent_ready_s']:>12.3f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Informe guardado en {args.output}")
+
+
+if __name__ == "__main__":
+    main()
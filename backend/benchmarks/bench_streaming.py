@@ -0,0 +1,117 @@
+"""
+Benchmark: tiempo hasta el primer artículo, /get-news vs. /get-news/stream
+
+Arranca la app real con uvicorn contra un NewsAPI falso con latencia y
+mide, con la caché fría en cada muestra, cuándo llega el primer artículo y
+cuándo termina la respuesta en cada endpoint. La app va en modo "live" y
+sin fetch incremental: cada request ejecuta el agente con el fetch
+completo (en modo "cache" el snapshot publicado por la muestra anterior
+se serviría sin llamar a NewsAPI). El beneficio del streaming
+crece con el número de páginas que hace falta pedir (p. ej. pocos artículos
+relevantes por página) o con el pipeline por artículo.
+
+Uso (desde backend/):
+    python -m benchmarks.bench_streaming --latency 0.3 --relevant-rate 0.05
+"""
+
+import argparse
+import json
+import logging
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+os.environ.setdefault("NEWS_API_KEY", "benchmark-key")
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+_tmp = tempfile.mkdtemp()
+# Todos los almacenes en un directorio temporal, no en los del desarrollador
+os.environ.setdefault("QUOTA_DB_PATH", os.path.join(_tmp, "quota.db"))
+os.environ.setdefault("SEEN_STORE_PATH", os.path.join(_tmp, "seen.db"))
+os.environ.setdefault("SEARCH_INDEX_PATH", os.path.join(_tmp, "search.db"))
+os.environ.setdefault("ARTICLE_STORE_DIR", os.path.join(_tmp, "article_store"))
+os.environ.setdefault("METRICS_DIR", os.path.join(_tmp, "metrics"))
+os.environ.setdefault("NEWS_INCREMENTAL_DIR", os.path.join(_tmp, "incremental_state"))
+os.environ.setdefault("IMAGE_CACHE_DIR", os.path.join(_tmp, "image_cache"))
+os.environ.setdefault("LLM_CACHE_PATH", os.path.join(_tmp, "llm_cache.db"))
+os.environ.setdefault("NEWS_DAILY_LIMIT", "1000000")
+# Cada muestra es una carga real: sin caché, snapshots ni marca de agua entre muestras
+os.environ["NEWS_SERVING_MODE"] = "live"
+os.environ["NEWS_INCREMENTAL"] = "False"
+
+import httpx
+import uvicorn
+
+from benchmarks.fake_newsapi import FakeNewsAPIServer
+from benchmarks.synthetic import make_articles
+from core.config import settings
+
+
+def _start_app():
+    from main import app
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=0, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    port = server.servers[0].sockets[0].getsockname()[1]
+    return server, f"http://127.0.0.1:{port}"
+
+
+def _measure_full(client: httpx.Client, base_url: str, filter_type: str):
+    start = time.perf_counter()
+    data = client.get(f"{base_url}/api/get-news", params={"filter_type": filter_type}).json()
+    elapsed = time.perf_counter() - start
+    # Sin streaming el primer artículo llega con la respuesta completa
+    return elapsed, elapsed, data["count"]
+
+
+def _measure_stream(client: httpx.Client, base_url: str, filter_type: str):
+    start = time.perf_counter()
+    first = None
+    count = 0
+    with client.stream("GET", f"{base_url}/api/get-news/stream", params={"filter_type": filter_type}) as response:
+        for line in response.iter_lines():
+            if not line:
+                continue
+            event = json.loads(line)
+            if event["type"] == "article" and first is None:
+                first = time.perf_counter() - start
+            if event["type"] == "summary":
+                count = event["count"]
+    elapsed = time.perf_counter() - start
+    return first if first is not None else elapsed, elapsed, count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tiempo hasta el primer artículo con y sin streaming")
+    parser.add_argument("--latency", type=float, default=0.3)
+    parser.add_argument("--relevant-rate", type=float, default=0.05)
+    parser.add_argument("--samples", type=int, default=5)
+    parser.add_argument("--filter", default="ai")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    articles = make_articles(300, relevant_rate=args.relevant_rate)
+
+    with FakeNewsAPIServer(articles, latency=args.latency) as upstream:
+        settings.NEWS_API_URL = upstream.url
+        server, base_url = _start_app()
+
+        print(f"📊 Latencia upstream {args.latency * 1000:.0f} ms, {args.samples} muestras con caché fría")
+        print(f"{'endpoint':>18} {'primer artículo (s)':>20} {'total (s)':>10} {'noticias':>9}")
+        with httpx.Client(timeout=60) as client:
+            for name, measure in (("/get-news", _measure_full), ("/get-news/stream", _measure_stream)):
+                samples = []
+                for _ in range(args.samples):
+                    samples.append(measure(client, base_url, args.filter))
+                first = statistics.median(s[0] for s in samples)
+                total = statistics.median(s[1] for s in samples)
+                print(f"{name:>18} {first:>20.3f} {total:>10.3f} {samples[-1][2]:>9}")
+
+        server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Benchmark: llamadas a NewsAPI por ciclo de refresco, por filtro vs. "union"
+
+Refresca los tres filtros (ai, marketing, both) con cada modo de fetch
+contra un NewsAPI simulado que cuenta las llamadas, y mide el tiempo del
+ciclo completo y cuántas noticias reales obtiene cada filtro.
+
+Uso (desde backend/):
+    python -m benchmarks.bench_union_fetch --cycles 5 --latency 0.2
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import tempfile
+import time
+
+os.environ.setdefault("NEWS_API_KEY", "benchmark-key")
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+import httpx
+
+from agent.langgraph_agent import NewsAgent
+from api.news_service import load_all_news
+from benchmarks.synthetic import make_articles
+from core.quota import QuotaLedger
+
+
+def _counting_client(articles, latency: float, calls: list) -> httpx.AsyncClient:
+    """Cliente httpx con latencia simulada que registra cada llamada al upstream"""
+    async def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.params.get("q"))
+        await asyncio.sleep(latency)
+        return httpx.Response(200, json={"status": "ok", "totalResults": len(articles), "articles": articles})
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+async def bench_mode(fetch_mode: str, articles, cycles: int, latency: float):
+    calls = []
+    agent = NewsAgent(
+        http_client=_counting_client(articles, latency, calls),
+        quota_ledger=QuotaLedger(os.path.join(tempfile.mkdtemp(), "quota.db"), daily_limit=1_000_000),
+        fetch_mode=fetch_mode
+    )
+
+    start = time.perf_counter()
+    for _ in range(cycles):
+        results = await load_all_news(agent)
+    elapsed = (time.perf_counter() - start) / cycles
+    await agent.aclose()
+
+    counts = " ".join(
+        f"{f}={len(r['news'])}{'*' if r['used_sample'] else ''}" for f, r in results.items()
+    )
+    print(f"{fetch_mode:>12} {len(calls) / cycles:>14.1f} {elapsed * 1000:>14.1f}   {counts}")
+    return len(calls) / cycles
+
+
+async def main_async(args):
+    articles = make_articles(100, duplicate_rate=args.duplicate_rate)
+
+    print(f"📊 {args.cycles} ciclos de refresco de los tres filtros (* = completado con ejemplos)")
+    print(f"{'modo':>12} {'llamadas/ciclo':>14} {'ms/ciclo':>14}   noticias por filtro")
+    per_filter = await bench_mode("per_filter", articles, args.cycles, args.latency)
+    union = await bench_mode("union", articles, args.cycles, args.latency)
+    print(f"🔻 Reducción de llamadas al upstream: {per_filter / union:.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fetch por filtro vs. fetch union")
+    parser.add_argument("--cycles", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--duplicate-rate", type=float, default=0.1)
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
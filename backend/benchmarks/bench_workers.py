@@ -0,0 +1,132 @@
+"""
+Benchmark: varios workers de uvicorn compartiendo los snapshots del almacén
+
+Arranca `uvicorn main:app --workers N` (modo cache) contra el NewsAPI falso
+y lanza ráfagas concurrentes de /api/get-news sobre los tres filtros:
+- llamadas al upstream por ráfaga (con snapshots compartidos: una carga por
+  clave aunque haya N workers, no una por worker);
+- latencia de las respuestas servidas desde el snapshot mapeado;
+- memoria de los workers (RSS y PSS de /proc, solo Linux), para comprobar
+  que crece por el intérprete y no por copias de los resultados.
+
+Uso (desde backend/):
+    python -m benchmarks.bench_workers --workers 1 4 --requests 200
+"""
+
+import argparse
+import asyncio
+import logging
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+import httpx
+
+from benchmarks.bench_startup import BACKEND_DIR, _env, _free_port, _wait_until
+from benchmarks.fake_newsapi import FakeNewsAPIServer
+from benchmarks.synthetic import make_articles
+
+FILTERS = ("ai", "marketing", "both")
+
+
+def _children(pid: int) -> List[int]:
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            return [int(child) for child in f.read().split()]
+    except OSError:
+        return []
+
+
+def _memory_kb(pid: int) -> Dict[str, int]:
+    """RSS y PSS (páginas compartidas repartidas entre procesos) de un proceso"""
+    memory = {"rss": 0, "pss": 0}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                if key in ("Rss", "Pss"):
+                    memory[key.lower()] = int(value.split()[0])
+    except OSError:
+        pass
+    return memory
+
+
+async def _burst(base: str, count: int, concurrency: int) -> List[float]:
+    semaphore = asyncio.Semaphore(concurrency)
+    async with httpx.AsyncClient(timeout=60) as client:
+        async def one(index: int) -> float:
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.get(f"{base}/api/get-news", params={"filter_type": FILTERS[index % 3]})
+                response.raise_for_status()
+                return time.perf_counter() - start
+
+        return await asyncio.gather(*[one(i) for i in range(count)])
+
+
+def run(workers: int, server: FakeNewsAPIServer, args) -> Dict:
+    port = _free_port()
+    base = f"http://127.0.0.1:{port}"
+    env = _env(fast_start=False)
+    env.update(NEWS_API_URL=server.url, NEWS_SERVING_MODE="cache", NEWS_CACHE_TTL=str(args.ttl))
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        deadline = time.perf_counter() + args.timeout
+        _wait_until(f"{base}/health", lambda r: True, deadline)
+        # Esperar a que todos los workers tengan el agente listo
+        time.sleep(args.warmup)
+
+        calls = server.calls
+        cold = asyncio.run(_burst(base, args.requests, args.concurrency))
+        cold_calls = server.calls - calls
+
+        calls = server.calls
+        warm = asyncio.run(_burst(base, args.requests, args.concurrency))
+        warm_calls = server.calls - calls
+
+        # Con --workers 1 uvicorn sirve desde el propio proceso
+        memory = [_memory_kb(pid) for pid in (_children(proc.pid) if workers > 1 else [proc.pid])]
+    finally:
+        proc.terminate()
+        proc.wait()
+
+    return {
+        "workers": workers,
+        "cold_upstream_calls": cold_calls,
+        "warm_upstream_calls": warm_calls,
+        "cold_p50_ms": statistics.median(cold) * 1000,
+        "warm_p50_ms": statistics.median(warm) * 1000,
+        "rss_mb": sum(m["rss"] for m in memory) / 1024,
+        "pss_mb": sum(m["pss"] for m in memory) / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Workers de uvicorn con snapshots compartidos")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--requests", type=int, default=120, help="Requests por ráfaga")
+    parser.add_argument("--concurrency", type=int, default=10, help="Requests en vuelo")
+    parser.add_argument("--latency", type=float, default=0.3, help="Latencia del NewsAPI falso (s)")
+    parser.add_argument("--ttl", type=float, default=300)
+    parser.add_argument("--warmup", type=float, default=3.0, help="Espera tras /health (s)")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    print(f"{'workers':>7} {'upstream frío':>14} {'upstream caliente':>18} "
+          f"{'p50 frío':>9} {'p50 caliente':>13} {'RSS (MB)':>9} {'PSS (MB)':>9}")
+    with FakeNewsAPIServer(make_articles(300), latency=args.latency) as server:
+        for workers in args.workers:
+            r = run(workers, server, args)
+            print(f"{r['workers']:>7} {r['cold_upstream_calls']:>14} {r['warm_upstream_calls']:>18} "
+                  f"{r['cold_p50_ms']:>7.0f}ms {r['warm_p50_ms']:>11.1f}ms {r['rss_mb']:>9.0f} {r['pss_mb']:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Servidor de imágenes falso para probar el proxy de miniaturas sin red
+
+Sirve `/images/{nombre}.png` con PNG generados en memoria (color y tamaño
+derivados del nombre) y una latencia configurable. Cuenta las descargas y
+la concurrencia máxima observada, para comprobar el límite del prefetch.
+`/images/missing-*` responde 404 y `/images/html-*` un tipo no válido.
+
+Uso como script (desde backend/):
+    python -m benchmarks.fake_images --port 9100 --latency 0.1
+"""
+
+import argparse
+import asyncio
+import hashlib
+import struct
+import zlib
+
+import uvicorn
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import HTMLResponse, Response
+
+from benchmarks.fake_newsapi import BackgroundServer
+
+
+def make_png(width: int, height: int, color: bytes) -> bytes:
+    """PNG RGB de un color sólido, sin dependencias"""
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    row = b"\x00" + color * width
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(row * height))
+        + chunk(b"IEND", b"")
+    )
+
+
+def create_fake_images_app(latency: float = 0.0) -> FastAPI:
+    app = FastAPI(title="Fake images")
+    app.state.calls = 0
+    app.state.in_flight = 0
+    app.state.max_in_flight = 0
+
+    @app.get("/images/{name}")
+    async def image(name: str):
+        app.state.calls += 1
+        app.state.in_flight += 1
+        app.state.max_in_flight = max(app.state.max_in_flight, app.state.in_flight)
+        try:
+            if latency:
+                await asyncio.sleep(latency)
+            if name.startswith("missing"):
+                raise HTTPException(status_code=404)
+            if name.startswith("html"):
+                return HTMLResponse("<html>not an image</html>")
+
+            digest = hashlib.sha256(name.encode()).digest()
+            # Tamaños de "foto de portada" de 800 a 1400 px de ancho
+            width = 800 + digest[3] * 600 // 255
+            return Response(make_png(width, width * 9 // 16, digest[:3]), media_type="image/png")
+        finally:
+            app.state.in_flight -= 1
+
+    return app
+
+
+class FakeImageServer(BackgroundServer):
+    """Servidor de imágenes falso en un hilo de fondo"""
+
+    def __init__(self, latency: float = 0.0, host: str = "127.0.0.1", port: int = 0):
+        super().__init__(create_fake_images_app(latency), host=host, port=port)
+
+    def image_url(self, name: str) -> str:
+        return f"{self.base_url}/images/{name}.png"
+
+    @property
+    def calls(self) -> int:
+        return self.app.state.calls
+
+    @property
+    def max_in_flight(self) -> int:
+        return self.app.state.max_in_flight
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor de imágenes falso")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency", type=float, default=0.0, help="Segundos por imagen")
+    args = parser.parse_args()
+
+    print(f"🧪 Imágenes falsas en http://{args.host}:{args.port}/images/<nombre>.png")
+    uvicorn.run(create_fake_images_app(args.latency), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""
+Servidor NewsAPI falso para benchmarks y pruebas de carga offline
+
+Sirve `/v2/everything` con artículos sintéticos (ver `benchmarks.synthetic`)
+y una latencia configurable, sin gastar cuota real. Respeta `from` (fetch
+incremental) y `FakeNewsAPIServer.publish()` añade artículos nuevos. `FakeNewsAPIServer.outage()`
+simula una caída (código de error, Retry-After y latencia propios) y
+`error_rate` responde con error a una fracción aleatoria de las requests.
+`/stats` devuelve las llamadas recibidas (para procesos externos).
+
+Uso como script (desde backend/):
+    python -m benchmarks.fake_newsapi --port 9000 --articles 500 --latency 0.2 --error-rate 0.05
+"""
+
+import argparse
+import asyncio
+import random
+import threading
+import time
+from typing import Dict, List, Optional
+
+import uvicorn
+from fastapi import FastAPI, Query
+from fastapi.responses import JSONResponse
+
+from benchmarks.synthetic import make_articles
+
+
+def create_fake_newsapi_app(
+    articles: List[Dict],
+    latency: float = 0.0,
+    error_rate: float = 0.0,
+    error_status: int = 503
+) -> FastAPI:
+    """Crear la app FastAPI que imita el endpoint /v2/everything"""
+    app = FastAPI(title="Fake NewsAPI")
+    app.state.calls = 0
+    app.state.errors = 0
+    app.state.articles = articles
+    app.state.returned = 0
+    # Caída simulada: (código HTTP, Retry-After, latencia) o None
+    app.state.outage = None
+    # Errores aleatorios: fracción de requests que responden `error_status`
+    app.state.error_rate = error_rate
+    app.state.error_status = error_status
+    rng = random.Random(7)
+
+    @app.get("/v2/everything")
+    async def everything(
+        page: int = Query(1),
+        pageSize: int = Query(100),
+        from_: Optional[str] = Query(None, alias="from"),
+        to: Optional[str] = Query(None)
+    ) -> Dict:
+        app.state.calls += 1
+        if app.state.outage is not None:
+            status_code, retry_after, outage_latency = app.state.outage
+            if outage_latency:
+                await asyncio.sleep(outage_latency)
+            headers = {"Retry-After": str(retry_after)} if retry_after is not None else {}
+            return JSONResponse(
+                {"status": "error", "code": "unavailable", "message": "Fake outage"},
+                status_code=status_code,
+                headers=headers
+            )
+        if latency:
+            await asyncio.sleep(latency)
+        if app.state.error_rate and rng.random() < app.state.error_rate:
+            app.state.errors += 1
+            return JSONResponse(
+                {"status": "error", "code": "unexpectedError", "message": "Fake injected error"},
+                status_code=app.state.error_status
+            )
+
+        matching = app.state.articles
+        if from_:
+            # Inclusivo, como NewsAPI (fechas ISO 8601 en UTC, comparables como texto)
+            since = from_.rstrip("Z")
+            matching = [a for a in matching if a["publishedAt"].rstrip("Z") >= since]
+        if to:
+            until = to.rstrip("Z")
+            matching = [a for a in matching if a["publishedAt"].rstrip("Z") <= until]
+
+        start = (page - 1) * pageSize
+        page_articles = matching[start:start + pageSize]
+        app.state.returned += len(page_articles)
+        return {
+            "status": "ok",
+            "totalResults": len(matching),
+            "articles": page_articles,
+        }
+
+    @app.get("/stats")
+    async def stats() -> Dict:
+        return {"calls": app.state.calls, "errors": app.state.errors, "returned": app.state.returned}
+
+    return app
+
+
+class BackgroundServer:
+    """Servir una app ASGI con uvicorn en un hilo de fondo (puerto libre por defecto)"""
+
+    def __init__(self, app: FastAPI, host: str = "127.0.0.1", port: int = 0):
+        self.app = app
+        self._server = uvicorn.Server(
+            uvicorn.Config(self.app, host=host, port=port, log_level="warning")
+        )
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+        self.host = host
+        self.port = port
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def start(self):
+        self._thread.start()
+        while not self._server.started:
+            time.sleep(0.01)
+        self.port = self._server.servers[0].sockets[0].getsockname()[1]
+        return self
+
+    def stop(self) -> None:
+        self._server.should_exit = True
+        self._thread.join(timeout=5)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+
+class FakeNewsAPIServer(BackgroundServer):
+    """Arrancar el NewsAPI falso en un hilo de fondo (puerto libre por defecto)"""
+
+    def __init__(
+        self,
+        articles: Optional[List[Dict]] = None,
+        latency: float = 0.0,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        error_rate: float = 0.0,
+        error_status: int = 503
+    ):
+        super().__init__(
+            create_fake_newsapi_app(
+                articles if articles is not None else make_articles(100),
+                latency=latency,
+                error_rate=error_rate,
+                error_status=error_status
+            ),
+            host=host,
+            port=port
+        )
+
+    @property
+    def url(self) -> str:
+        return f"{self.base_url}/v2/everything"
+
+    @property
+    def calls(self) -> int:
+        return self.app.state.calls
+
+    @property
+    def returned(self) -> int:
+        """Artículos servidos en total (lo que el agente tuvo que procesar)"""
+        return self.app.state.returned
+
+    def publish(self, articles: List[Dict]) -> None:
+        """Añadir artículos nuevos (más recientes) al principio, como llegarían a NewsAPI"""
+        self.app.state.articles = list(articles) + self.app.state.articles
+
+    def outage(self, status_code: int = 503, retry_after: Optional[int] = None, latency: float = 0.0) -> None:
+        """Responder `status_code` a todas las requests hasta `recover()`"""
+        self.app.state.outage = (status_code, retry_after, latency)
+
+    def recover(self) -> None:
+        self.app.state.outage = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="NewsAPI falso para pruebas locales")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--articles", type=int, default=100)
+    parser.add_argument("--duplicate-rate", type=float, default=0.1)
+    parser.add_argument("--latency", type=float, default=0.0, help="Segundos por respuesta")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fracción de respuestas con error")
+    parser.add_argument("--error-status", type=int, default=503)
+    args = parser.parse_args()
+
+    app = create_fake_newsapi_app(
+        make_articles(args.articles, duplicate_rate=args.duplicate_rate),
+        latency=args.latency,
+        error_rate=args.error_rate,
+        error_status=args.error_status
+    )
+    print(f"🧪 Fake NewsAPI en http://{args.host}:{args.port}/v2/everything")
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
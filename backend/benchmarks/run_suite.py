@@ -0,0 +1,228 @@
+"""
+Suite de benchmarks offline con resultados en JSON para comparar entre commits
+
+Mide, sin red real ni cuota (NewsAPI falso local con artículos sintéticos):
+- latencia end-to-end de `get_filtered_news` (p50/p95/media) por filtro;
+- tiempo por nodo del grafo (media de varias ejecuciones);
+- throughput del clasificador y del dedup a 100, 10k y 100k artículos.
+
+Cada ejecución guarda un JSON con los resultados y metadatos (commit,
+Python, plataforma). Con --compare se imprime la variación frente a un
+JSON anterior.
+
+Uso (desde backend/):
+    python -m benchmarks.run_suite
+    python -m benchmarks.run_suite --sizes 100 10000 --compare benchmarks/results/<anterior>.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+
+os.environ.setdefault("NEWS_API_KEY", "benchmark-key")
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+from agent.dedup import DedupIndex
+from agent.langgraph_agent import NewsAgent
+from benchmarks.fake_newsapi import FakeNewsAPIServer
+from benchmarks.synthetic import make_articles
+from core.config import settings
+from core.quota import QuotaLedger
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+def _percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _summary_ms(samples: List[float]) -> Dict[str, float]:
+    return {
+        "p50_ms": round(_percentile(samples, 50) * 1000, 3),
+        "p95_ms": round(_percentile(samples, 95) * 1000, 3),
+        "mean_ms": round(statistics.mean(samples) * 1000, 3),
+    }
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def _make_agent() -> NewsAgent:
+    return NewsAgent(quota_ledger=QuotaLedger(
+        os.path.join(tempfile.mkdtemp(), "quota.db"), daily_limit=1_000_000
+    ))
+
+
+async def bench_end_to_end(agent: NewsAgent, iterations: int) -> Dict[str, Any]:
+    """Latencia de get_filtered_news por filtro contra el NewsAPI falso"""
+    results = {}
+    for filter_type in NewsAgent.FILTERS:
+        samples = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            await agent.get_filtered_news(filter_type)
+            samples.append(time.perf_counter() - start)
+        results[filter_type] = _summary_ms(samples)
+    return results
+
+
+async def bench_nodes(agent: NewsAgent, iterations: int) -> Dict[str, Any]:
+    """Tiempo medio por nodo: intervalo entre actualizaciones consecutivas del grafo"""
+    durations: Dict[str, List[float]] = {}
+    for _ in range(iterations):
+        state = agent._initial_state(agent._get_query("both"), "both", ["both"])
+        previous = time.perf_counter()
+        async for update in agent.graph.astream(
+            state, config={"recursion_limit": agent._recursion_limit()}, stream_mode="updates"
+        ):
+            now = time.perf_counter()
+            for node in update:
+                durations.setdefault(node, []).append(now - previous)
+            previous = now
+        await agent._close_page_stream(state)
+
+    return {
+        node: {"mean_ms": round(statistics.mean(samples) * 1000, 3), "calls": len(samples)}
+        for node, samples in durations.items()
+    }
+
+
+def bench_classifier(agent: NewsAgent, articles: List[Dict]) -> Dict[str, float]:
+    start = time.perf_counter()
+    for article in articles:
+        agent._classify_article(article, "both")
+    elapsed = time.perf_counter() - start
+    return {"seconds": round(elapsed, 4), "articles_per_second": round(len(articles) / elapsed, 1)}
+
+
+def bench_dedup(articles: List[Dict]) -> Dict[str, float]:
+    index = DedupIndex(threshold=0.85)
+    duplicates = 0
+    start = time.perf_counter()
+    for article in articles:
+        if index.check(article["url"], article["title"]):
+            duplicates += 1
+        else:
+            index.add(article["url"], article["title"])
+    elapsed = time.perf_counter() - start
+    return {
+        "seconds": round(elapsed, 4),
+        "articles_per_second": round(len(articles) / elapsed, 1),
+        "duplicates": duplicates,
+    }
+
+
+async def run_suite(args) -> Dict[str, Any]:
+    report: Dict[str, Any] = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "pipeline_mode": settings.NEWS_PIPELINE_MODE,
+            "duplicate_rate": args.duplicate_rate,
+            "upstream_latency_ms": args.latency * 1000,
+        },
+        "end_to_end": {},
+        "nodes": {},
+        "classifier": {},
+        "dedup": {},
+    }
+
+    for size in args.sizes:
+        print(f"⏱️  {size} artículos...")
+        articles = make_articles(size, duplicate_rate=args.duplicate_rate)
+
+        # End-to-end y por nodo solo donde tiene sentido servirlos por HTTP
+        if size <= args.max_e2e_size:
+            with FakeNewsAPIServer(articles, latency=args.latency) as server:
+                settings.NEWS_API_URL = server.url
+                agent = _make_agent()
+                report["end_to_end"][str(size)] = await bench_end_to_end(agent, args.iterations)
+                report["nodes"][str(size)] = await bench_nodes(agent, args.iterations)
+                await agent.aclose()
+
+        agent = _make_agent()
+        report["classifier"][str(size)] = bench_classifier(agent, articles)
+        report["dedup"][str(size)] = bench_dedup(articles)
+        await agent.aclose()
+
+    return report
+
+
+def _flatten(report: Dict[str, Any], prefix: str = "") -> Dict[str, float]:
+    flat = {}
+    for key, value in report.items():
+        if key == "meta":
+            continue
+        path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{path}."))
+        elif isinstance(value, (int, float)):
+            flat[path] = value
+    return flat
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any]) -> None:
+    """Imprimir la variación de cada métrica frente a un JSON anterior"""
+    print(f"\n📈 Comparación con {baseline['meta']['commit']} ({baseline['meta']['timestamp']})")
+    current_flat, baseline_flat = _flatten(current), _flatten(baseline)
+    for metric in sorted(current_flat):
+        if metric not in baseline_flat or not baseline_flat[metric]:
+            continue
+        if not metric.endswith(("_ms", "seconds", "articles_per_second")):
+            continue
+        change = (current_flat[metric] - baseline_flat[metric]) / baseline_flat[metric] * 100
+        # En throughput más es mejor; en tiempos, menos
+        better = change > 0 if metric.endswith("articles_per_second") else change < 0
+        marker = "✅" if better or abs(change) < 5 else "⚠️"
+        print(f"{marker} {metric:<55} {baseline_flat[metric]:>12} → {current_flat[metric]:>12} ({change:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Suite de benchmarks offline")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 10000, 100000])
+    parser.add_argument("--duplicate-rate", type=float, default=0.1)
+    parser.add_argument("--latency", type=float, default=0.0, help="Latencia del NewsAPI falso (s)")
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--max-e2e-size", type=int, default=10000,
+                        help="Tamaño máximo del lote servido por el NewsAPI falso")
+    parser.add_argument("--output", default="", help="Ruta del JSON (por defecto benchmarks/results/)")
+    parser.add_argument("--compare", default="", help="JSON anterior con el que comparar")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    report = asyncio.run(run_suite(args))
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{report['meta']['commit']}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"💾 Resultados guardados en {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Generador de artículos sintéticos con la misma forma que la respuesta de NewsAPI
+"""
+
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+AI_TERMS = [
+    "artificial intelligence", "machine learning", "ChatGPT", "neural network",
+    "deep learning", "OpenAI", "generative AI", "language model", "computer vision",
+]
+MARKETING_TERMS = [
+    "marketing", "advertising", "brand", "campaign", "social media",
+    "customer acquisition", "SEO", "content marketing", "revenue",
+]
+NEUTRAL_TERMS = [
+    "weather", "football", "election", "recipe", "travel", "music",
+    "housing", "festival", "wildlife", "history",
+]
+FILLER_WORDS = [
+    "report", "shows", "new", "study", "company", "announces", "experts",
+    "launch", "week", "plans", "major", "update", "global", "local", "team",
+]
+STOP_WORDS = ["the", "of", "to", "in", "for", "on", "with", "and", "as", "at"]
+# Vocabulario amplio con frecuencias tipo Zipf, como en titulares reales
+VOCABULARY = FILLER_WORDS + [f"word{i}" for i in range(5000)]
+VOCABULARY_WEIGHTS = [1 / (rank + 1) for rank in range(len(VOCABULARY))]
+SOURCES = ["TechCrunch", "The Verge", "Wired", "AdAge", "Reuters", "Forbes", "BBC News"]
+
+
+def _make_article(
+    rng: random.Random,
+    index: int,
+    published_at: datetime,
+    relevant_rate: float
+) -> Dict:
+    """Crear un artículo con temática aleatoria (IA, marketing, ambos o ninguno)"""
+    topic = rng.random()
+    if rng.random() >= relevant_rate:
+        terms = [rng.choice(NEUTRAL_TERMS)]
+    elif topic < 0.375:
+        terms = [rng.choice(AI_TERMS)]
+    elif topic < 0.75:
+        terms = [rng.choice(MARKETING_TERMS)]
+    else:
+        terms = [rng.choice(AI_TERMS), rng.choice(MARKETING_TERMS)]
+
+    words = (
+        rng.sample(STOP_WORDS, 2)
+        + rng.choices(VOCABULARY, weights=VOCABULARY_WEIGHTS, k=6)
+        + terms
+        + [f"item{index}"]
+    )
+    rng.shuffle(words)
+    title = " ".join(words).capitalize()
+    source = rng.choice(SOURCES)
+
+    return {
+        "source": {"id": None, "name": source},
+        "author": f"Author {index % 97}",
+        "title": title,
+        "description": f"{title}. " + " ".join(rng.sample(FILLER_WORDS, 8)),
+        "url": f"https://news{index % 13}.example.com/articles/{index}?utm_source=newsapi",
+        "urlToImage": f"https://images.example.com/{index}.jpg",
+        "publishedAt": published_at.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "content": f"{title} ...",
+    }
+
+
+def make_articles(
+    count: int,
+    duplicate_rate: float = 0.0,
+    relevant_rate: float = 0.8,
+    seed: int = 42,
+    start_index: int = 0,
+    newest: Optional[datetime] = None
+) -> List[Dict]:
+    """
+    Generar `count` artículos ordenados por publishedAt descendente.
+
+    Una fracción `relevant_rate` trata de IA y/o marketing; el resto son
+    noticias neutras que el clasificador debe descartar.
+
+    Una fracción `duplicate_rate` son duplicados de artículos anteriores:
+    la mitad con la misma URL y parámetros de tracking distintos, la otra
+    mitad con el mismo título y otra URL.
+
+    `start_index` y `newest` generan un lote posterior (URLs distintas y
+    publicado a partir de `newest`), p. ej. para probar el fetch incremental.
+    """
+    rng = random.Random(seed)
+    now = newest or datetime.now(timezone.utc).replace(microsecond=0)
+    articles: List[Dict] = []
+
+    for offset in range(count):
+        index = start_index + offset
+        published_at = now - timedelta(minutes=offset)
+
+        if articles and rng.random() < duplicate_rate:
+            original = dict(rng.choice(articles))
+            original["publishedAt"] = published_at.strftime("%Y-%m-%dT%H:%M:%SZ")
+            if rng.random() < 0.5:
+                original["url"] = original["url"].split("?")[0] + f"?utm_campaign=dup{index}"
+            else:
+                original["url"] = f"https://mirror.example.com/articles/{index}"
+            articles.append(original)
+        else:
+            articles.append(_make_article(rng, index, published_at, relevant_rate))
+
+    return articles
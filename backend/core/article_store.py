@@ -0,0 +1,343 @@
+"""
+Almacén local de resultados por filtro: snapshots versionados compartidos entre workers
+
+Cada filtro se publica como un snapshot inmutable: el cuerpo JSON listo para
+servir (el de /api/get-news) más su versión, escrito en un fichero temporal
+y renombrado de forma atómica sobre `<filtro>.json`. Nunca se modifica un
+fichero publicado, así que un lector ve la versión anterior completa o la
+nueva completa, nunca una a medias.
+
+Los lectores mapean el fichero con mmap: las páginas son caché de página
+del sistema compartida por todos los workers (y `prefetch_worker.py`), de
+modo que añadir workers no multiplica la memoria. Cada worker solo guarda
+los metadatos de la versión actual y vuelve a mapear el fichero únicamente
+cuando cambia (nuevo inode tras el rename). En Windows no se puede renombrar
+sobre un fichero mapeado, así que allí el almacén no es apto para varios
+procesos.
+
+Junto a cada snapshot se publica `<filtro>.ranked.json`: el conjunto de
+resultados ordenado completo del que el snapshot es la cabeza, para volver
+a rankear por request y paginar por cursor sin repetir la carga.
+
+Un refresco que no cambia nada no republica: `touch` solo actualiza el
+mtime del snapshot, que cuenta como su instante de actualización.
+"""
+
+import hashlib
+import json
+import logging
+import mmap
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin lock entre procesos
+    fcntl = None
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dependencia opcional
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# Filtros que se publican (los de NewsAgent.FILTERS) y claves de refresco
+# ("union" refresca los tres a la vez): nunca se usa otra cosa como nombre de fichero
+FILTERS = ("ai", "marketing", "both")
+REFRESH_KEYS = FILTERS + ("union",)
+
+
+def _dumps(payload: Dict[str, Any]) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+# Metadatos de la publicación que no forman parte del contenido servido
+ETAG_EXCLUDED_KEYS = frozenset(("updated_at", "version", "etag", "upstream"))
+
+
+def payload_etag(payload: Dict[str, Any]) -> str:
+    """
+    ETag débil por contenido de una respuesta de /api/get-news
+
+    Se calcula igual para un snapshot publicado y para una respuesta
+    construida en la request (claves ordenadas, sin los metadatos de
+    publicación), así que los mismos datos tienen el mismo ETag por
+    cualquier camino y republicar las mismas noticias no invalida a los
+    clientes.
+    """
+    content = {key: value for key, value in payload.items() if key not in ETAG_EXCLUDED_KEYS}
+    if orjson is not None:
+        body = orjson.dumps(content, option=orjson.OPT_SORT_KEYS)
+    else:
+        body = json.dumps(content, ensure_ascii=False, separators=(",", ":"), sort_keys=True, default=str).encode("utf-8")
+    return f'W/"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def _loads(body) -> Dict[str, Any]:
+    if orjson is not None:
+        with memoryview(body) as view:
+            return orjson.loads(view)
+    return json.loads(body[:])
+
+
+class Snapshot:
+    """
+    Versión publicada de un filtro, con el cuerpo JSON mapeado en memoria
+
+    `body` se sirve tal cual (sin deserializar); `payload()` lo decodifica
+    solo cuando hace falta manipular las noticias. `updated_at` es el último
+    refresco que confirmó estos datos: el de la publicación o, si después se
+    hizo `touch`, el mtime del fichero.
+    """
+
+    __slots__ = ("filter_type", "body", "version", "updated_at", "count", "etag")
+
+    def __init__(self, filter_type: str, body: mmap.mmap, confirmed_at: float = 0.0):
+        self.filter_type = filter_type
+        self.body = body
+        # Una decodificación por versión y worker; solo se conservan los metadatos
+        payload = _loads(body)
+        self.version: int = payload.get("version", 0)
+        self.updated_at: float = max(payload["updated_at"], confirmed_at)
+        self.count = len(payload["news"])
+        self.etag: str = payload.get("etag") or f'W/"{filter_type}-{self.version}"'
+
+    def payload(self) -> Dict[str, Any]:
+        return _loads(self.body)
+
+    def age(self) -> float:
+        return time.time() - self.updated_at
+
+
+class RankedSet:
+    """
+    Conjunto ordenado completo de una versión de un filtro
+
+    Las posiciones por clave de artículo (para reanudar un cursor emitido
+    sobre otra versión) se calculan la primera vez que hacen falta.
+    """
+
+    __slots__ = ("version", "news", "_positions")
+
+    def __init__(self, version: int, news: List[Dict]):
+        self.version = version
+        self.news = news
+        self._positions: Optional[Dict[str, int]] = None
+
+    @staticmethod
+    def key(article: Dict) -> str:
+        """Clave estable y corta del artículo (hash de su URL)"""
+        return hashlib.blake2b(article.get("url", "").encode("utf-8"), digest_size=8).hexdigest()
+
+    def position_after(self, key: str) -> Optional[int]:
+        """Posición siguiente a la del artículo con esa clave (None si no está en esta versión)"""
+        if self._positions is None:
+            self._positions = {self.key(article): index for index, article in enumerate(self.news)}
+        position = self._positions.get(key)
+        return position + 1 if position is not None else None
+
+    def __len__(self) -> int:
+        return len(self.news)
+
+
+class ArticleStore:
+    """Últimos resultados buenos de cada filtro, con su instante de actualización"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        # filtro -> (firma del fichero, snapshot mapeado)
+        self._snapshots: Dict[str, Tuple[Tuple[int, int, int], Snapshot]] = {}
+        # filtro -> (firma del fichero, conjunto ordenado decodificado)
+        self._ranked: Dict[str, Tuple[Tuple[int, int, int], RankedSet]] = {}
+
+    @staticmethod
+    def _check(name: str, allowed: Tuple[str, ...]) -> str:
+        if name not in allowed:
+            raise ValueError(f"Filtro desconocido para el almacén de artículos: {name!r}")
+        return name
+
+    def _path(self, filter_type: str) -> str:
+        return os.path.join(self.directory, f"{self._check(filter_type, FILTERS)}.json")
+
+    def _ranked_path(self, filter_type: str) -> str:
+        return os.path.join(self.directory, f"{self._check(filter_type, FILTERS)}.ranked.json")
+
+    def _write_atomic(self, path: str, prefix: str, data: bytes) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=prefix, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def snapshot(self, filter_type: str) -> Optional[Snapshot]:
+        """
+        Versión publicada del filtro, o None si aún no hay
+
+        Solo un stat() por llamada; el fichero se vuelve a mapear únicamente
+        si cambió de versión (p. ej. la publicó otro worker).
+        """
+        path = self._path(filter_type)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+
+        cached = self._snapshots.get(filter_type)
+        if cached is not None and cached[0] == (stat.st_ino, stat.st_mtime_ns, stat.st_size):
+            return cached[1]
+
+        try:
+            with open(path, "rb") as f:
+                # Firma del fichero abierto: pudo reemplazarse entre el stat() y el open()
+                stat = os.fstat(f.fileno())
+                body = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            snapshot = Snapshot(filter_type, body, stat.st_mtime)
+        except Exception as e:
+            logger.warning(f"Error leyendo almacén de artículos '{filter_type}': {e}")
+            return cached[1] if cached else None
+
+        # La versión anterior se libera sola cuando ninguna respuesta la usa ya
+        with self._lock:
+            self._snapshots[filter_type] = ((stat.st_ino, stat.st_mtime_ns, stat.st_size), snapshot)
+        return snapshot
+
+    def get(self, filter_type: str) -> Optional[Dict[str, Any]]:
+        """Resultado guardado para el filtro: {"news": [...], "updated_at": epoch, ...}"""
+        snapshot = self.snapshot(filter_type)
+        return snapshot.payload() if snapshot is not None else None
+
+    def ranked(self, filter_type: str) -> Optional[RankedSet]:
+        """
+        Conjunto ordenado completo publicado con el filtro (None si no hay)
+
+        Se decodifica una vez por versión y worker; los llamadores no deben
+        modificar `news` del conjunto devuelto.
+        """
+        path = self._ranked_path(filter_type)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+
+        cached = self._ranked.get(filter_type)
+        if cached is not None and cached[0] == (stat.st_ino, stat.st_mtime_ns, stat.st_size):
+            return cached[1]
+
+        try:
+            with open(path, "rb") as f:
+                stat = os.fstat(f.fileno())
+                payload = _loads(f.read())
+            ranked = RankedSet(payload.get("version", 0), payload["news"])
+        except Exception as e:
+            logger.warning(f"Error leyendo el ranking de '{filter_type}': {e}")
+            return cached[1] if cached else None
+
+        with self._lock:
+            self._ranked[filter_type] = ((stat.st_ino, stat.st_mtime_ns, stat.st_size), ranked)
+        return ranked
+
+    def updated_at(self, filter_type: str) -> float:
+        """Instante (epoch) de la última actualización del filtro, 0 si no hay datos"""
+        snapshot = self.snapshot(filter_type)
+        return snapshot.updated_at if snapshot else 0.0
+
+    def put(
+        self,
+        filter_type: str,
+        news: List[Dict],
+        upstream: Optional[Dict[str, int]] = None,
+        ranked: Optional[List[Dict]] = None,
+        unchanged: bool = False
+    ) -> Snapshot:
+        """
+        Publicar de forma atómica una nueva versión del filtro
+
+        Con `ranked` (conjunto ordenado completo) se publica antes que el
+        snapshot, así que quien ve la versión nueva ya tiene su ranking.
+        Con `unchanged` (el refresco no encontró nada nuevo) la versión
+        publicada solo se confirma con `touch`, sin serializar ni reescribir.
+        """
+        if unchanged and self.touch(filter_type):
+            snapshot = self.snapshot(filter_type)
+            if snapshot is not None:
+                return snapshot
+        payload = {
+            "status": "success",
+            "filter": filter_type,
+            "count": len(news),
+            "news": news,
+            "upstream": upstream or {"pages": 0, "quota_used": 0},
+            "updated_at": time.time(),
+            "version": time.time_ns()
+        }
+        payload["etag"] = payload_etag(payload)
+        if ranked is not None:
+            self._write_atomic(
+                self._ranked_path(filter_type), f".{filter_type}.",
+                _dumps({"version": payload["version"], "news": ranked})
+            )
+        else:
+            # Sin ranking nuevo, el anterior ya no corresponde a estas noticias
+            try:
+                os.remove(self._ranked_path(filter_type))
+            except FileNotFoundError:
+                pass
+        self._write_atomic(self._path(filter_type), f".{filter_type}.", _dumps(payload))
+
+        snapshot = self.snapshot(filter_type)
+        if snapshot is None:
+            raise RuntimeError(f"No se pudo leer el snapshot recién publicado de '{filter_type}'")
+        return snapshot
+
+    def touch(self, filter_type: str) -> bool:
+        """
+        Confirmar la versión publicada sin reescribirla (un refresco sin cambios)
+
+        Returns:
+            False si el filtro aún no tiene snapshot (hay que publicarlo con `put`)
+        """
+        try:
+            os.utime(self._path(filter_type))
+        except FileNotFoundError:
+            return False
+        return True
+
+    @contextmanager
+    def refresh_lock(self, filter_type: str) -> Iterator[bool]:
+        """
+        Lock no bloqueante entre procesos para refrescar un filtro.
+
+        Produce True si este proceso obtuvo el lock; False si otro worker ya
+        está refrescando el mismo filtro y debe saltárselo.
+        """
+        self._check(filter_type, REFRESH_KEYS)
+        if fcntl is None:
+            yield True
+            return
+
+        lock_file = open(os.path.join(self.directory, f".{filter_type}.lock"), "w")
+        try:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+        finally:
+            lock_file.close()
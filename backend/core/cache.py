@@ -0,0 +1,140 @@
+"""
+Caché TTL en memoria con stale-while-revalidate y coalescing single-flight
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Set
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CacheEntry:
+    """Valor cacheado junto con el instante (monotonic) en que se guardó"""
+    value: Any
+    stored_at: float
+
+
+class NewsCache:
+    """
+    Caché por clave (filter_type) para los resultados de /api/get-news.
+
+    - Entrada fresca (edad < ttl): se devuelve directamente.
+    - Entrada caducada pero dentro de la ventana stale (edad < ttl + stale_ttl):
+      se devuelve al momento y se lanza un refresco en segundo plano.
+    - Sin entrada útil: se ejecuta el loader.
+
+    En todos los casos, las cargas concurrentes de una misma clave se
+    coalescen: N misses simultáneos disparan exactamente una ejecución
+    del loader y todos los que esperan reciben ese mismo resultado.
+    """
+
+    def __init__(self, ttl: float, stale_ttl: float = 0):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._entries: Dict[str, CacheEntry] = {}
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._background_tasks: Set[asyncio.Task] = set()
+        self.stats = {
+            "hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "loads": 0,
+            "errors": 0,
+        }
+
+    async def get_or_load(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """Obtener el valor de `key`, cargándolo con `loader` si hace falta"""
+        entry = self._entries.get(key)
+
+        if entry is not None:
+            age = time.monotonic() - entry.stored_at
+
+            if age < self.ttl:
+                self.stats["hits"] += 1
+                return entry.value
+
+            if age < self.ttl + self.stale_ttl:
+                self.stats["stale_hits"] += 1
+                self._refresh_in_background(key, loader)
+                return entry.value
+
+        self.stats["misses"] += 1
+        return await self._load(key, loader)
+
+    def set(self, key: str, value: Any) -> None:
+        """Guardar un valor ya calculado (p. ej. cuando una carga produce varias claves)"""
+        self._entries[key] = CacheEntry(value=value, stored_at=time.monotonic())
+
+    def invalidate(self, key: str = None) -> None:
+        """Invalidar una clave concreta o toda la caché"""
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Contadores de hit/miss y edad de cada entrada para dimensionar el TTL"""
+        now = time.monotonic()
+        lookups = self.stats["hits"] + self.stats["stale_hits"] + self.stats["misses"]
+        served_from_cache = self.stats["hits"] + self.stats["stale_hits"]
+
+        return {
+            **self.stats,
+            "hit_ratio": round(served_from_cache / lookups, 4) if lookups else 0.0,
+            "ttl_seconds": self.ttl,
+            "stale_ttl_seconds": self.stale_ttl,
+            "inflight": len(self._inflight),
+            "entries": {
+                key: {"age_seconds": round(now - entry.stored_at, 3)}
+                for key, entry in self._entries.items()
+            },
+        }
+
+    async def _load(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """Ejecutar el loader en modo single-flight"""
+        task = self._inflight.get(key)
+        if task is not None:
+            self.stats["coalesced"] += 1
+        else:
+            task = asyncio.create_task(self._run_loader(key, loader))
+            self._inflight[key] = task
+            # Marcar la excepción como consumida aunque ya no quede nadie esperando
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self.stats["loads"] += 1
+
+        # shield: si un cliente cancela (también el que lanzó la carga), la carga
+        # compartida sigue para el resto
+        return await asyncio.shield(task)
+
+    async def _run_loader(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            value = await loader()
+        except Exception:
+            self.stats["errors"] += 1
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+        self.set(key, value)
+        return value
+
+    def _refresh_in_background(self, key: str, loader: Callable[[], Awaitable[Any]]) -> None:
+        """Lanzar un refresco de `key` sin bloquear al cliente actual"""
+        if key in self._inflight:
+            return
+
+        async def refresh():
+            try:
+                await self._load(key, loader)
+            except Exception as e:
+                logger.warning(f"⚠️ Error refrescando caché '{key}': {str(e)}")
+
+        task = asyncio.create_task(refresh())
+        # Mantener referencia para que la tarea no sea recolectada a mitad
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
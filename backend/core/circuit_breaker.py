@@ -0,0 +1,130 @@
+"""
+Circuit breaker para las llamadas a NewsAPI
+
+- closed: las llamadas pasan; N fallos seguidos abren el circuito.
+- open: no se llama al upstream hasta que pase el enfriamiento (o el
+  Retry-After que haya indicado NewsAPI, si es mayor).
+- half_open: se deja pasar una única llamada de prueba; si va bien el
+  circuito se cierra y si falla vuelve a abrirse.
+
+El estado es por worker (en memoria): cada worker descubre la caída con
+como mucho `failure_threshold` llamadas y después deja de esperar timeouts.
+"""
+
+import logging
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Segundos de una cabecera Retry-After (en segundos o como fecha HTTP)"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class CircuitBreaker:
+    """Estado closed/open/half_open con enfriamiento que respeta Retry-After"""
+
+    def __init__(
+        self,
+        failure_threshold: int = 3,
+        recovery_timeout: float = 60,
+        max_open: float = 3600,
+        name: str = "newsapi"
+    ):
+        self.failure_threshold = max(failure_threshold, 1)
+        self.recovery_timeout = recovery_timeout
+        self.max_open = max_open
+        self.name = name
+        self.state = "closed"
+        self.failures = 0
+        self.open_until = 0.0
+        self.last_error = ""
+        self._probe_in_flight = False
+        self.stats = {"opened": 0, "rejected": 0}
+
+    def is_open(self) -> bool:
+        """True mientras no se debe llamar al upstream (sin consumir la llamada de prueba)"""
+        if self.state == "closed":
+            return False
+        if self.state == "open":
+            return time.time() < self.open_until
+        return self._probe_in_flight
+
+    def allow(self) -> bool:
+        """Reservar una llamada al upstream; False si el circuito la rechaza"""
+        if self.state == "open" and time.time() >= self.open_until:
+            self.state = "half_open"
+            self._probe_in_flight = False
+            logger.info(f"🟡 Circuito {self.name}: semiabierto, probando el upstream")
+
+        if self.state == "closed":
+            return True
+        if self.state == "half_open" and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+
+        self.stats["rejected"] += 1
+        return False
+
+    def release(self) -> None:
+        """Devolver una llamada permitida que al final no se hizo (p. ej. sin cuota)"""
+        self._probe_in_flight = False
+
+    def record_success(self) -> None:
+        if self.state != "closed":
+            logger.info(f"🟢 Circuito {self.name}: cerrado, upstream recuperado")
+        self.state = "closed"
+        self.failures = 0
+        self.last_error = ""
+        self._probe_in_flight = False
+
+    def record_failure(self, error: str = "", retry_after: Optional[float] = None, trip: bool = False) -> None:
+        """
+        Registrar un fallo del upstream
+
+        Args:
+            error: Descripción para /api/status
+            retry_after: Segundos indicados por el upstream (Retry-After)
+            trip: Abrir ya, sin esperar a `failure_threshold` (429, 403, cuota agotada)
+        """
+        self.failures += 1
+        self.last_error = error
+        self._probe_in_flight = False
+
+        if trip or self.state == "half_open" or self.failures >= self.failure_threshold:
+            cooldown = min(max(self.recovery_timeout, retry_after or 0.0), self.max_open)
+            self.open_until = time.time() + cooldown
+            if self.state != "open":
+                self.stats["opened"] += 1
+            self.state = "open"
+            logger.warning(f"🔴 Circuito {self.name}: abierto {cooldown:.0f} s ({error or 'fallos repetidos'})")
+
+    def retry_in(self) -> float:
+        """Segundos hasta la próxima llamada de prueba (0 si el circuito está cerrado)"""
+        if self.state != "open":
+            return 0.0
+        return max(0.0, self.open_until - time.time())
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "state": "open" if self.is_open() else self.state,
+            "failures": self.failures,
+            "retry_in_seconds": round(self.retry_in(), 1),
+            "last_error": self.last_error,
+            **self.stats
+        }
@@ -26,6 +26,112 @@ class Settings:
     # External APIs
     NEWS_API_KEY: str = os.getenv("NEWS_API_KEY", "")
     OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
+    NEWS_API_URL: str = os.getenv("NEWS_API_URL", "https://newsapi.org/v2/everything")
+    NEWS_API_TIMEOUT: float = float(os.getenv("NEWS_API_TIMEOUT", 15))
+    
+    # Cuota diaria de NewsAPI (ledger SQLite compartido entre workers)
+    NEWS_DAILY_LIMIT: int = int(os.getenv("NEWS_DAILY_LIMIT", 100))
+    QUOTA_DB_PATH: str = os.getenv("QUOTA_DB_PATH", "news_quota.db")
+    
+    # Reintentos y circuit breaker de NewsAPI (Retry-After tiene prioridad sobre el backoff)
+    NEWS_RETRY_ATTEMPTS: int = int(os.getenv("NEWS_RETRY_ATTEMPTS", 3))
+    NEWS_RETRY_MAX_WAIT: float = float(os.getenv("NEWS_RETRY_MAX_WAIT", 10))
+    NEWS_BREAKER_THRESHOLD: int = int(os.getenv("NEWS_BREAKER_THRESHOLD", 3))
+    NEWS_BREAKER_RECOVERY: float = float(os.getenv("NEWS_BREAKER_RECOVERY", 60))
+    NEWS_BREAKER_MAX_OPEN: float = float(os.getenv("NEWS_BREAKER_MAX_OPEN", 3600))
+    
+    # Pool de conexiones HTTP compartido por el agente
+    HTTP_MAX_CONNECTIONS: int = int(os.getenv("HTTP_MAX_CONNECTIONS", 20))
+    HTTP_MAX_KEEPALIVE: int = int(os.getenv("HTTP_MAX_KEEPALIVE", 10))
+    
+    # Caché de /api/get-news (segundos)
+    NEWS_CACHE_TTL: float = float(os.getenv("NEWS_CACHE_TTL", 300))
+    NEWS_CACHE_STALE_TTL: float = float(os.getenv("NEWS_CACHE_STALE_TTL", 900))
+    
+    # Pipeline del agente: "batch" (por defecto) o "article" (debug, nodo a nodo)
+    NEWS_PIPELINE_MODE: str = os.getenv("NEWS_PIPELINE_MODE", "batch")
+    NEWS_SCAN_LIMIT: int = int(os.getenv("NEWS_SCAN_LIMIT", 50))
+    NEWS_MIN_RESULTS: int = int(os.getenv("NEWS_MIN_RESULTS", 9))
+    NEWS_MAX_RESULTS: int = int(os.getenv("NEWS_MAX_RESULTS", 12))
+    
+    # Paginación de NewsAPI: se piden más páginas solo si la primera no basta
+    NEWS_PAGE_SIZE: int = int(os.getenv("NEWS_PAGE_SIZE", 100))
+    NEWS_MAX_PAGES: int = int(os.getenv("NEWS_MAX_PAGES", 3))
+    
+    # Fetch incremental: marca de agua de publishedAt por consulta (`from` de NewsAPI)
+    # y resultados fusionados con los anteriores (como mucho NEWS_RESULT_SET_MAX por filtro)
+    NEWS_INCREMENTAL: bool = os.getenv("NEWS_INCREMENTAL", "True").lower() == "true"
+    NEWS_INCREMENTAL_DIR: str = os.getenv("NEWS_INCREMENTAL_DIR", "incremental_state")
+    NEWS_RESULT_SET_MAX: int = int(os.getenv("NEWS_RESULT_SET_MAX", 200))
+    
+    # Ranking por relevancia sobre todo el lote: keywords + recencia - repetición de fuente
+    # (los pesos y k también se pueden pasar por request en /api/get-news)
+    NEWS_RANKING: bool = os.getenv("NEWS_RANKING", "True").lower() == "true"
+    NEWS_RANK_WEIGHT_KEYWORDS: float = float(os.getenv("NEWS_RANK_WEIGHT_KEYWORDS", 1.0))
+    NEWS_RANK_WEIGHT_RECENCY: float = float(os.getenv("NEWS_RANK_WEIGHT_RECENCY", 1.0))
+    NEWS_RANK_WEIGHT_DIVERSITY: float = float(os.getenv("NEWS_RANK_WEIGHT_DIVERSITY", 0.3))
+    NEWS_RANK_HALF_LIFE_HOURS: float = float(os.getenv("NEWS_RANK_HALF_LIFE_HOURS", 24))
+    
+    # Fetch a NewsAPI: "union" (una consulta para los tres filtros) o "per_filter"
+    NEWS_FETCH_MODE: str = os.getenv("NEWS_FETCH_MODE", "union")
+    
+    # JSON opcional con keywords por categoría ({"ai": [...], "marketing": [...]})
+    NEWS_KEYWORDS_FILE: str = os.getenv("NEWS_KEYWORDS_FILE", "")
+    
+    # Enriquecimiento opcional con LLM (resumen + categoría), por lotes y cacheado en disco
+    LLM_ENRICHMENT: bool = os.getenv("LLM_ENRICHMENT", "False").lower() == "true"
+    LLM_ENRICHMENT_BACKEND: str = os.getenv("LLM_ENRICHMENT_BACKEND", "openai")  # "openai" o "fake"
+    LLM_BATCH_SIZE: int = int(os.getenv("LLM_BATCH_SIZE", 10))
+    LLM_MAX_CONCURRENCY: int = int(os.getenv("LLM_MAX_CONCURRENCY", 4))
+    LLM_CACHE_PATH: str = os.getenv("LLM_CACHE_PATH", "llm_cache.db")
+    
+    # Índice local de búsqueda full-text (/api/search)
+    SEARCH_INDEX_PATH: str = os.getenv("SEARCH_INDEX_PATH", "search_index.db")
+    SEARCH_RETENTION_DAYS: int = int(os.getenv("SEARCH_RETENTION_DAYS", 30))
+    
+    # Registro persistente de artículos ya vistos
+    SEEN_STORE_PATH: str = os.getenv("SEEN_STORE_PATH", "seen_articles.db")
+    SEEN_RETENTION_DAYS: int = int(os.getenv("SEEN_RETENTION_DAYS", 7))
+    SEEN_BLOOM_CAPACITY: int = int(os.getenv("SEEN_BLOOM_CAPACITY", 100000))
+    
+    # Modo de servicio de /api/get-news:
+    #   "live"     -> ejecutar el agente en cada request
+    #   "cache"    -> caché TTL en memoria con coalescing (por defecto)
+    #   "prefetch" -> servir solo desde el almacén local que refresca el prefetch
+    NEWS_SERVING_MODE: str = os.getenv("NEWS_SERVING_MODE", "cache")
+    
+    # Prefetch en segundo plano y almacén local de artículos
+    ARTICLE_STORE_DIR: str = os.getenv("ARTICLE_STORE_DIR", "article_store")
+    PREFETCH_IN_APP: bool = os.getenv("PREFETCH_IN_APP", "True").lower() == "true"
+    PREFETCH_MIN_INTERVAL: float = float(os.getenv("PREFETCH_MIN_INTERVAL", 300))
+    PREFETCH_QUOTA_RESERVE: int = int(os.getenv("PREFETCH_QUOTA_RESERVE", 10))
+    PREFETCH_TRAFFIC_HALF_LIFE: float = float(os.getenv("PREFETCH_TRAFFIC_HALF_LIFE", 1800))
+    
+    # Métricas Prometheus (/metrics): instantáneas por worker que se suman al exponerlas
+    METRICS_DIR: str = os.getenv("METRICS_DIR", "metrics")
+    METRICS_FLUSH_INTERVAL: float = float(os.getenv("METRICS_FLUSH_INTERVAL", 5))
+    # Fracción de logs por artículo emitidos a nivel DEBUG (modo "article")
+    LOG_ARTICLE_SAMPLE_RATE: float = float(os.getenv("LOG_ARTICLE_SAMPLE_RATE", 0.01))
+    
+    # Respuestas de /api/get-news: compresión (gzip o brotli si está instalado)
+    RESPONSE_COMPRESS_MIN_SIZE: int = int(os.getenv("RESPONSE_COMPRESS_MIN_SIZE", 500))
+    RESPONSE_GZIP_LEVEL: int = int(os.getenv("RESPONSE_GZIP_LEVEL", 6))
+    RESPONSE_BROTLI_QUALITY: int = int(os.getenv("RESPONSE_BROTLI_QUALITY", 5))
+    
+    # Proxy de miniaturas (/api/image/{hash}) con caché LRU en disco
+    IMAGE_PROXY: bool = os.getenv("IMAGE_PROXY", "True").lower() == "true"
+    IMAGE_CACHE_DIR: str = os.getenv("IMAGE_CACHE_DIR", "image_cache")
+    IMAGE_CACHE_MAX_BYTES: int = int(os.getenv("IMAGE_CACHE_MAX_BYTES", 200 * 1024 * 1024))
+    IMAGE_WIDTH: int = int(os.getenv("IMAGE_WIDTH", 400))  # Tamaño de las tarjetas del frontend
+    IMAGE_HEIGHT: int = int(os.getenv("IMAGE_HEIGHT", 250))
+    IMAGE_PREFETCH_CONCURRENCY: int = int(os.getenv("IMAGE_PREFETCH_CONCURRENCY", 8))
+    IMAGE_FETCH_TIMEOUT: float = float(os.getenv("IMAGE_FETCH_TIMEOUT", 5.0))
+    IMAGE_BASE_URL: str = os.getenv("IMAGE_BASE_URL", "")  # Prefijo de las URLs si la API va en otro dominio
+    # Solo para desarrollo/benchmarks: permitir imágenes de hosts locales o privados (riesgo de SSRF)
+    IMAGE_ALLOW_PRIVATE_HOSTS: bool = os.getenv("IMAGE_ALLOW_PRIVATE_HOSTS", "False").lower() == "true"
+    
+    # Arranque rápido (Cloud Run): abrir el puerto ya y crear el agente en segundo plano
+    FAST_START: bool = os.getenv("FAST_START", "False").lower() == "true"
     
     # Server
     HOST: str = os.getenv("HOST", "0.0.0.0")
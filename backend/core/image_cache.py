@@ -0,0 +1,454 @@
+"""
+Proxy de miniaturas con caché en disco direccionada por contenido
+
+- Cada URL de imagen de NewsAPI se registra al descargar la página y se
+  sirve como `/api/image/{clave}` (clave = hash de la URL). Solo se
+  descargan URLs registradas: el proxy no es abierto.
+- Las miniaturas se guardan una vez por hash de contenido (sha256), así que
+  la misma imagen publicada en varias URLs ocupa disco una sola vez.
+- Redimensionado al tamaño de las tarjetas del frontend con Pillow (en
+  requirements.txt); si falta, se guarda el original y se avisa al arrancar.
+- Expulsión LRU por bytes totales y descargas con concurrencia acotada.
+- Las URLs vienen de los medios (`urlToImage`): solo se descargan de hosts
+  que resuelven a IPs públicas, comprobándolo también en cada redirección
+  (sin peticiones a loopback, redes privadas, link-local...). La conexión
+  va a la IP ya comprobada (Host y SNI con el nombre original), así que una
+  segunda resolución DNS no puede cambiar el destino (DNS rebinding).
+
+El índice vive en SQLite (WAL) y los ficheros en disco, compartidos entre
+workers como el resto de almacenes locales.
+"""
+
+import asyncio
+import hashlib
+import io
+import ipaddress
+import logging
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import urljoin, urlsplit
+
+import httpx
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # pragma: no cover - sin Pillow no se redimensiona
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+IMAGE_KEY_RE = re.compile(r"^[0-9a-f]{32}$")
+
+PLACEHOLDER_KEY = "placeholder"
+
+# Placeholder local (sin peticiones a terceros) con la proporción de las tarjetas
+PLACEHOLDER_SVG = b"""<svg xmlns="http://www.w3.org/2000/svg" width="400" height="250" viewBox="0 0 400 250">
+<defs><linearGradient id="g" x1="0" y1="0" x2="1" y2="1">
+<stop offset="0" stop-color="#e0e7ff"/><stop offset="1" stop-color="#f5f3ff"/></linearGradient></defs>
+<rect width="400" height="250" fill="url(#g)"/>
+<g fill="none" stroke="#a5b4fc" stroke-width="6" stroke-linejoin="round">
+<rect x="160" y="90" width="80" height="60" rx="8"/><path d="M168 142l20-22 14 14 10-10 20 18"/></g>
+<circle cx="222" cy="106" r="6" fill="#a5b4fc"/>
+</svg>"""
+PLACEHOLDER_MEDIA_TYPE = "image/svg+xml"
+
+
+def _is_public(address: str) -> bool:
+    ip = ipaddress.ip_address(address.split("%", 1)[0])
+    if isinstance(ip, ipaddress.IPv6Address) and ip.ipv4_mapped is not None:
+        ip = ip.ipv4_mapped
+    return ip.is_global and not ip.is_multicast
+
+
+async def check_public_url(url: str) -> List[str]:
+    """
+    IPs (públicas) a las que resuelve el host de la URL
+
+    ValueError si la URL no es http(s) o su host resuelve a alguna IP no pública.
+    """
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise ValueError(f"URL de imagen no válida: {url}")
+    port = parts.port or (443 if parts.scheme == "https" else 80)
+    try:
+        infos = await asyncio.get_running_loop().getaddrinfo(parts.hostname, port)
+    except OSError as e:
+        raise ValueError(f"no se pudo resolver {parts.hostname}: {e}")
+    addresses = list(dict.fromkeys(info[4][0] for info in infos))
+    if not addresses or not all(_is_public(address) for address in addresses):
+        raise ValueError(f"host no público: {parts.hostname}")
+    return addresses
+
+
+def pinned_request(url: str, address: str) -> Tuple[str, Dict[str, str], Dict[str, str]]:
+    """
+    (URL, cabeceras, extensiones de httpx) para pedir `url` conectando a `address`
+
+    El Host y el SNI (y con él la verificación del certificado) siguen siendo
+    los del nombre original; solo cambia la IP a la que se conecta.
+    """
+    parts = urlsplit(url)
+    host = address.split("%", 1)[0]
+    if ":" in host:
+        host = f"[{host}]"
+    netloc = f"{host}:{parts.port}" if parts.port else host
+    pinned = parts._replace(netloc=netloc).geturl()
+    headers = {"Host": parts.netloc.rsplit("@", 1)[-1]}
+    extensions = {"sni_hostname": parts.hostname} if parts.scheme == "https" else {}
+    return pinned, headers, extensions
+
+
+def image_key(url: str) -> str:
+    """Clave estable de una URL de imagen (la que aparece en /api/image/{clave})"""
+    return hashlib.sha256(url.strip().encode("utf-8")).hexdigest()[:32]
+
+
+class ImageCache:
+    """Índice URL -> contenido y ficheros de miniaturas, con LRU por bytes totales"""
+
+    # No reescribir last_access en cada hit: basta con esta resolución (segundos)
+    ACCESS_RESOLUTION = 60
+
+    def __init__(
+        self,
+        directory: str,
+        max_bytes: int = 200 * 1024 * 1024,
+        retry_after: float = 3600,
+        source_retention_days: int = 7
+    ):
+        self.directory = directory
+        self.blob_dir = os.path.join(directory, "blobs")
+        self.max_bytes = max_bytes
+        self.retry_after = retry_after
+        self.source_retention_days = source_retention_days
+        os.makedirs(self.blob_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            os.path.join(directory, "images.db"), check_same_thread=False, timeout=10
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS sources (
+                url_key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                content_hash TEXT,
+                failed_at REAL,
+                registered_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_sources_content ON sources (content_hash);
+            CREATE TABLE IF NOT EXISTS blobs (
+                content_hash TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                media_type TEXT NOT NULL,
+                last_access REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_blobs_last_access ON blobs (last_access);
+            """
+        )
+        self._conn.commit()
+
+    def _blob_path(self, content_hash: str) -> str:
+        return os.path.join(self.blob_dir, content_hash[:2], content_hash)
+
+    def register(self, urls: Iterable[Optional[str]]) -> List[str]:
+        """Registrar URLs de imagen (http/https) para poder servirlas por su clave"""
+        now = time.time()
+        rows = {}
+        for url in urls:
+            if url and url.startswith(("http://", "https://")):
+                rows[image_key(url)] = url
+        if not rows:
+            return []
+
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO sources (url_key, url, registered_at) VALUES (?, ?, ?)",
+                [(key, url, now) for key, url in rows.items()]
+            )
+            self._conn.commit()
+        return list(rows)
+
+    def source_url(self, key: str) -> Optional[str]:
+        """URL original de una clave, salvo que su última descarga fallara hace poco"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, failed_at FROM sources WHERE url_key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        url, failed_at = row
+        if failed_at is not None and time.time() - failed_at < self.retry_after:
+            return None
+        return url
+
+    def get(self, key: str) -> Optional[Tuple[bytes, str, str]]:
+        """(cuerpo, media type, hash de contenido) si la miniatura está en disco"""
+        with self._lock:
+            row = self._conn.execute(
+                """
+                SELECT b.content_hash, b.media_type, b.last_access
+                FROM sources s JOIN blobs b ON b.content_hash = s.content_hash
+                WHERE s.url_key = ?
+                """,
+                (key,)
+            ).fetchone()
+        if row is None:
+            return None
+
+        content_hash, media_type, last_access = row
+        try:
+            with open(self._blob_path(content_hash), "rb") as f:
+                body = f.read()
+        except FileNotFoundError:
+            # Expulsado por otro worker entre la consulta y la lectura
+            return None
+
+        now = time.time()
+        if now - last_access > self.ACCESS_RESOLUTION:
+            with self._lock:
+                self._conn.execute(
+                    "UPDATE blobs SET last_access = ? WHERE content_hash = ?", (now, content_hash)
+                )
+                self._conn.commit()
+        return body, media_type, content_hash
+
+    def put(self, key: str, body: bytes, media_type: str) -> str:
+        """Guardar la miniatura de una clave (una sola copia por contenido) y expulsar si hace falta"""
+        content_hash = hashlib.sha256(body).hexdigest()
+        path = self._blob_path(content_hash)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(body)
+                os.replace(tmp_path, path)
+            except Exception:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT INTO blobs (content_hash, size, media_type, last_access) VALUES (?, ?, ?, ?)
+                ON CONFLICT (content_hash) DO UPDATE SET last_access = excluded.last_access
+                """,
+                (content_hash, len(body), media_type, now)
+            )
+            self._conn.execute(
+                "UPDATE sources SET content_hash = ?, failed_at = NULL WHERE url_key = ?",
+                (content_hash, key)
+            )
+            self._conn.commit()
+            self._evict_locked(now)
+        return content_hash
+
+    def mark_failed(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("UPDATE sources SET failed_at = ? WHERE url_key = ?", (time.time(), key))
+            self._conn.commit()
+
+    def total_bytes(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+
+    def _evict_locked(self, now: float) -> None:
+        """Expulsar las miniaturas menos usadas hasta quedar por debajo del límite"""
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        evicted: List[str] = []
+        for content_hash, size in self._conn.execute(
+            "SELECT content_hash, size FROM blobs ORDER BY last_access"
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            evicted.append(content_hash)
+            total -= size
+
+        self._conn.executemany("DELETE FROM blobs WHERE content_hash = ?", [(h,) for h in evicted])
+        self._conn.executemany(
+            "UPDATE sources SET content_hash = NULL WHERE content_hash = ?", [(h,) for h in evicted]
+        )
+        # URLs registradas que nunca se pidieron: no crecer sin límite
+        self._conn.execute(
+            "DELETE FROM sources WHERE content_hash IS NULL AND registered_at < ?",
+            (now - self.source_retention_days * 86400,)
+        )
+        self._conn.commit()
+
+        for content_hash in evicted:
+            try:
+                os.remove(self._blob_path(content_hash))
+            except FileNotFoundError:
+                pass
+        logger.info(f"🧹 Caché de imágenes: {len(evicted)} miniaturas expulsadas (LRU)")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM blobs").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def resize_thumbnail(body: bytes, width: int, height: int, quality: int = 80) -> Tuple[bytes, str]:
+    """Recortar y escalar al tamaño de tarjeta (JPEG); requiere Pillow"""
+    with Image.open(io.BytesIO(body)) as source:
+        thumbnail = ImageOps.fit(source.convert("RGB"), (width, height), Image.LANCZOS)
+    output = io.BytesIO()
+    thumbnail.save(output, format="JPEG", quality=quality, optimize=True, progressive=True)
+    return output.getvalue(), "image/jpeg"
+
+
+class ImageProxy:
+    """
+    Descarga, redimensiona y sirve miniaturas registradas, con coalescing por
+    clave y un semáforo que acota las descargas concurrentes del worker.
+    """
+
+    def __init__(
+        self,
+        cache: ImageCache,
+        http_client: Optional[httpx.AsyncClient] = None,
+        max_concurrency: int = 8,
+        width: int = 400,
+        height: int = 250,
+        max_source_bytes: int = 5 * 1024 * 1024,
+        base_url: str = "",
+        max_redirects: int = 3,
+        allow_private_hosts: bool = False
+    ):
+        self.cache = cache
+        # Las redirecciones se siguen a mano para validar cada destino
+        self.http_client = http_client or httpx.AsyncClient(timeout=5.0)
+        self.width = width
+        self.height = height
+        self.max_source_bytes = max_source_bytes
+        self.base_url = base_url.rstrip("/")
+        self.max_redirects = max_redirects
+        self.allow_private_hosts = allow_private_hosts
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._background: Set[asyncio.Task] = set()
+        self.stats = {"hits": 0, "downloads": 0, "failures": 0}
+        if Image is None:
+            logger.warning("⚠️ Pillow no instalado: las miniaturas se guardan sin redimensionar")
+
+    @property
+    def placeholder_url(self) -> str:
+        return f"{self.base_url}/api/image/{PLACEHOLDER_KEY}"
+
+    def url_for(self, source_url: Optional[str]) -> str:
+        """URL pública de la miniatura de una imagen de NewsAPI (o del placeholder)"""
+        if not source_url or not source_url.startswith(("http://", "https://")):
+            return self.placeholder_url
+        return f"{self.base_url}/api/image/{image_key(source_url)}"
+
+    async def register(self, urls: Iterable[Optional[str]]) -> List[str]:
+        return await asyncio.to_thread(self.cache.register, list(urls))
+
+    async def get(self, key: str) -> Optional[Tuple[bytes, str, str]]:
+        """Miniatura de una clave registrada (descargándola si no está en disco)"""
+        cached = await asyncio.to_thread(self.cache.get, key)
+        if cached is not None:
+            self.stats["hits"] += 1
+            return cached
+
+        # Un único download por clave aunque la pidan varias requests a la vez
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._download(key))
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(future)
+
+    async def _download(self, key: str) -> Optional[Tuple[bytes, str, str]]:
+        url = await asyncio.to_thread(self.cache.source_url, key)
+        if url is None:
+            return None
+
+        try:
+            async with self._semaphore:
+                body, media_type = await self._fetch(url)
+            if Image is not None:
+                body, media_type = await asyncio.to_thread(resize_thumbnail, body, self.width, self.height)
+            content_hash = await asyncio.to_thread(self.cache.put, key, body, media_type)
+            self.stats["downloads"] += 1
+            return body, media_type, content_hash
+        except Exception as e:
+            self.stats["failures"] += 1
+            logger.warning(f"⚠️ Imagen no disponible ({url}): {str(e)}")
+            await asyncio.to_thread(self.cache.mark_failed, key)
+            return None
+
+    async def _fetch(self, url: str) -> Tuple[bytes, str]:
+        """Descargar la imagen original con límite de tamaño y tipo image/*"""
+        for _ in range(self.max_redirects + 1):
+            if self.allow_private_hosts:
+                request_url, headers, extensions = url, {}, {}
+            else:
+                addresses = await check_public_url(url)
+                request_url, headers, extensions = pinned_request(url, addresses[0])
+            async with self.http_client.stream(
+                "GET", request_url, headers=headers, extensions=extensions, follow_redirects=False
+            ) as response:
+                if response.is_redirect:
+                    # Relativa a la URL original (la de la respuesta lleva la IP)
+                    url = urljoin(url, response.headers["location"])
+                    continue
+                return await self._read_image(response)
+        raise ValueError(f"más de {self.max_redirects} redirecciones")
+
+    async def _read_image(self, response: httpx.Response) -> Tuple[bytes, str]:
+        response.raise_for_status()
+        media_type = response.headers.get("content-type", "").split(";")[0].strip().lower()
+        if not media_type.startswith("image/"):
+            raise ValueError(f"tipo de contenido no válido: {media_type or 'desconocido'}")
+
+        chunks = []
+        size = 0
+        async for chunk in response.aiter_bytes():
+            size += len(chunk)
+            if size > self.max_source_bytes:
+                raise ValueError(f"imagen mayor de {self.max_source_bytes} bytes")
+            chunks.append(chunk)
+        return b"".join(chunks), media_type
+
+    async def prefetch(self, keys: Iterable[str]) -> int:
+        """Descargar las miniaturas de `keys` (concurrencia acotada por el semáforo)"""
+        results = await asyncio.gather(*(self.get(key) for key in dict.fromkeys(keys)))
+        return sum(result is not None for result in results)
+
+    def schedule_prefetch(self, image_urls: Iterable[str]) -> None:
+        """Calentar en segundo plano las miniaturas de artículos ya seleccionados"""
+        prefix = f"{self.base_url}/api/image/"
+        keys = [
+            url[len(prefix):] for url in image_urls
+            if url and url.startswith(prefix) and IMAGE_KEY_RE.match(url[len(prefix):])
+        ]
+        if not keys:
+            return
+        task = asyncio.create_task(self.prefetch(keys))
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def aclose(self) -> None:
+        """Cancelar prefetch y descargas pendientes antes de cerrar el cliente y el índice"""
+        pending = list(self._background) + list(self._inflight.values())
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        await self.http_client.aclose()
+        self.cache.close()
@@ -0,0 +1,155 @@
+"""
+Estado del fetch incremental de NewsAPI, por consulta
+
+Para cada consulta se guarda la marca de agua (el `publishedAt` más
+reciente ya procesado, que se pasa como `from` en el siguiente fetch) y el
+conjunto de resultados aceptados por filtro, ordenado del más reciente al
+más antiguo. Así cada refresco solo clasifica y deduplica los artículos
+nuevos y los fusiona con los anteriores en vez de sustituirlos.
+
+NewsAPI devuelve primero lo más reciente: si un refresco se queda sin
+páginas con artículos pendientes, lo que falta es más antiguo que lo
+descargado. La marca de agua no avanza entonces; se guarda `backfill_to`
+(el artículo más antiguo descargado, `to` del siguiente fetch) y `newest`
+(el más reciente visto), y la marca salta a `newest` cuando el hueco queda
+cubierto.
+
+Un fichero JSON por consulta escrito de forma atómica (temporal + rename),
+como el almacén de artículos. La lectura-fusión-escritura de cada
+refresco se hace bajo `lock(query)`, un lock entre procesos por consulta.
+Cada proceso decodifica el fichero una vez por versión: mientras no cambie
+(mismo inode, mtime y tamaño) `load` solo hace un stat().
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin lock entre procesos
+    fcntl = None
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dependencia opcional
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+
+class IncrementalStore:
+    """Marca de agua y resultados acumulados por consulta de NewsAPI"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        # consulta -> (firma del fichero, estado decodificado)
+        self._cache: Dict[str, Tuple[Tuple[int, int, int], Dict[str, Any]]] = {}
+
+    def _path(self, query: str) -> str:
+        key = hashlib.blake2b(query.encode("utf-8"), digest_size=12).hexdigest()
+        return os.path.join(self.directory, f"{key}.json")
+
+    @contextmanager
+    def lock(self, query: str) -> Iterator[None]:
+        """Lock bloqueante entre procesos para leer, fusionar y guardar el estado de una consulta"""
+        if fcntl is None:
+            yield
+            return
+
+        lock_file = open(self._path(query)[:-len(".json")] + ".lock", "w")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+        finally:
+            lock_file.close()
+
+    def load(self, query: str) -> Dict[str, Any]:
+        """
+        Estado de la consulta: {"watermark": str | None, "backfill_to": str | None,
+        "newest": str | None, "results": {filtro: [...]}, "updated_at": float | None}
+
+        Sin estado (o ilegible) equivale a un fetch completo. `updated_at`
+        identifica la versión guardada.
+        """
+        empty = {"watermark": None, "backfill_to": None, "newest": None, "results": {}, "updated_at": None}
+        path = self._path(query)
+        try:
+            stat = os.stat(path)
+            cached = self._cache.get(query)
+            if cached is not None and cached[0] == (stat.st_ino, stat.st_mtime_ns, stat.st_size):
+                state = cached[1]
+            else:
+                with open(path, "rb") as f:
+                    # Firma del fichero abierto: pudo reemplazarse entre el stat() y el open()
+                    stat = os.fstat(f.fileno())
+                    data = f.read()
+                state = orjson.loads(data) if orjson is not None else json.loads(data)
+                with self._lock:
+                    self._cache[query] = ((stat.st_ino, stat.st_mtime_ns, stat.st_size), state)
+        except FileNotFoundError:
+            return empty
+        except Exception as e:
+            logger.warning(f"Estado incremental ilegible, fetch completo: {e}")
+            return empty
+        # Copia del primer nivel: los llamadores no deben modificar las listas de resultados
+        return {
+            "watermark": state.get("watermark"),
+            "backfill_to": state.get("backfill_to"),
+            "newest": state.get("newest"),
+            "results": dict(state.get("results", {})),
+            "updated_at": state.get("updated_at")
+        }
+
+    def save(
+        self,
+        query: str,
+        watermark: str,
+        results: Dict[str, List[Dict]],
+        backfill_to: Optional[str] = None,
+        newest: Optional[str] = None
+    ) -> float:
+        """Guardar de forma atómica la nueva marca de agua y los resultados fusionados (devuelve la versión)"""
+        updated_at = time.time()
+        state = {
+            "query": query, "watermark": watermark, "backfill_to": backfill_to, "newest": newest,
+            "results": results, "updated_at": updated_at
+        }
+        data = orjson.dumps(state) if orjson is not None else json.dumps(state).encode("utf-8")
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".state.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, self._path(query))
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return updated_at
+
+    def reset(self, query: Optional[str] = None) -> None:
+        """Olvidar el estado de una consulta (o de todas): el siguiente fetch es completo"""
+        paths = [self._path(query)] if query is not None else [
+            os.path.join(self.directory, name) for name in os.listdir(self.directory) if name.endswith(".json")
+        ]
+        for path in paths:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        with self._lock:
+            if query is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(query, None)
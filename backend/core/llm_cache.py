@@ -0,0 +1,82 @@
+"""
+Caché en disco (SQLite) de los resultados de enriquecimiento con LLM
+
+La clave es un hash del contenido del artículo (título + descripción) y de
+la versión del prompt/modelo, de modo que el mismo artículo nunca se paga
+dos veces aunque llegue con otra URL, desde otro filtro o tras reiniciar.
+"""
+
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def content_key(title: Optional[str], description: Optional[str], namespace: str = "") -> str:
+    """Hash estable del contenido del artículo (normalizado) dentro de un namespace"""
+    normalized = " ".join(f"{title or ''}\x00{description or ''}".lower().split())
+    return hashlib.sha256(f"{namespace}\x01{normalized}".encode("utf-8")).hexdigest()
+
+
+class LLMResultCache:
+    """Resultados de enriquecimiento por hash de contenido, compartidos entre workers"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS llm_results (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Dict]:
+        """Resultados guardados para las claves pedidas (solo las que existen)"""
+        keys = list(dict.fromkeys(keys))
+        found: Dict[str, Dict] = {}
+
+        with self._lock:
+            # Por tramos para no superar el límite de parámetros de SQLite
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, value FROM llm_results WHERE key IN ({placeholders})", chunk
+                ).fetchall()
+                for key, value in rows:
+                    found[key] = json.loads(value)
+
+        return found
+
+    def put_many(self, values: Dict[str, Dict]) -> None:
+        """Guardar resultados nuevos (las claves existentes se respetan)"""
+        if not values:
+            return
+
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO llm_results (key, value, created_at) VALUES (?, ?, ?)",
+                [(key, json.dumps(value), now) for key, value in values.items()]
+            )
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM llm_results").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
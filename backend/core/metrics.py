@@ -0,0 +1,377 @@
+"""
+Métricas en formato Prometheus, agregadas entre los workers de uvicorn
+
+Cada worker acumula contadores e histogramas en memoria (sin I/O en la ruta
+caliente) y vuelca periódicamente una instantánea a METRICS_DIR con
+escritura atómica. `/metrics` suma las instantáneas de todos los workers,
+como el modo multiproceso de prometheus_client pero sin dependencias.
+
+Las instantáneas llevan el PID del worker (y su instante de arranque, para
+no confundir un PID reutilizado con el worker original). Las de procesos
+que ya no existen se suman, bajo un lock, a un agregado persistente
+(`metrics-dead.json`) antes de borrarlas, como el modo multiproceso de
+prometheus_client: si un worker se reinicia, los contadores no bajan y
+Prometheus no ve un reset. Solo cuando arranca el servidor entero (no
+queda ningún worker vivo) se empieza de cero, arranque como se arranque
+(`python main.py`, `uvicorn main:app`, gunicorn...).
+"""
+
+import asyncio
+import functools
+import glob
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin lock entre procesos
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Buckets por defecto de Prometheus (segundos)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+# Agregado de los workers que ya terminaron (coincide con el glob de instantáneas)
+DEAD_SNAPSHOT = "metrics-dead.json"
+
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(labels: Iterable[Tuple[str, str]]) -> str:
+    parts = []
+    for name, value in labels:
+        escaped = value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        parts.append(f'{name}="{escaped}"')
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class MetricsRegistry:
+    """Contadores e histogramas del proceso, con volcado a disco para agregarlos"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # nombre -> (tipo, ayuda, buckets)
+        self._definitions: Dict[str, Tuple[str, str, Tuple[float, ...]]] = {}
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._histograms: Dict[str, Dict[LabelKey, Dict[str, Any]]] = {}
+
+    # --- Definición y registro ------------------------------------------------
+
+    def counter(self, name: str, help_text: str) -> None:
+        self._definitions[name] = ("counter", help_text, ())
+        self._counters.setdefault(name, {})
+
+    def histogram(self, name: str, help_text: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self._definitions[name] = ("histogram", help_text, tuple(buckets))
+        self._histograms.setdefault(name, {})
+
+    def inc(self, name: str, value: float = 1.0, **labels) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters[name]
+            series[key] = series.get(key, 0.0) + value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        key = _label_key(labels)
+        buckets = self._definitions[name][2]
+        with self._lock:
+            series = self._histograms[name].get(key)
+            if series is None:
+                series = {"buckets": [0] * len(buckets), "sum": 0.0, "count": 0}
+                self._histograms[name][key] = series
+            for index, bound in enumerate(buckets):
+                if value <= bound:
+                    series["buckets"][index] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    # --- Instantáneas y agregación -------------------------------------------
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Estado del proceso serializable a JSON"""
+        with self._lock:
+            return {
+                "start": _process_start(os.getpid()),
+                "counters": {
+                    name: [[list(key), value] for key, value in series.items()]
+                    for name, series in self._counters.items()
+                },
+                "histograms": {
+                    name: [[list(key), dict(value, buckets=list(value["buckets"]))] for key, value in series.items()]
+                    for name, series in self._histograms.items()
+                },
+            }
+
+    def write_snapshot(self, directory: str) -> None:
+        """Volcar la instantánea del worker (escritura atómica, un fichero por PID)"""
+        os.makedirs(directory, exist_ok=True)
+        _write_json(directory, f"metrics-{os.getpid()}.json", self.snapshot())
+
+    def _merge(self, snapshots: List[Dict[str, Any]]) -> Tuple[Dict, Dict]:
+        counters: Dict[str, Dict[LabelKey, float]] = {}
+        histograms: Dict[str, Dict[LabelKey, Dict[str, Any]]] = {}
+
+        for snapshot in snapshots:
+            for name, series in snapshot.get("counters", {}).items():
+                merged = counters.setdefault(name, {})
+                for key, value in series:
+                    key = tuple(tuple(pair) for pair in key)
+                    merged[key] = merged.get(key, 0.0) + value
+            for name, series in snapshot.get("histograms", {}).items():
+                merged = histograms.setdefault(name, {})
+                for key, value in series:
+                    key = tuple(tuple(pair) for pair in key)
+                    current = merged.get(key)
+                    if current is None:
+                        merged[key] = {"buckets": list(value["buckets"]), "sum": value["sum"], "count": value["count"]}
+                    else:
+                        current["buckets"] = [a + b for a, b in zip(current["buckets"], value["buckets"])]
+                        current["sum"] += value["sum"]
+                        current["count"] += value["count"]
+
+        return counters, histograms
+
+    def collect(self, directory: Optional[str] = None) -> Tuple[Dict, Dict]:
+        """Series de todos los workers (o solo de este proceso si no hay directorio)"""
+        if not directory:
+            return self._merge([self.snapshot()])
+
+        # La instantánea propia siempre al día; las demás, tal como las volcó cada worker.
+        # Bajo el lock: un worker muerto no se cuenta dos veces mientras se agrega
+        self.write_snapshot(directory)
+        with _snapshots_lock(directory):
+            fold_dead_snapshots(directory)
+            snapshots = []
+            for path in glob.glob(os.path.join(directory, "metrics-*.json")):
+                snapshot = _read_json(path)
+                if snapshot is not None:
+                    snapshots.append(snapshot)
+        return self._merge(snapshots)
+
+    def render(self, directory: Optional[str] = None, gauges: Optional[Dict[str, Tuple[str, float]]] = None) -> str:
+        """
+        Exposición en formato de texto de Prometheus
+
+        Args:
+            directory: Directorio de instantáneas compartido entre workers
+            gauges: Valores puntuales calculados en el momento {nombre: (ayuda, valor)}
+        """
+        counters, histograms = self.collect(directory)
+        lines: List[str] = []
+
+        for name, (kind, help_text, buckets) in sorted(self._definitions.items()):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+            if kind == "counter":
+                for key, value in sorted(counters.get(name, {}).items()):
+                    lines.append(f"{name}{_format_labels(key)} {value}")
+                continue
+
+            for key, series in sorted(histograms.get(name, {}).items()):
+                for bound, count in zip(buckets, series["buckets"]):
+                    lines.append(f"{name}_bucket{_format_labels(key + (('le', repr(bound)),))} {count}")
+                lines.append(f"{name}_bucket{_format_labels(key + (('le', '+Inf'),))} {series['count']}")
+                lines.append(f"{name}_sum{_format_labels(key)} {series['sum']}")
+                lines.append(f"{name}_count{_format_labels(key)} {series['count']}")
+
+        for name, (help_text, value) in sorted((gauges or {}).items()):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {value}")
+
+        return "\n".join(lines) + "\n"
+
+    async def flush_forever(self, directory: str, interval: float) -> None:
+        """Volcar la instantánea del worker cada `interval` segundos"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(self.write_snapshot, directory)
+            except Exception as e:
+                logger.warning(f"⚠️ Error volcando métricas: {str(e)}")
+
+
+def _write_json(directory: str, name: str, data: Dict[str, Any]) -> None:
+    """Escritura atómica (temporal + rename) de un fichero JSON del directorio"""
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".metrics.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, os.path.join(directory, name))
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _read_json(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning(f"Instantánea de métricas ilegible '{path}': {e}")
+        return None
+
+
+@contextmanager
+def _snapshots_lock(directory: str) -> Iterator[None]:
+    """Lock bloqueante entre procesos sobre las instantáneas del directorio"""
+    if fcntl is None:
+        yield
+        return
+
+    lock_file = open(os.path.join(directory, ".metrics.lock"), "w")
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+    finally:
+        lock_file.close()
+
+
+def _process_start(pid: int) -> Optional[str]:
+    """Instante de arranque del proceso (Linux, /proc), para detectar PIDs reutilizados"""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            # El nombre del proceso va entre paréntesis y puede contener espacios
+            return f.read().rsplit(")", 1)[1].split()[19]
+    except (OSError, IndexError):
+        return None
+
+
+def _pid_alive(pid: int, start: Optional[str] = None) -> bool:
+    if os.name == "nt":
+        # En Windows os.kill(pid, 0) terminaría el proceso: se da por vivo
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    # Mismo PID pero otro proceso: el worker original ya terminó
+    return start is None or _process_start(pid) in (None, start)
+
+
+def _dead_snapshots(directory: str) -> Tuple[List[Tuple[str, Dict[str, Any]]], bool]:
+    """Instantáneas de workers que ya no existen, y si queda alguno vivo"""
+    dead = []
+    any_alive = False
+    for path in glob.glob(os.path.join(directory, "metrics-*.json")):
+        pid = os.path.basename(path)[len("metrics-"):-len(".json")]
+        if not pid.isdigit():
+            continue
+        snapshot = _read_json(path)
+        if snapshot is None:
+            continue
+        if _pid_alive(int(pid), snapshot.get("start")):
+            any_alive = True
+        else:
+            dead.append((path, snapshot))
+    return dead, any_alive
+
+
+def _fold(directory: str, dead: List[Tuple[str, Dict[str, Any]]]) -> None:
+    """Sumar las instantáneas muertas al agregado persistente y borrarlas (con el lock tomado)"""
+    if not dead:
+        return
+    snapshots = [snapshot for _, snapshot in dead]
+    aggregate = _read_json(os.path.join(directory, DEAD_SNAPSHOT))
+    if aggregate is not None:
+        snapshots.append(aggregate)
+    counters, histograms = metrics._merge(snapshots)
+    _write_json(directory, DEAD_SNAPSHOT, {
+        "counters": {name: [[list(key), value] for key, value in series.items()] for name, series in counters.items()},
+        "histograms": {name: [[list(key), value] for key, value in series.items()] for name, series in histograms.items()},
+    })
+    # Solo después de guardar el agregado: si falla la escritura no se pierde nada
+    for path, _ in dead:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def fold_dead_snapshots(directory: str) -> int:
+    """Agregar y borrar las instantáneas de workers que ya no existen (con el lock tomado); devuelve cuántas"""
+    dead, _ = _dead_snapshots(directory)
+    _fold(directory, dead)
+    return len(dead)
+
+
+def prepare_snapshots(directory: str) -> None:
+    """
+    Al arrancar cada worker, antes de empezar a volcar sus métricas
+
+    Si no queda ningún worker vivo es el arranque del servidor entero: se
+    borran las instantáneas y el agregado de la ejecución anterior. Si no
+    (un worker reiniciado), las de los muertos se agregan. La instantánea
+    inicial del worker se escribe bajo el mismo lock, para que los demás
+    que arranquen a la vez ya lo vean vivo.
+    """
+    os.makedirs(directory, exist_ok=True)
+    with _snapshots_lock(directory):
+        dead, any_alive = _dead_snapshots(directory)
+        if any_alive:
+            _fold(directory, dead)
+        else:
+            _remove_snapshots(directory)
+        metrics.write_snapshot(directory)
+
+
+def _remove_snapshots(directory: str) -> None:
+    for path in glob.glob(os.path.join(directory, "metrics-*.json")):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def clear_snapshots(directory: str) -> None:
+    """Borrar instantáneas y agregado de ejecuciones anteriores (al arrancar el servidor, antes de los workers)"""
+    with _snapshots_lock(directory):
+        _remove_snapshots(directory)
+
+
+# Registro del proceso y métricas de la aplicación
+metrics = MetricsRegistry()
+metrics.histogram("news_graph_node_duration_seconds", "Duración de cada nodo del grafo LangGraph")
+metrics.histogram("news_upstream_request_duration_seconds", "Duración de las llamadas HTTP a NewsAPI")
+metrics.counter("news_upstream_requests_total", "Llamadas a NewsAPI por código de estado")
+metrics.counter("news_graph_runs_total", "Ejecuciones del grafo por pipeline, filtro y uso de datos de ejemplo")
+metrics.counter("news_articles_returned_total", "Artículos devueltos por el agente, por filtro")
+metrics.counter("news_quota_requests_total", "Requests de cuota de NewsAPI gastadas por el grafo")
+
+
+def timed_node(name: str, pipeline: str, node: Callable[[Any], Awaitable[Any]]) -> Callable[[Any], Awaitable[Any]]:
+    """Envolver un nodo async del grafo para medir su duración"""
+    @functools.wraps(node)
+    async def wrapper(state):
+        start = time.perf_counter()
+        try:
+            return await node(state)
+        finally:
+            metrics.observe(
+                "news_graph_node_duration_seconds",
+                time.perf_counter() - start,
+                node=name,
+                pipeline=pipeline
+            )
+
+    return wrapper
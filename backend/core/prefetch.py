@@ -0,0 +1,264 @@
+"""
+Prefetch en segundo plano: mantiene caliente el almacén local de artículos
+
+El planificador reparte la cuota diaria restante entre los filtros en
+función de su tráfico reciente (con decaimiento exponencial), de modo que
+los filtros más consultados se refrescan más a menudo sin agotar nunca la
+cuota. Con un `union_loader` (fetch "union") todos los filtros se refrescan
+juntos con una sola consulta y la cuota entera se dedica a ese refresco. Puede ejecutarse dentro del lifespan de FastAPI o como proceso
+aparte (`prefetch_worker.py`).
+"""
+
+import asyncio
+import logging
+import math
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Set
+
+from core.article_store import ArticleStore
+from core.quota import QuotaLedger
+
+logger = logging.getLogger(__name__)
+
+# Carga de un filtro: devuelve {"news": [...], "used_sample": bool}
+Loader = Callable[[str], Awaitable[Dict[str, Any]]]
+# Carga de todos los filtros a la vez: devuelve {filtro: {"news": [...], "used_sample": bool}}
+UnionLoader = Callable[[], Awaitable[Dict[str, Dict[str, Any]]]]
+
+
+def _upstream(result: Dict[str, Any]) -> Dict[str, int]:
+    """Páginas y cuota de NewsAPI de la carga, publicadas con el snapshot"""
+    return {"pages": result.get("pages", 0), "quota_used": result.get("quota_used", 0)}
+
+
+class PrefetchScheduler:
+    """Refresca cada filtro en el almacén según un plan basado en cuota y tráfico"""
+
+    def __init__(
+        self,
+        loader: Loader,
+        store: ArticleStore,
+        quota: QuotaLedger,
+        filters: Iterable[str] = ("ai", "marketing", "both"),
+        min_interval: float = 300,
+        quota_reserve: int = 10,
+        traffic_half_life: float = 1800,
+        base_weight: float = 1.0,
+        tick: float = 5.0,
+        union_loader: Optional[UnionLoader] = None
+    ):
+        self.loader = loader
+        self.union_loader = union_loader
+        self.store = store
+        self.quota = quota
+        self.filters = tuple(filters)
+        self.min_interval = min_interval
+        self.quota_reserve = quota_reserve
+        self.traffic_half_life = traffic_half_life
+        self.base_weight = base_weight
+        self.tick = tick
+
+        self._traffic: Dict[str, float] = {f: 0.0 for f in self.filters}
+        self._traffic_updated = time.monotonic()
+        self._urgent: Set[str] = set()
+        self._task: Optional[asyncio.Task] = None
+        self.refresh_counts: Dict[str, int] = {f: 0 for f in self.filters}
+
+    # --- Tráfico -------------------------------------------------------------
+
+    def _decay_traffic(self) -> None:
+        now = time.monotonic()
+        factor = math.exp(-(now - self._traffic_updated) * math.log(2) / self.traffic_half_life)
+        for filter_type in self._traffic:
+            self._traffic[filter_type] *= factor
+        self._traffic_updated = now
+
+    def record_request(self, filter_type: str) -> None:
+        """Registrar una request de usuario para el filtro"""
+        if filter_type in self._traffic:
+            self._decay_traffic()
+            self._traffic[filter_type] += 1
+
+    def request_refresh(self, filter_type: str) -> None:
+        """Pedir un refresco prioritario (p. ej. el filtro aún no tiene datos)"""
+        if filter_type in self._traffic:
+            self._urgent.add(filter_type)
+
+    # --- Plan ----------------------------------------------------------------
+
+    @staticmethod
+    def _seconds_until_midnight() -> float:
+        now = datetime.now()
+        midnight = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+        return max((midnight - now).total_seconds(), 1.0)
+
+    def plan(self) -> Dict[str, float]:
+        """
+        Intervalo de refresco (segundos) por filtro.
+
+        La cuota disponible (restante menos la reserva) se reparte de forma
+        uniforme hasta medianoche y, entre filtros, en proporción a
+        base_weight + tráfico reciente. Nunca por debajo de min_interval.
+        """
+        budget = self.quota.remaining() - self.quota_reserve
+        if budget <= 0:
+            return {f: math.inf for f in self.filters}
+
+        refreshes_per_second = budget / self._seconds_until_midnight()
+
+        if self.union_loader is not None:
+            # Un único refresco cubre todos los filtros
+            interval = max(self.min_interval, 1 / refreshes_per_second)
+            return {f: interval for f in self.filters}
+
+        self._decay_traffic()
+        weights = {f: self.base_weight + self._traffic[f] for f in self.filters}
+        total_weight = sum(weights.values())
+
+        return {
+            f: max(self.min_interval, 1 / (refreshes_per_second * weights[f] / total_weight))
+            for f in self.filters
+        }
+
+    def status(self) -> Dict[str, Any]:
+        """Plan actual, tráfico y edad de cada filtro en el almacén"""
+        now = time.time()
+        plan = self.plan()
+        return {
+            "quota_remaining": self.quota.remaining(),
+            "filters": {
+                f: {
+                    "interval_seconds": None if math.isinf(plan[f]) else round(plan[f], 1),
+                    "traffic": round(self._traffic[f], 2),
+                    "age_seconds": round(now - self.store.updated_at(f), 1) if self.store.updated_at(f) else None,
+                    "refreshes": self.refresh_counts[f],
+                }
+                for f in self.filters
+            },
+        }
+
+    # --- Ejecución -----------------------------------------------------------
+
+    async def refresh(self, filter_type: str) -> bool:
+        """Refrescar un filtro; no sobrescribe el almacén con datos de ejemplo"""
+        try:
+            result = await self.loader(filter_type)
+        except Exception as e:
+            logger.error(f"❌ Prefetch '{filter_type}' falló: {str(e)}")
+            return False
+
+        if result["used_sample"]:
+            logger.warning(f"⚠️ Prefetch '{filter_type}': sin datos reales, se conserva el último resultado")
+            return False
+
+        await asyncio.to_thread(
+            self.store.put, filter_type, result["news"], _upstream(result), result.get("ranked"),
+            result.get("unchanged", False)
+        )
+        self.refresh_counts[filter_type] += 1
+        logger.info(f"🔁 Prefetch '{filter_type}': {len(result['news'])} noticias en el almacén")
+        return True
+
+    async def refresh_all(self) -> Set[str]:
+        """Refrescar todos los filtros con una sola carga (fetch "union")"""
+        try:
+            results = await self.union_loader()
+        except Exception as e:
+            logger.error(f"❌ Prefetch union falló: {str(e)}")
+            return set()
+
+        refreshed: Set[str] = set()
+        for filter_type in self.filters:
+            result = results.get(filter_type)
+            if result is None or result["used_sample"]:
+                logger.warning(f"⚠️ Prefetch '{filter_type}': sin datos reales, se conserva el último resultado")
+                continue
+            await asyncio.to_thread(
+                self.store.put, filter_type, result["news"], _upstream(result), result.get("ranked"),
+                result.get("unchanged", False)
+            )
+            self.refresh_counts[filter_type] += 1
+            refreshed.add(filter_type)
+
+        logger.info(f"🔁 Prefetch union: {len(refreshed)}/{len(self.filters)} filtros actualizados con una consulta")
+        return refreshed
+
+    async def _run_once_union(self) -> Set[str]:
+        plan = self.plan()
+        oldest = min(self.store.updated_at(f) for f in self.filters)
+        urgent = bool(self._urgent) or oldest == 0.0
+
+        if urgent:
+            if self.quota.remaining() <= 0:
+                return set()
+        elif time.time() - oldest < min(plan.values()):
+            return set()
+
+        self._urgent.clear()
+        with self.store.refresh_lock("union") as acquired:
+            # Otro worker lo está refrescando o acaba de hacerlo
+            if not acquired or min(self.store.updated_at(f) for f in self.filters) != oldest:
+                return set()
+            return await self.refresh_all()
+
+    async def run_once(self) -> Set[str]:
+        """Refrescar los filtros que tocan según el plan; devuelve los refrescados"""
+        if self.union_loader is not None:
+            return await self._run_once_union()
+
+        plan = self.plan()
+        now = time.time()
+        refreshed: Set[str] = set()
+
+        # Primero los urgentes y los que llevan más tiempo sin refrescar
+        for filter_type in sorted(self.filters, key=lambda f: (f not in self._urgent, self.store.updated_at(f))):
+            updated_at = self.store.updated_at(filter_type)
+            is_empty = updated_at == 0.0
+            urgent = filter_type in self._urgent or is_empty
+
+            if urgent:
+                # Los filtros sin datos pueden usar la reserva, pero nunca pasar del límite
+                if self.quota.remaining() <= 0:
+                    continue
+            elif now - updated_at < plan[filter_type]:
+                continue
+
+            self._urgent.discard(filter_type)
+            with self.store.refresh_lock(filter_type) as acquired:
+                # Otro worker lo está refrescando o acaba de hacerlo
+                if not acquired or self.store.updated_at(filter_type) != updated_at:
+                    continue
+                if await self.refresh(filter_type):
+                    refreshed.add(filter_type)
+
+        return refreshed
+
+    async def run_forever(self) -> None:
+        """Bucle principal del planificador"""
+        logger.info(f"🛰️ Prefetch iniciado para filtros: {', '.join(self.filters)}")
+        # Jitter inicial para que varios workers no refresquen a la vez
+        await asyncio.sleep(random.uniform(0, self.tick))
+
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.error(f"❌ Error en el ciclo de prefetch: {str(e)}")
+            await asyncio.sleep(self.tick)
+
+    def start(self) -> asyncio.Task:
+        """Lanzar el planificador como tarea de fondo en el event loop actual"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run_forever())
+        return self._task
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
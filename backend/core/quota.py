@@ -0,0 +1,154 @@
+"""
+Ledger de cuota diaria de NewsAPI, atómico y compartido entre procesos
+
+Sustituye al antiguo daily_requests.json (read-modify-write sin bloqueo).
+El contador vive en SQLite en modo WAL y cada reserva se hace dentro de
+una transacción BEGIN IMMEDIATE, así que los 4 workers de uvicorn nunca
+pierden incrementos ni superan el límite diario.
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class QuotaLedger:
+    """
+    Bucket de tokens diario: `daily_limit` tokens que se recargan cada día.
+
+    - `try_reserve()` reserva cuota ANTES de llamar al upstream.
+    - `refund()` devuelve la reserva si la llamada no llegó a consumir cuota.
+    - `cached_used()` es el camino rápido en memoria para lecturas.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        daily_limit: int = 100,
+        retention_days: int = 7,
+        cache_ttl: float = 1.0
+    ):
+        self.path = path
+        self.daily_limit = daily_limit
+        self.retention_days = retention_days
+        self.cache_ttl = cache_ttl
+        self._lock = threading.Lock()
+        # Autocommit: las transacciones se abren explícitamente con BEGIN IMMEDIATE
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS daily_quota (day TEXT PRIMARY KEY, used INTEGER NOT NULL)"
+        )
+
+        self._cached_day = ""
+        self._cached_used = 0
+        self._cached_at = 0.0
+        self._pruned_day = ""
+
+    def _get_today_key(self) -> str:
+        """Obtener clave para el día actual"""
+        return datetime.now().strftime("%Y-%m-%d")
+
+    def _remember(self, day: str, used: int) -> None:
+        self._cached_day = day
+        self._cached_used = used
+        self._cached_at = time.monotonic()
+
+    def cached_used(self) -> Optional[int]:
+        """Requests usadas hoy según la caché en memoria, o None si está caducada"""
+        if self._cached_day != self._get_today_key():
+            return None
+        if time.monotonic() - self._cached_at > self.cache_ttl:
+            return None
+        return self._cached_used
+
+    def used_today(self) -> int:
+        """Número de requests realizadas hoy (camino rápido en memoria si está fresco)"""
+        cached = self.cached_used()
+        if cached is not None:
+            return cached
+
+        today = self._get_today_key()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT used FROM daily_quota WHERE day = ?", (today,)
+            ).fetchone()
+            used = row[0] if row else 0
+            self._remember(today, used)
+        return used
+
+    def remaining(self) -> int:
+        """Requests disponibles hoy"""
+        return max(self.daily_limit - self.used_today(), 0)
+
+    def try_reserve(self, tokens: int = 1) -> bool:
+        """Reservar `tokens` de la cuota de hoy de forma atómica; False si no hay cuota"""
+        today = self._get_today_key()
+
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._prune_locked(today)
+                row = self._conn.execute(
+                    "SELECT used FROM daily_quota WHERE day = ?", (today,)
+                ).fetchone()
+                used = row[0] if row else 0
+
+                if used + tokens > self.daily_limit:
+                    self._conn.execute("COMMIT")
+                    self._remember(today, used)
+                    return False
+
+                self._conn.execute(
+                    """
+                    INSERT INTO daily_quota (day, used) VALUES (?, ?)
+                    ON CONFLICT(day) DO UPDATE SET used = used + excluded.used
+                    """,
+                    (today, tokens),
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+            self._remember(today, used + tokens)
+            return True
+
+    def refund(self, tokens: int = 1) -> None:
+        """Devolver una reserva que no llegó a consumir cuota (p. ej. error del upstream)"""
+        today = self._get_today_key()
+
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "UPDATE daily_quota SET used = MAX(used - ?, 0) WHERE day = ?",
+                    (tokens, today),
+                )
+                row = self._conn.execute(
+                    "SELECT used FROM daily_quota WHERE day = ?", (today,)
+                ).fetchone()
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+            self._remember(today, row[0] if row else 0)
+
+    def _prune_locked(self, today: str) -> None:
+        """Limpiar días anteriores (mantener solo los últimos `retention_days` días)"""
+        if self._pruned_day == today:
+            return
+
+        cutoff_date = (datetime.now() - timedelta(days=self.retention_days)).strftime("%Y-%m-%d")
+        self._conn.execute("DELETE FROM daily_quota WHERE day < ?", (cutoff_date,))
+        self._pruned_day = today
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,213 @@
+"""
+Índice local de búsqueda full-text (SQLite FTS5 + ranking BM25)
+
+Cada artículo descargado de NewsAPI se indexa de forma incremental (una
+fila por URL canónica), así que /api/search responde consultas
+arbitrarias en milisegundos sin gastar cuota.
+"""
+
+import logging
+import re
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+from agent.dedup import canonical_url
+
+logger = logging.getLogger(__name__)
+
+SEARCH_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# Peso de cada columna en BM25: el título cuenta más que la descripción
+BM25_WEIGHTS = (4.0, 1.0)
+
+# Categorías guardadas que encajan con cada filtro de búsqueda ("both" cubre ambos temas)
+CATEGORY_FILTERS = {
+    "ai": ("ai", "both"),
+    "marketing": ("marketing", "both"),
+    "both": ("both",),
+}
+
+
+def build_match_query(query: str, operator: str = "AND") -> str:
+    """
+    Convertir texto libre en una consulta FTS5 segura.
+
+    Cada término va entre comillas (sin operadores ni sintaxis del usuario)
+    y el último admite prefijo, para búsquedas mientras se escribe.
+    """
+    tokens = SEARCH_TOKEN_RE.findall(query.lower())
+    if not tokens:
+        return ""
+    terms = [f'"{token}"' for token in tokens[:-1]] + [f'"{tokens[-1]}"*']
+    return f" {operator} ".join(terms)
+
+
+class ArticleSearchIndex:
+    """Artículos indexados por URL canónica con búsqueda FTS5, compartido entre workers"""
+
+    def __init__(self, path: str, retention_days: int = 30, prune_interval: float = 3600):
+        self.path = path
+        self.retention_days = retention_days
+        self.prune_interval = prune_interval
+        self._last_prune = 0.0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS articles (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                url_key TEXT UNIQUE NOT NULL,
+                title TEXT NOT NULL,
+                description TEXT NOT NULL,
+                url TEXT NOT NULL,
+                image TEXT,
+                source TEXT,
+                category TEXT,
+                published_at TEXT,
+                indexed_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_articles_indexed_at ON articles (indexed_at);
+
+            -- Tabla FTS de contenido externo: el texto vive una sola vez en `articles`
+            CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
+                title, description, content='articles', content_rowid='id'
+            );
+
+            CREATE TRIGGER IF NOT EXISTS articles_ai AFTER INSERT ON articles BEGIN
+                INSERT INTO articles_fts (rowid, title, description)
+                VALUES (new.id, new.title, new.description);
+            END;
+            CREATE TRIGGER IF NOT EXISTS articles_ad AFTER DELETE ON articles BEGIN
+                INSERT INTO articles_fts (articles_fts, rowid, title, description)
+                VALUES ('delete', old.id, old.title, old.description);
+            END;
+            """
+        )
+        self._conn.commit()
+
+    def add_articles(
+        self,
+        articles: Iterable[Dict],
+        categorize: Optional[Callable[[Dict], str]] = None
+    ) -> int:
+        """
+        Indexar artículos brutos de NewsAPI; los ya indexados (misma URL canónica) se ignoran.
+
+        Returns:
+            Número de artículos nuevos en el índice
+        """
+        now = time.time()
+        rows = []
+        for article in articles:
+            if not article or not isinstance(article, dict):
+                continue
+            url_key = canonical_url(article.get("url") or "")
+            title = article.get("title") or ""
+            if not url_key or not title:
+                continue
+            rows.append((
+                url_key,
+                title,
+                article.get("description") or "",
+                article.get("url") or "",
+                article.get("urlToImage"),
+                (article.get("source") or {}).get("name"),
+                categorize(article) if categorize else None,
+                article.get("publishedAt"),
+                now,
+            ))
+
+        if not rows:
+            return 0
+
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                """
+                INSERT OR IGNORE INTO articles
+                    (url_key, title, description, url, image, source, category, published_at, indexed_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                rows
+            )
+            added = self._conn.total_changes - before
+            self._conn.commit()
+
+            if now - self._last_prune > self.prune_interval:
+                self._prune_locked(now)
+
+        return added
+
+    def _prune_locked(self, now: float) -> None:
+        """Eliminar artículos más antiguos que la retención (el trigger limpia el FTS)"""
+        self._last_prune = now
+        cursor = self._conn.execute(
+            "DELETE FROM articles WHERE indexed_at < ?",
+            (now - self.retention_days * 86400,)
+        )
+        self._conn.commit()
+        if cursor.rowcount:
+            logger.info(f"🧹 Índice de búsqueda: {cursor.rowcount} artículos antiguos eliminados")
+
+    def search(self, query: str, limit: int = 20, category: Optional[str] = None) -> List[Dict]:
+        """
+        Artículos que contienen todos los términos, ordenados por BM25.
+
+        Si ninguno contiene todos los términos, se relaja a cualquiera de ellos.
+        `category` ("ai", "marketing", "both") filtra por tema; "ai" y
+        "marketing" incluyen los artículos que tratan ambos temas.
+        """
+        results: List[Dict] = []
+        for operator in ("AND", "OR"):
+            match = build_match_query(query, operator)
+            if not match:
+                return []
+            results = self._search(match, limit, category)
+            if results or len(SEARCH_TOKEN_RE.findall(query)) < 2:
+                break
+        return results
+
+    def _search(self, match: str, limit: int, category: Optional[str]) -> List[Dict]:
+        sql = f"""
+            SELECT a.title, a.description, a.url, a.image, a.source, a.category, a.published_at,
+                   bm25(articles_fts, {BM25_WEIGHTS[0]}, {BM25_WEIGHTS[1]}) AS rank
+            FROM articles_fts
+            JOIN articles a ON a.id = articles_fts.rowid
+            WHERE articles_fts MATCH ?
+        """
+        params: List = [match]
+        if category:
+            categories = CATEGORY_FILTERS.get(category, (category,))
+            sql += f" AND a.category IN ({','.join('?' * len(categories))})"
+            params.extend(categories)
+        sql += " ORDER BY rank LIMIT ?"
+        params.append(limit)
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+
+        return [
+            {
+                "title": title,
+                "description": (description or "")[:200],
+                "url": url,
+                "image": image,
+                "source": source,
+                "category": category_value,
+                "publishedAt": published_at,
+                # bm25() es negativo: más negativo = más relevante
+                "score": round(-rank, 4),
+            }
+            for title, description, url, image, source, category_value, published_at, rank in rows
+        ]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
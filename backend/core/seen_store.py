@@ -0,0 +1,222 @@
+"""
+Registro persistente de artículos ya vistos (SQLite + filtro de Bloom en memoria)
+
+Cada artículo se registra con dos claves: su URL canónica y una firma de
+su título. El filtro de Bloom responde en memoria a la consulta más
+habitual ("nunca visto") sin tocar disco; solo los positivos (reales o
+falsos) se confirman en SQLite.
+
+La retención se aplica periódicamente (como en el índice de búsqueda) y el
+Bloom se reconstruye desde disco en cada poda o en cuanto supera su
+capacidad, para que su tasa de falsos positivos no crezca sin límite.
+"""
+
+import hashlib
+import logging
+import math
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from agent.dedup import canonical_url, title_words
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    """Filtro de Bloom con doble hashing sobre un digest blake2b"""
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        capacity = max(capacity, 1)
+        self.capacity = capacity
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+
+    def add(self, key: str) -> None:
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+def article_keys(article: Dict) -> List[str]:
+    """Claves del artículo: URL canónica y firma del título"""
+    keys = []
+
+    clean_url = canonical_url(article.get("url") or "")
+    if clean_url:
+        keys.append(f"url:{clean_url}")
+
+    words = title_words(article.get("title") or "")
+    if words:
+        signature = hashlib.sha1(" ".join(sorted(words)).encode("utf-8")).hexdigest()
+        keys.append(f"title:{signature}")
+
+    return keys
+
+
+class SeenArticleStore:
+    """
+    Registro de artículos servidos, compartido entre requests, filtros y workers.
+
+    Los workers comparten el fichero SQLite. Cada proceso mantiene su propio
+    filtro de Bloom y lo sincroniza con las filas nuevas de otros procesos
+    como mucho una vez por `sync_interval` segundos. Las entradas antiguas
+    se eliminan como mucho una vez por `prune_interval` segundos.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        retention_days: int = 7,
+        bloom_capacity: int = 100000,
+        sync_interval: float = 1.0,
+        prune_interval: float = 3600
+    ):
+        self.path = path
+        self.retention_days = retention_days
+        self.bloom_capacity = bloom_capacity
+        self.sync_interval = sync_interval
+        self.prune_interval = prune_interval
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS seen_articles (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                key TEXT NOT NULL UNIQUE,
+                first_seen REAL NOT NULL,
+                last_seen REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_seen_last_seen ON seen_articles (last_seen)"
+        )
+        self._conn.commit()
+
+        self._bloom = BloomFilter(bloom_capacity)
+        self._bloom_keys = 0
+        self._last_row_id = 0
+        self._last_sync = 0.0
+        self._last_prune = 0.0
+
+        self.prune()
+
+    def prune(self) -> int:
+        """Eliminar entradas no vistas en los últimos `retention_days` días y reconstruir el Bloom"""
+        with self._lock:
+            return self._prune_locked(time.time())
+
+    def _prune_locked(self, now: float) -> int:
+        self._last_prune = now
+        deleted = self._conn.execute(
+            "DELETE FROM seen_articles WHERE last_seen < ?", (now - self.retention_days * 86400,)
+        ).rowcount
+        self._conn.commit()
+        self._rebuild_bloom_locked()
+
+        if deleted:
+            logger.info(f"🧹 Registro de vistos: {deleted} entradas antiguas eliminadas")
+        return deleted
+
+    def _rebuild_bloom_locked(self) -> None:
+        """Un filtro de Bloom no admite borrados: se reconstruye desde disco"""
+        rows = self._conn.execute("SELECT COUNT(*) FROM seen_articles").fetchone()[0]
+        # Con más entradas vivas que la capacidad configurada, dimensionarlo con holgura
+        self._bloom = BloomFilter(max(self.bloom_capacity, 2 * rows))
+        self._bloom_keys = 0
+        self._last_row_id = 0
+        self._sync_bloom_locked(force=True)
+
+    def _maintain_locked(self) -> None:
+        """Poda periódica y reconstrucción del Bloom si ya tiene más claves que su capacidad"""
+        now = time.time()
+        if now - self._last_prune > self.prune_interval:
+            self._prune_locked(now)
+        elif self._bloom_keys > self._bloom.capacity:
+            self._rebuild_bloom_locked()
+
+    def _sync_bloom_locked(self, force: bool = False) -> None:
+        """Añadir al Bloom las claves insertadas (también por otros workers) desde la última sync"""
+        now = time.monotonic()
+        if not force and now - self._last_sync < self.sync_interval:
+            return
+
+        rows = self._conn.execute(
+            "SELECT id, key FROM seen_articles WHERE id > ? ORDER BY id", (self._last_row_id,)
+        ).fetchall()
+        for row_id, key in rows:
+            self._bloom.add(key)
+            self._last_row_id = row_id
+        self._bloom_keys += len(rows)
+        self._last_sync = now
+
+    def mark_seen(self, articles: Iterable[Dict]) -> None:
+        """Registrar artículos como vistos (conserva la primera vez que se vieron)"""
+        now = time.time()
+        keys = {key for article in articles for key in article_keys(article)}
+        if not keys:
+            return
+
+        with self._lock:
+            self._conn.executemany(
+                """
+                INSERT INTO seen_articles (key, first_seen, last_seen) VALUES (?, ?, ?)
+                ON CONFLICT(key) DO UPDATE SET last_seen = excluded.last_seen
+                """,
+                [(key, now, now) for key in keys],
+            )
+            self._conn.commit()
+            for key in keys:
+                self._bloom.add(key)
+            # Las filas nuevas se cuentan al sincronizar (cada una una vez, sean de quien sean)
+            self._sync_bloom_locked()
+            self._maintain_locked()
+
+    def first_seen(self, article: Dict) -> Optional[float]:
+        """Timestamp de la primera vez que se vio el artículo, o None si nunca se vio"""
+        with self._lock:
+            self._sync_bloom_locked()
+            return self._first_seen_locked(article_keys(article))
+
+    def _first_seen_locked(self, keys: List[str]) -> Optional[float]:
+        candidates = [key for key in keys if key in self._bloom]
+        if not candidates:
+            # Camino rápido: negativo seguro, sin tocar disco
+            return None
+
+        placeholders = ",".join("?" * len(candidates))
+        row = self._conn.execute(
+            f"SELECT MIN(first_seen) FROM seen_articles WHERE key IN ({placeholders})",
+            candidates,
+        ).fetchone()
+        return row[0] if row else None
+
+    def filter_unseen_since(self, articles: List[Dict], since: datetime) -> List[Dict]:
+        """Conservar solo los artículos que no se habían visto antes de `since`"""
+        since_ts = since.timestamp()
+
+        with self._lock:
+            self._sync_bloom_locked()
+            unseen = []
+            for article in articles:
+                first_seen = self._first_seen_locked(article_keys(article))
+                if first_seen is None or first_seen >= since_ts:
+                    unseen.append(article)
+            return unseen
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -3,9 +3,11 @@ Backend principal de la plataforma de noticias de IA y Marketing
 Dentsu - Prueba Técnica
 """
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from dotenv import load_dotenv
+import asyncio
 import os
 
 # Cargar variables de entorno primero
@@ -13,12 +15,16 @@ load_dotenv("../.env")
 
 # Importar rutas después de cargar variables
 from api.endpoints import router
+from api.dependencies import lifespan
+from core.config import settings
+from core.metrics import clear_snapshots, metrics
 
 # Crear instancia de FastAPI
 app = FastAPI(
     title="Plataforma de Noticias IA y Marketing",
     description="API para obtener y filtrar noticias de Inteligencia Artificial y Marketing",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan  # Un único NewsAgent por worker
 )
 
 # Configurar CORS para permitir conexiones desde el frontend
@@ -47,6 +53,18 @@ async def health_check():
     """Endpoint de verificación de salud"""
     return {"status": "healthy"}
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics(request: Request):
+    """Métricas en formato de texto de Prometheus, sumadas entre todos los workers"""
+    gauges = {}
+    agent = getattr(request.app.state, "news_agent", None)
+    if agent is not None:
+        gauges["news_quota_used_today"] = ("Requests de NewsAPI gastadas hoy", await agent.get_daily_requests_count())
+        gauges["news_quota_daily_limit"] = ("Límite diario de requests de NewsAPI", agent.quota.daily_limit)
+    
+    body = await asyncio.to_thread(metrics.render, settings.METRICS_DIR, gauges)
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4; charset=utf-8")
+
 if __name__ == "__main__":
     import uvicorn
     
@@ -55,10 +73,14 @@ if __name__ == "__main__":
     host = os.getenv("HOST", "0.0.0.0")
     debug = os.getenv("DEBUG", "False").lower() == "true"
     
+    # Instantáneas de métricas de una ejecución anterior: los contadores empiezan de cero
+    os.makedirs(settings.METRICS_DIR, exist_ok=True)
+    clear_snapshots(settings.METRICS_DIR)
+    
     uvicorn.run(
         "main:app",
         host=host,
         port=port,
         reload=debug,
-        workers=1 if debug else 4  # Múltiples workers en producción
+        workers=1 if debug else int(os.getenv("WEB_CONCURRENCY", 4))  # Múltiples workers en producción
     )
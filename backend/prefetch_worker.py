@@ -0,0 +1,76 @@
+"""
+Plataforma de Noticias IA y Marketing - Dentsu
+Proceso de prefetch en segundo plano (independiente del servidor web)
+
+Mantiene caliente el almacén local de artículos que sirve /api/get-news en
+modo prefetch. Úsalo con NEWS_SERVING_MODE=prefetch y PREFETCH_IN_APP=False
+para que los workers de uvicorn no hagan prefetch por su cuenta.
+
+Uso:
+    python prefetch_worker.py            # bucle continuo
+    python prefetch_worker.py --once     # un único ciclo (p. ej. desde cron)
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+from dotenv import load_dotenv
+
+# Cargar variables de entorno desde el directorio padre
+load_dotenv("../.env")
+
+from agent.langgraph_agent import NewsAgent
+from api.dependencies import create_image_proxy, create_incremental_store, create_prefetch_scheduler
+from core.article_store import ArticleStore
+from core.config import settings
+from core.search_index import ArticleSearchIndex
+from core.seen_store import SeenArticleStore
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+async def main_async(once: bool):
+    search_index = ArticleSearchIndex(settings.SEARCH_INDEX_PATH, retention_days=settings.SEARCH_RETENTION_DAYS)
+    # Registra las imágenes y precalienta miniaturas en la caché compartida con la app
+    image_proxy = create_image_proxy() if settings.IMAGE_PROXY else None
+    agent = NewsAgent(
+        search_index=search_index,
+        image_proxy=image_proxy,
+        incremental_store=create_incremental_store()
+    )
+    seen_store = SeenArticleStore(
+        settings.SEEN_STORE_PATH,
+        retention_days=settings.SEEN_RETENTION_DAYS,
+        bloom_capacity=settings.SEEN_BLOOM_CAPACITY
+    )
+    scheduler = create_prefetch_scheduler(agent, ArticleStore(settings.ARTICLE_STORE_DIR), seen_store)
+
+    try:
+        if once:
+            refreshed = await scheduler.run_once()
+            logger.info(f"✅ Ciclo de prefetch completado: {', '.join(sorted(refreshed)) or 'nada que refrescar'}")
+            print(json.dumps(scheduler.status(), indent=2))
+        else:
+            await scheduler.run_forever()
+    finally:
+        await agent.aclose()
+        seen_store.close()
+        search_index.close()
+        if image_proxy is not None:
+            await image_proxy.aclose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prefetch de noticias en segundo plano")
+    parser.add_argument("--once", action="store_true", help="Ejecutar un único ciclo y salir")
+    args = parser.parse_args()
+
+    print("🛰️ Iniciando prefetch de noticias...")
+    print(f"📂 Almacén: {settings.ARTICLE_STORE_DIR}")
+
+    try:
+        asyncio.run(main_async(args.once))
+    except KeyboardInterrupt:
+        print("👋 Prefetch detenido")
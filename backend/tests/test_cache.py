@@ -0,0 +1,133 @@
+"""
+NewsCache: carga single-flight por clave, que sobrevive a la cancelación de
+la request que la lanzó, y stale-while-revalidate
+"""
+
+import asyncio
+
+import pytest
+
+from core.cache import NewsCache
+
+
+class SlowLoader:
+    """Loader que espera a `release` y cuenta sus ejecuciones"""
+
+    def __init__(self, value="noticias"):
+        self.value = value
+        self.calls = 0
+        self.release = asyncio.Event()
+
+    async def __call__(self):
+        self.calls += 1
+        await self.release.wait()
+        return self.value
+
+
+async def _settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_concurrent_misses_share_one_load():
+    async def scenario():
+        cache = NewsCache(ttl=60)
+        loader = SlowLoader()
+        requests = [asyncio.create_task(cache.get_or_load("both", loader)) for _ in range(10)]
+        await _settle()
+        loader.release.set()
+
+        assert await asyncio.gather(*requests) == ["noticias"] * 10
+        assert loader.calls == 1
+        assert cache.stats["loads"] == 1 and cache.stats["coalesced"] == 9
+
+    asyncio.run(scenario())
+
+
+def test_load_survives_cancellation_of_the_leading_request():
+    async def scenario():
+        cache = NewsCache(ttl=60)
+        loader = SlowLoader()
+        leader = asyncio.create_task(cache.get_or_load("both", loader))
+        await _settle()
+        follower = asyncio.create_task(cache.get_or_load("both", loader))
+        await _settle()
+
+        # El cliente que lanzó la carga se desconecta a mitad
+        leader.cancel()
+        await _settle()
+        assert leader.cancelled()
+        assert not follower.done()
+
+        loader.release.set()
+        assert await follower == "noticias"
+        assert loader.calls == 1
+        # La carga quedó en caché: la siguiente request es un hit sin loader
+        assert await cache.get_or_load("both", loader) == "noticias"
+        assert loader.calls == 1 and cache.stats["hits"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_load_completes_and_caches_when_every_waiter_cancels():
+    async def scenario():
+        cache = NewsCache(ttl=60)
+        loader = SlowLoader()
+        requests = [asyncio.create_task(cache.get_or_load("both", loader)) for _ in range(3)]
+        await _settle()
+        for request in requests:
+            request.cancel()
+        await _settle()
+
+        loader.release.set()
+        await _settle()
+        assert cache.get_stats()["inflight"] == 0
+        assert await cache.get_or_load("both", loader) == "noticias"
+        assert loader.calls == 1
+
+    asyncio.run(scenario())
+
+
+def test_failed_load_reaches_every_waiter_and_is_not_cached():
+    async def scenario():
+        cache = NewsCache(ttl=60)
+        calls = 0
+
+        async def failing():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            raise RuntimeError("NewsAPI caído")
+
+        results = await asyncio.gather(
+            *(cache.get_or_load("ai", failing) for _ in range(4)), return_exceptions=True
+        )
+        assert calls == 1
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert cache.stats["errors"] == 1
+
+        with pytest.raises(RuntimeError):
+            await cache.get_or_load("ai", failing)
+        assert calls == 2
+
+    asyncio.run(scenario())
+
+
+def test_stale_entry_is_served_while_one_refresh_runs():
+    async def scenario():
+        cache = NewsCache(ttl=0, stale_ttl=60)
+        cache.set("marketing", "anterior")
+        loader = SlowLoader("nuevo")
+
+        assert await cache.get_or_load("marketing", loader) == "anterior"
+        assert await cache.get_or_load("marketing", loader) == "anterior"
+        await _settle()
+        assert loader.calls == 1
+
+        loader.release.set()
+        await _settle()
+        cache.ttl = 60
+        assert await cache.get_or_load("marketing", loader) == "nuevo"
+        assert loader.calls == 1
+
+    asyncio.run(scenario())
@@ -0,0 +1,168 @@
+"""
+Paginación por cursor del conjunto ordenado publicado: recorrido completo,
+reanudación sobre una versión más nueva y cursores no válidos o falsificados
+(400, nunca 500) en /api/get-news
+"""
+
+import base64
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from api.dependencies import get_article_store, get_news_cache, get_prefetch, get_seen_store
+from api.news_service import decode_cursor, encode_cursor, paginate
+from app import app
+from core.article_store import ArticleStore, RankedSet
+
+
+def _articles(ids):
+    return [{"url": f"https://news.example/{i}", "title": f"Artículo {i}"} for i in ids]
+
+
+def _forge(state) -> str:
+    raw = json.dumps(state).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def _urls(news):
+    return [article["url"] for article in news]
+
+
+INVALID_CURSORS = [
+    "a",
+    "no-es-base64!!",
+    base64.urlsafe_b64encode(b"\xff\xfe\xfd").decode("ascii"),
+    _forge([1, 2, 3]),
+    _forge(None),
+    _forge({"v": 1, "k": "abc"}),
+    _forge({"v": "1", "k": "abc", "o": 1}),
+    _forge({"v": 1, "k": 7, "o": 1}),
+    _forge({"v": 1, "k": "abc", "o": -5}),
+    _forge({"v": 1, "k": "abc", "o": 1.5}),
+]
+
+
+def test_paginate_walks_the_whole_set_once():
+    ranked = RankedSet(1, _articles(range(23)))
+
+    served, cursor = paginate(ranked, 10)
+    pages = 1
+    while cursor is not None:
+        page, cursor = paginate(ranked, 10, cursor)
+        served.extend(page)
+        pages += 1
+
+    assert pages == 3
+    assert _urls(served) == _urls(ranked.news)
+
+
+def test_cursor_round_trip_and_last_page():
+    ranked = RankedSet(42, _articles(range(5)))
+
+    state = decode_cursor(encode_cursor(ranked, 3))
+    assert state == {"v": 42, "k": RankedSet.key(ranked.news[2]), "o": 3}
+    assert encode_cursor(ranked, 5) is None
+    assert encode_cursor(ranked, 0) is None
+
+
+def test_cursor_resumes_after_last_served_on_newer_version():
+    old = RankedSet(1, _articles(range(20)))
+    page, cursor = paginate(old, 8)
+
+    # Versión nueva: llegan artículos por delante y el orden se desplaza
+    new = RankedSet(2, _articles(["a", "b", "c"]) + old.news)
+    next_page, _ = paginate(new, 8, cursor)
+
+    assert _urls(next_page) == _urls(old.news[8:16])
+    assert not set(_urls(next_page)) & set(_urls(page))
+
+
+def test_cursor_falls_back_to_offset_when_last_served_is_gone():
+    old = RankedSet(1, _articles(range(20)))
+    _, cursor = paginate(old, 8)
+
+    new = RankedSet(2, old.news[:7] + old.news[8:])
+    next_page, _ = paginate(new, 4, cursor)
+
+    assert _urls(next_page) == _urls(new.news[8:12])
+
+
+def test_forged_offset_past_the_end_is_an_empty_last_page():
+    ranked = RankedSet(1, _articles(range(5)))
+    page, cursor = paginate(ranked, 10, _forge({"v": 1, "k": "desconocida", "o": 10 ** 9}))
+    assert page == [] and cursor is None
+
+
+@pytest.mark.parametrize("cursor", INVALID_CURSORS)
+def test_decode_rejects_invalid_cursors(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+@pytest.fixture
+def article_store(tmp_path):
+    return ArticleStore(str(tmp_path / "article_store"))
+
+
+@pytest.fixture
+def client(article_store):
+    app.dependency_overrides.update({
+        get_article_store: lambda: article_store,
+        get_news_cache: lambda: None,
+        get_seen_store: lambda: None,
+        get_prefetch: lambda: None,
+    })
+    # Sin `with`: no se ejecuta el lifespan (ni agente ni NewsAPI)
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+def _publish(article_store, ranked):
+    article_store.put("both", ranked[:12], ranked=ranked)
+    return article_store.ranked("both").version
+
+
+def test_endpoint_resumes_cursor_on_newer_version(client, article_store):
+    ranked = _articles(range(30))
+    _publish(article_store, ranked)
+    first_cursor = encode_cursor(article_store.ranked("both"), 10)
+
+    response = client.get("/api/get-news", params={"cursor": first_cursor, "limit": 10})
+    assert response.status_code == 200
+    body = response.json()
+    assert _urls(body["news"]) == _urls(ranked[10:20])
+    assert body["total"] == 30
+
+    _publish(article_store, _articles(["x", "y"]) + ranked)
+    response = client.get("/api/get-news", params={"cursor": body["next_cursor"], "limit": 10})
+    assert response.status_code == 200
+    body = response.json()
+    assert _urls(body["news"]) == _urls(ranked[20:30])
+    assert body["next_cursor"] is None
+
+
+@pytest.mark.parametrize("cursor", INVALID_CURSORS + [
+    _forge({"v": 1, "k": "abc", "o": 10 ** 30}),
+    _forge({"v": True, "k": "", "o": 0}),
+])
+def test_endpoint_bad_or_forged_cursor_is_never_a_server_error(client, article_store, cursor):
+    _publish(article_store, _articles(range(30)))
+
+    response = client.get("/api/get-news", params={"cursor": cursor, "limit": 5})
+    if cursor in INVALID_CURSORS:
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Cursor no válido"
+    else:
+        # Bien formado aunque falsificado: una página válida (quizá vacía)
+        assert response.status_code == 200
+
+
+def test_endpoint_cursor_without_published_set_is_gone(client):
+    response = client.get("/api/get-news", params={"cursor": _forge({"v": 1, "k": "abc", "o": 1})})
+    assert response.status_code == 410
+
+
+def test_endpoint_cursor_too_long_is_rejected(client):
+    response = client.get("/api/get-news", params={"cursor": "A" * 500})
+    assert response.status_code == 422
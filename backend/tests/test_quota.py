@@ -0,0 +1,123 @@
+"""
+Ledger de cuota diaria: reservas, devoluciones y cambio de día, también con
+varios procesos reservando a la vez sobre la misma base de datos
+"""
+
+import multiprocessing
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+from core.quota import QuotaLedger
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "quota.db")
+
+
+def _reserve_all(path: str, daily_limit: int, attempts: int) -> int:
+    """Reservas conseguidas por un proceso con su propio ledger"""
+    ledger = QuotaLedger(path, daily_limit=daily_limit)
+    try:
+        return sum(ledger.try_reserve() for _ in range(attempts))
+    finally:
+        ledger.close()
+
+
+def test_reserve_until_daily_limit(db_path):
+    ledger = QuotaLedger(db_path, daily_limit=3)
+
+    assert [ledger.try_reserve() for _ in range(4)] == [True, True, True, False]
+    assert ledger.used_today() == 3
+    assert ledger.remaining() == 0
+    # Una reserva de varios tokens que no cabe no consume nada
+    assert QuotaLedger(db_path, daily_limit=4).try_reserve(tokens=2) is False
+    assert QuotaLedger(db_path, daily_limit=4, cache_ttl=0).used_today() == 3
+
+
+def test_refund_returns_reservation(db_path):
+    ledger = QuotaLedger(db_path, daily_limit=2)
+    assert ledger.try_reserve() and ledger.try_reserve()
+    assert not ledger.try_reserve()
+
+    ledger.refund()
+    assert ledger.used_today() == 1
+    assert ledger.try_reserve()
+    assert not ledger.try_reserve()
+
+
+def test_refund_never_goes_below_zero(db_path):
+    ledger = QuotaLedger(db_path, daily_limit=2)
+    ledger.refund()
+    assert ledger.used_today() == 0
+
+    assert ledger.try_reserve()
+    ledger.refund(tokens=5)
+    assert ledger.used_today() == 0
+    assert ledger.remaining() == 2
+
+
+def test_day_rollover_starts_a_fresh_bucket(db_path, monkeypatch):
+    today = datetime.now()
+    yesterday_key = (today - timedelta(days=1)).strftime("%Y-%m-%d")
+    today_key = today.strftime("%Y-%m-%d")
+    ledger = QuotaLedger(db_path, daily_limit=2)
+    monkeypatch.setattr(ledger, "_get_today_key", lambda: yesterday_key)
+    assert ledger.try_reserve() and ledger.try_reserve()
+    assert not ledger.try_reserve()
+
+    monkeypatch.setattr(ledger, "_get_today_key", lambda: today_key)
+    # La caché en memoria es del día anterior: no debe servir para hoy
+    assert ledger.cached_used() is None
+    assert ledger.used_today() == 0
+    assert ledger.try_reserve()
+    assert ledger.used_today() == 1
+
+    # El día anterior sigue en el ledger (dentro de la retención) con su consumo
+    conn = sqlite3.connect(db_path)
+    rows = dict(conn.execute("SELECT day, used FROM daily_quota").fetchall())
+    conn.close()
+    assert rows == {yesterday_key: 2, today_key: 1}
+
+
+def test_reserve_prunes_days_outside_retention(db_path):
+    ledger = QuotaLedger(db_path, daily_limit=5, retention_days=7)
+    conn = sqlite3.connect(db_path)
+    conn.execute("INSERT INTO daily_quota (day, used) VALUES ('2000-01-01', 5)")
+    conn.commit()
+
+    assert ledger.try_reserve()
+    days = [row[0] for row in conn.execute("SELECT day FROM daily_quota")]
+    conn.close()
+    assert days == [ledger._get_today_key()]
+
+
+def test_concurrent_threads_never_exceed_limit(db_path):
+    ledger = QuotaLedger(db_path, daily_limit=50)
+    granted = []
+
+    def worker():
+        granted.append(sum(ledger.try_reserve() for _ in range(20)))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sum(granted) == 50
+    assert QuotaLedger(db_path, daily_limit=50).used_today() == 50
+
+
+def test_concurrent_processes_never_exceed_limit(db_path):
+    # Como los workers de uvicorn: cada proceso con su conexión y BEGIN IMMEDIATE
+    QuotaLedger(db_path, daily_limit=60).close()
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(4) as pool:
+        granted = pool.starmap(_reserve_all, [(db_path, 60, 30)] * 4)
+
+    assert sum(granted) == 60
+    assert QuotaLedger(db_path, daily_limit=60).used_today() == 60
@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { Button } from '@/components/ui/button';
 import { Card, CardContent, CardDescription, CardHeader, CardTitle } from '@/components/ui/card';
@@ -18,6 +18,12 @@ import {
   Loader2
 } from 'lucide-react';
 
+// Placeholder local servido por el backend (sin depender de hosts de terceros)
+const PLACEHOLDER_IMAGE = '/api/image/placeholder';
+
+// Noticias por página del scroll infinito
+const PAGE_SIZE = 12;
+
 const NewsPage = () => {
   const navigate = useNavigate();
   const { theme, toggleTheme } = useTheme();
@@ -30,26 +36,67 @@ const NewsPage = () => {
     return localStorage.getItem('newsFilter') || 'both';
   });
   const [error, setError] = useState(null);
+  // Cursor de la siguiente página (null si no hay más) y sentinela del scroll infinito
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const sentinelRef = useRef(null);
 
-  // Función para obtener noticias del backend
+  // Función para obtener noticias del backend (en streaming: cada noticia se pinta al llegar)
   const fetchNews = async (filterType = filter) => {
     setLoading(true);
     setError(null);
+    setNews([]);
+    setNextCursor(null);
     
     try {
-      const response = await fetch(`/api/get-news?filter_type=${filterType}`);
+      const response = await fetch(`/api/get-news/stream?filter_type=${filterType}&format=ndjson`);
       
       if (!response.ok) {
         throw new Error(`Error ${response.status}: ${response.statusText}`);
       }
       
-      const data = await response.json();
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = '';
+      let summary = null;
+      
+      const handleEvent = (event) => {
+        if (event.type === 'article') {
+          setNews((current) => [...current, event.article]);
+        } else if (event.type === 'reset') {
+          // NewsAPI falló a mitad de carga: llega el último resultado bueno en su lugar
+          setNews([]);
+        } else if (event.type === 'ranked') {
+          // Lo recibido era provisional: orden definitivo por relevancia
+          setNews((current) => {
+            const byUrl = new Map(current.map((article) => [article.url, article]));
+            return event.urls.map((url) => byUrl.get(url)).filter(Boolean);
+          });
+        } else if (event.type === 'summary') {
+          summary = event;
+        } else if (event.type === 'error') {
+          throw new Error(event.detail);
+        }
+      };
+      
+      // Una línea JSON por evento (NDJSON)
+      while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        
+        buffer += decoder.decode(value, { stream: true });
+        const lines = buffer.split('\n');
+        buffer = lines.pop();
+        lines.filter((line) => line.trim()).forEach((line) => handleEvent(JSON.parse(line)));
+      }
+      if (buffer.trim()) {
+        handleEvent(JSON.parse(buffer));
+      }
       
-      if (data.status === 'success') {
-        setNews(data.news || []);
-      } else {
+      if (!summary) {
         throw new Error('Error en la respuesta del servidor');
       }
+      setNextCursor(summary.next_cursor || null);
     } catch (err) {
       console.error('Error al obtener noticias:', err);
       setError(err.message);
@@ -61,6 +108,51 @@ const NewsPage = () => {
     }
   };
 
+  // Siguiente página del conjunto ya cargado: el backend la sirve sin volver a ejecutar el agente
+  const fetchMore = async () => {
+    if (!nextCursor || loadingMore) return;
+    setLoadingMore(true);
+    
+    try {
+      const params = new URLSearchParams({ filter_type: filter, cursor: nextCursor, limit: PAGE_SIZE });
+      const response = await fetch(`/api/get-news?${params}`);
+      
+      if (!response.ok) {
+        throw new Error(`Error ${response.status}: ${response.statusText}`);
+      }
+      
+      const page = await response.json();
+      setNews((current) => {
+        const urls = new Set(current.map((article) => article.url));
+        return [...current, ...page.news.filter((article) => !urls.has(article.url))];
+      });
+      setNextCursor(page.next_cursor || null);
+    } catch (err) {
+      // Cursor caducado o error puntual: se deja de paginar hasta el próximo refresco
+      console.error('Error al cargar más noticias:', err);
+      setNextCursor(null);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
+  // Pedir la siguiente página cuando el final de la lista entra en pantalla
+  useEffect(() => {
+    const sentinel = sentinelRef.current;
+    if (!sentinel || !nextCursor) return;
+    
+    const observer = new IntersectionObserver(
+      (entries) => {
+        if (entries[0].isIntersecting) {
+          fetchMore();
+        }
+      },
+      { rootMargin: '400px' }
+    );
+    observer.observe(sentinel);
+    return () => observer.disconnect();
+  }, [nextCursor, loadingMore, filter]);
+
   // Datos de ejemplo para demostración
   const getSampleNews = () => [
     {
@@ -218,8 +310,8 @@ const NewsPage = () => {
 
       {/* Main Content */}
       <main className="container mx-auto px-4 py-8">
-        {/* Estado de carga */}
-        {loading && (
+        {/* Estado de carga (hasta que llega la primera noticia) */}
+        {loading && news.length === 0 && (
           <div className="flex items-center justify-center py-16">
             <div className="text-center">
               <Loader2 className="w-8 h-8 animate-spin mx-auto mb-4 text-blue-600" />
@@ -245,7 +337,7 @@ const NewsPage = () => {
         )}
 
         {/* Grid de noticias */}
-        {!loading && news.length > 0 && (
+        {news.length > 0 && (
           <div className="grid gap-6 md:grid-cols-2 lg:grid-cols-3">
             {news.map((article, index) => (
               <Card 
@@ -255,11 +347,13 @@ const NewsPage = () => {
                 {/* Imagen */}
                 <div className="relative h-48 overflow-hidden">
                   <img
-                    src={article.image || 'https://images.unsplash.com/photo-1677442136019-21780ecad995?w=400&h=250&fit=crop'}
+                    src={article.image || PLACEHOLDER_IMAGE}
                     alt={article.title}
                     className="w-full h-full object-cover transition-transform duration-300 hover:scale-105"
                     onError={(e) => {
-                      e.target.src = 'https://images.unsplash.com/photo-1677442136019-21780ecad995?w=400&h=250&fit=crop';
+                      if (!e.target.src.endsWith(PLACEHOLDER_IMAGE)) {
+                        e.target.src = PLACEHOLDER_IMAGE;
+                      }
                     }}
                   />
                   
@@ -319,6 +413,13 @@ const NewsPage = () => {
           </div>
         )}
 
+        {/* Scroll infinito: sentinela y carga de la siguiente página */}
+        {!loading && nextCursor && (
+          <div ref={sentinelRef} className="flex items-center justify-center py-8">
+            {loadingMore && <Loader2 className="w-6 h-6 animate-spin text-blue-600" />}
+          </div>
+        )}
+
         {/* Estado vacío */}
         {!loading && news.length === 0 && !error && (
           <div className="text-center py-16">